@@ -1,23 +1,60 @@
 import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from flask_migrate import Migrate, stamp
 from flask_caching import Cache
 from config import Config
 
 db = SQLAlchemy()
 migrate = Migrate()
-cache = Cache(config={"CACHE_TYPE": "SimpleCache"})
+cache = Cache()
+# Prompt token counts, kept apart so they can't evict cached insights.
+token_cache = Cache()
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations")
 
 
 def create_app(config_class=Config):
     # app = Flask(__name__, template_folder="/app/templates", static_folder="static")
     app = Flask(__name__, template_folder="templates", static_folder="static")
-    app.config.from_object(Config)
+    app.config.from_object(config_class)
+
+    # Insights are cached in a SQLite file shared by every worker process.
+    app.config.setdefault("CACHE_TYPE", "app.utils.sqlite_cache.SQLiteCache")
+    app.config.setdefault(
+        "CACHE_SQLITE_PATH", os.path.join(app.instance_path, "cache.sqlite3")
+    )
+    app.config.setdefault("CACHE_MAX_ENTRIES", 10000)
+    app.config.setdefault("CACHE_MAX_BYTES", 64 * 1024 * 1024)
+    app.config.setdefault(
+        "TOKEN_CACHE_SQLITE_PATH", os.path.join(app.instance_path, "tokens.sqlite3")
+    )
+    app.config.setdefault("TOKEN_CACHE_MAX_ENTRIES", 50000)
+    app.config.setdefault("TOKEN_CACHE_MAX_BYTES", 8 * 1024 * 1024)
 
+    from app.utils.compression import init_compression
+    from app.utils.sqlite_pragmas import configure_sqlite, init_sqlite
+
+    # SQLite profile (WAL, pragmas, pool, writer queue); see SQLITE_DEFAULTS.
+    # Then insight_text() and the dictionaries for compressed insight bodies.
+    configure_sqlite(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    init_sqlite(app)
+    init_compression(app)
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
     cache.init_app(app)
+    token_cache.init_app(
+        app,
+        config={
+            "CACHE_SQLITE_PATH": app.config["TOKEN_CACHE_SQLITE_PATH"],
+            "CACHE_MAX_ENTRIES": app.config["TOKEN_CACHE_MAX_ENTRIES"],
+            "CACHE_MAX_BYTES": app.config["TOKEN_CACHE_MAX_BYTES"],
+        },
+    )
+
+    from app.utils.metrics import request_metrics
+
+    request_metrics.init_app(app)
 
     # from app.routes import register_blueprints
     # register_blueprints(app)
@@ -26,19 +63,48 @@ def create_app(config_class=Config):
     from app.routes.main import main_bp
     from app.routes.skills import skills_bp
     from app.routes.llm import llm_bp
+    from app.routes.api import api_bp
+    from app.routes.search import search_bp
+    from app.routes.metrics import metrics_bp
 
     app.register_blueprint(main_bp)
     app.register_blueprint(skills_bp)
     app.register_blueprint(llm_bp)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(metrics_bp)
+
+    from app.utils.jobs import insight_queue
+
+    insight_queue.init_app(app)
+
+    from app.utils.precompute import insight_precomputer
+
+    insight_precomputer.init_app(app)
+
+    from app.utils.prewarm import model_prewarmer
+
+    model_prewarmer.init_app(app)
+
+    from app.utils.retention import insight_compactor
+
+    insight_compactor.init_app(app)
+
+    from app.commands import register_commands
+
+    register_commands(app)
 
     # ✅ Use context here if you're doing db.create_all or other app-specific work
     with app.app_context():
         db_path = app.config["SQLALCHEMY_DATABASE_URI"].replace("sqlite:///", "")
         if not os.path.exists(db_path):
             db.create_all()
+            # Fresh databases already have the latest schema; existing ones
+            # are brought up to date with `flask db upgrade`.
+            stamp(directory=MIGRATIONS_DIR)
             print(f"✅ Created SQLite DB at: {db_path}")
 
     return app
 
 
-__all__ = ["db", "cache", "create_app"]
+__all__ = ["db", "cache", "token_cache", "create_app"]
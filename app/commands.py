@@ -0,0 +1,145 @@
+import json
+import os
+
+import click
+from flask.cli import AppGroup
+
+from app import db
+from app.utils.progress import rebuild_progress
+from app.utils.transfer import (
+    DEFAULT_CHUNK_SIZE,
+    FORMATS,
+    KINDS,
+    BulkImporter,
+    export_lines,
+    read_records,
+)
+
+progress_cli = AppGroup("progress", help="Maintain the per-skill progress aggregates.")
+data_cli = AppGroup("data", help="Bulk import and export of skills and history.")
+insights_cli = AppGroup("insights", help="Background insight generation and storage.")
+
+
+@progress_cli.command("rebuild")
+def rebuild_progress_command():
+    """Recompute skill_progress and skill_progress_buckets from milestones."""
+    rebuild_progress()
+    db.session.commit()
+    click.echo("Rebuilt skill progress aggregates.")
+
+
+def _format_for(path, fmt):
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+@data_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, allow_dash=True))
+@click.option(
+    "--format", "fmt", type=click.Choice(FORMATS), help="Default: by extension."
+)
+@click.option("--kind", type=click.Choice(KINDS), help="Record kind of a CSV file.")
+@click.option("--chunk-size", default=DEFAULT_CHUNK_SIZE, show_default=True)
+@click.option(
+    "--queue-insights",
+    is_flag=True,
+    help="Queue an initial insight job for every new skill.",
+)
+def import_command(path, fmt, kind, chunk_size, queue_insights):
+    """Import skills, milestones and insights from a JSONL or CSV file."""
+    fmt = _format_for(path, fmt)
+    with click.open_file(path, "r", encoding="utf-8") as stream:
+        try:
+            records = read_records(stream, fmt, kind)
+            report = BulkImporter(chunk_size, queue_insights).run(records)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+    click.echo(json.dumps(report, indent=2))
+
+
+@data_cli.command("export")
+@click.option(
+    "--kind",
+    "kinds",
+    type=click.Choice(KINDS),
+    multiple=True,
+    help="Kinds to export (repeatable). Default: all.",
+)
+@click.option(
+    "--format", "fmt", type=click.Choice(FORMATS), help="Default: by extension."
+)
+@click.option(
+    "-o", "--output", default="-", type=click.Path(dir_okay=False, allow_dash=True)
+)
+def export_command(kinds, fmt, output):
+    """Export skills, milestones and insights as JSONL or CSV."""
+    fmt = _format_for(output, fmt)
+    kinds = list(kinds or KINDS)
+    with click.open_file(output, "w", encoding="utf-8") as stream:
+        try:
+            for line in export_lines(kinds, fmt):
+                stream.write(line)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+    if output != "-":
+        click.echo(
+            f"Exported {', '.join(kinds)} to {os.path.abspath(output)}.", err=True
+        )
+
+
+@insights_cli.command("precompute")
+@click.option("--limit", type=int, help="Pairs to warm (default: PRECOMPUTE_BATCH).")
+def precompute_command(limit):
+    """Generate the most likely requested out-of-date insights now."""
+    from app.utils.precompute import insight_precomputer
+
+    outcomes = insight_precomputer.run_once(limit)
+    summary = ", ".join(f"{count} {outcome}" for outcome, count in outcomes.items())
+    click.echo(f"Precomputed insights: {summary or 'nothing to do'}.")
+
+
+@insights_cli.command("compact")
+@click.option("--dry-run", is_flag=True, help="Only count what would change.")
+@click.option(
+    "--vacuum", is_flag=True, help="Afterwards, shrink the database file (slow)."
+)
+def compact_command(dry_run, vacuum):
+    """Apply INSIGHT_RETENTION and compress stored insights."""
+    from app.utils.retention import insight_compactor
+
+    try:
+        result = insight_compactor.run_once(dry_run=dry_run)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    verb = "Would delete" if dry_run else "Deleted"
+    click.echo(
+        f"{verb} {result['deleted']} insight(s), "
+        f"{'would compress' if dry_run else 'compressed'} {result['compressed']}."
+    )
+    if vacuum and not dry_run:
+        insight_compactor.vacuum()
+        click.echo("Vacuumed the database.")
+
+
+@insights_cli.command("train-dictionary")
+@click.option("--samples", default=2000, show_default=True)
+def train_dictionary_command(samples):
+    """Train a compression dictionary on the newest insights."""
+    from app.utils.retention import insight_compactor
+
+    try:
+        dictionary, plain, trained = insight_compactor.train(samples)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    click.echo(
+        f"Dictionary {dictionary.id}: {len(dictionary.data)} bytes from "
+        f"{dictionary.samples} insights; sample compresses to {trained} bytes "
+        f"(without it: {plain}). Run `flask insights compact` to recompress."
+    )
+
+
+def register_commands(app):
+    app.cli.add_command(progress_cli)
+    app.cli.add_command(data_cli)
+    app.cli.add_command(insights_cli)
@@ -6,4 +6,4 @@ from flask_caching import Cache
 
 db = SQLAlchemy()
 migrate = Migrate()
-cache = Cache(config={"CACHE_TYPE": "SimpleCache"})
+cache = Cache()
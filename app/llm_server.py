@@ -0,0 +1,205 @@
+"""
+Stand-alone completion server hosting the model once for any number of web
+workers (run them with ``LLM_BACKEND=http``).
+
+    python -m app.llm_server --host 127.0.0.1 --port 8081
+
+Speaks the subset of the OpenAI completions API the HTTP backend uses:
+``POST /v1/completions`` (streamed as server-sent events or as one JSON
+body), plus ``GET /v1/models`` and ``GET /health``, and llama.cpp's
+``POST /tokenize`` for prompt budgeting. Generations run on the
+same model pool and prompt prefix cache as the in-process backend, sized by
+``LLM_POOL_SIZE`` and ``LLM_THREADS_PER_INSTANCE``. A client that disconnects
+mid-stream stops its generation and frees the model instance.
+
+The model is loaded in the background as soon as the server starts;
+``/health`` answers 503 until it is ready.
+"""
+
+import argparse
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.utils.llm_client import LocalLlamaBackend
+from app.utils.prewarm import ModelPrewarmer
+
+# Sampling options passed through to llama-cpp's create_completion.
+COMPLETION_PARAMS = (
+    "max_tokens",
+    "temperature",
+    "top_p",
+    "top_k",
+    "min_p",
+    "stop",
+    "seed",
+    "repeat_penalty",
+    "presence_penalty",
+    "frequency_penalty",
+)
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests for the client pool.
+    protocol_version = "HTTP/1.1"
+    server_version = "SkillMapLLM/1.0"
+
+    def do_GET(self):
+        backend = self.server.backend
+        if self.path == "/health":
+            status = self.server.prewarmer.status()
+            self._send_json(
+                200 if status["ready"] else 503,
+                {
+                    "status": "ok" if status["ready"] else status["model"],
+                    **status,
+                    "pool": backend.stats(),
+                },
+            )
+        elif self.path == "/v1/models":
+            self._send_json(
+                200,
+                {
+                    "object": "list",
+                    "data": [{"id": backend.model_id, "object": "model"}],
+                },
+            )
+        else:
+            self._send_error(404, f"Unknown path: {self.path}")
+
+    def do_POST(self):
+        if self.path == "/tokenize":
+            self._tokenize()
+            return
+        if self.path != "/v1/completions":
+            self._send_error(404, f"Unknown path: {self.path}")
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            prompt = payload["prompt"]
+            if not isinstance(prompt, str):
+                raise ValueError("'prompt' must be a string")
+        except (KeyError, TypeError, ValueError) as e:
+            self._send_error(400, f"Invalid completion request: {e}")
+            return
+
+        params = {k: payload[k] for k in COMPLETION_PARAMS if k in payload}
+        completion = {
+            "id": f"cmpl-{uuid.uuid4().hex}",
+            "object": "text_completion",
+            "created": int(time.time()),
+            "model": self.server.backend.model_id,
+        }
+        if payload.get("stream"):
+            self._stream(prompt, params, completion)
+        else:
+            self._complete(prompt, params, completion)
+
+    def _tokenize(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            content = json.loads(self.rfile.read(length) or b"{}")["content"]
+            if not isinstance(content, str):
+                raise ValueError("'content' must be a string")
+        except (KeyError, TypeError, ValueError) as e:
+            self._send_error(400, f"Invalid tokenize request: {e}")
+            return
+        tokens = self.server.backend.tokenize(content)
+        if tokens is None:
+            self._send_error(501, "No tokenizer available")
+            return
+        self._send_json(200, {"tokens": list(tokens)})
+
+    def _complete(self, prompt, params, completion):
+        try:
+            text = self.server.backend.complete(prompt, params)
+        except Exception as e:
+            self.log_error("Completion failed: %s", e)
+            self._send_error(500, f"Completion failed: {e}")
+            return
+        self._send_json(
+            200, {**completion, "choices": [_choice(text, finish_reason="stop")]}
+        )
+
+    def _stream(self, prompt, params, completion):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        chunks = self.server.backend.stream(prompt, params)
+        try:
+            try:
+                for text in chunks:
+                    self._send_event({**completion, "choices": [_choice(text)]})
+            except (BrokenPipeError, ConnectionResetError):
+                raise
+            except Exception as e:
+                # Headers are out already; report the failure in the stream.
+                self.log_error("Completion failed: %s", e)
+                self._send_event({"error": str(e)})
+            else:
+                self._send_event(
+                    {**completion, "choices": [_choice("", finish_reason="stop")]}
+                )
+            self._send_chunk(b"data: [DONE]\n\n")
+            self._send_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away: stop generating and drop the connection.
+            self.close_connection = True
+        finally:
+            chunks.close()
+
+    def _send_event(self, payload):
+        self._send_chunk(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send_json(status, {"error": {"message": message, "code": status}})
+
+
+def _choice(text, finish_reason=None):
+    return {"text": text, "index": 0, "logprobs": None, "finish_reason": finish_reason}
+
+
+def make_server(host="127.0.0.1", port=8081, backend=None):
+    server = ThreadingHTTPServer((host, port), CompletionHandler)
+    server.daemon_threads = True
+    server.backend = backend or LocalLlamaBackend()
+    server.prewarmer = ModelPrewarmer(backend=server.backend)
+    server.prewarmer.start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port)
+    print(f"Serving {server.backend.model_id} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 from datetime import datetime
 from app import db
+from app.utils.compression import CompressedText
 
 
 class Skill(db.Model):
     __tablename__ = "skills"
+    __table_args__ = (db.Index("ix_skills_updated_at_id", "updated_at", "id"),)
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
@@ -14,38 +16,224 @@ class Skill(db.Model):
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
+    # Child rows are removed by ON DELETE CASCADE in the database, so deleting
+    # a skill doesn't load its history first (passive_deletes).
     milestones = db.relationship(
-        "Milestone", backref="skill", lazy=True, cascade="all, delete-orphan"
+        "Milestone",
+        backref="skill",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     insights = db.relationship(
-        "LLMInsight", backref="skill", lazy=True, cascade="all, delete-orphan"
+        "LLMInsight",
+        backref="skill",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    insight_jobs = db.relationship(
+        "InsightJob",
+        backref="skill",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    progress = db.relationship(
+        "SkillProgress",
+        backref="skill",
+        uselist=False,
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+    progress_buckets = db.relationship(
+        "SkillProgressBucket",
+        lazy=True,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "category": self.category,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
     def __repr__(self):
         return f"<Skill {self.name}>"
 
 
 class Milestone(db.Model):
     __tablename__ = "milestones"
+    __table_args__ = (
+        db.Index("ix_milestones_skill_id_timestamp_id", "skill_id", "timestamp", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    skill_id = db.Column(db.Integer, db.ForeignKey("skills.id"), nullable=False)
+    skill_id = db.Column(
+        db.Integer, db.ForeignKey("skills.id", ondelete="CASCADE"), nullable=False
+    )
     note = db.Column(db.Text, nullable=False)
     progress_level = db.Column(db.String(50))  # e.g. Beginner, Intermediate, Advanced
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "skill_id": self.skill_id,
+            "note": self.note,
+            "progress_level": self.progress_level,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+        }
+
     def __repr__(self):
         return f"<Milestone {self.id} - Skill {self.skill_id}>"
 
 
+class SkillProgress(db.Model):
+    """Per-skill milestone summary, kept up to date by the milestone routes."""
+
+    __tablename__ = "skill_progress"
+
+    skill_id = db.Column(
+        db.Integer, db.ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True
+    )
+    milestone_count = db.Column(db.Integer, nullable=False, default=0)
+    last_timestamp = db.Column(db.DateTime)
+    latest_level = db.Column(db.String(50))  # progress_level of the newest milestone
+    max_level = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<SkillProgress {self.skill_id}: {self.milestone_count} milestones>"
+
+
+class SkillProgressBucket(db.Model):
+    """Milestone count and highest level per skill per day or week."""
+
+    __tablename__ = "skill_progress_buckets"
+
+    skill_id = db.Column(
+        db.Integer, db.ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True
+    )
+    period = db.Column(db.String(10), primary_key=True)  # "day" or "week"
+    bucket_start = db.Column(db.Date, primary_key=True)
+    milestone_count = db.Column(db.Integer, nullable=False, default=0)
+    max_level = db.Column(db.Integer, nullable=False, default=0)
+    last_timestamp = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return (
+            f"<SkillProgressBucket {self.skill_id} {self.period} {self.bucket_start}>"
+        )
+
+
 class LLMInsight(db.Model):
     __tablename__ = "llm_insights"
+    __table_args__ = (
+        db.Index("ix_llm_insights_generated_at_id", "generated_at", "id"),
+        db.Index(
+            "ix_llm_insights_skill_id_section_generated_at",
+            "skill_id",
+            "section",
+            "generated_at",
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    skill_id = db.Column(db.Integer, db.ForeignKey("skills.id"), nullable=False)
+    skill_id = db.Column(
+        db.Integer, db.ForeignKey("skills.id", ondelete="CASCADE"), nullable=False
+    )
     section = db.Column(db.String(100))  # e.g., "motivation", "next steps"
-    content = db.Column(db.Text, nullable=False)
+    # Stored compressed; see app.utils.compression.
+    content = db.Column(CompressedText, nullable=False)
     generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # sha256 of the rendered prompt, model and sampling parameters; identical
+    # prompts are answered from the stored row instead of the model.
+    prompt_hash = db.Column(db.String(64), index=True)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "skill_id": self.skill_id,
+            "section": self.section,
+            "content": self.content,
+            "generated_at": (
+                self.generated_at.isoformat() if self.generated_at else None
+            ),
+        }
 
     def __repr__(self):
         return f"<LLMInsight {self.section} for Skill {self.skill_id}>"
+
+
+class InsightDictionary(db.Model):
+    """A preset dictionary insight bodies are compressed against."""
+
+    __tablename__ = "insight_dictionaries"
+
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.LargeBinary, nullable=False)
+    samples = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<InsightDictionary {self.id}: {len(self.data)} bytes>"
+
+
+class InsightJob(db.Model):
+    __tablename__ = "insight_jobs"
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    id = db.Column(db.Integer, primary_key=True)
+    skill_id = db.Column(
+        db.Integer, db.ForeignKey("skills.id", ondelete="CASCADE"), nullable=False
+    )
+    section = db.Column(db.String(100))
+    status = db.Column(db.String(20), nullable=False, default=STATUS_QUEUED, index=True)
+    insight_id = db.Column(
+        db.Integer, db.ForeignKey("llm_insights.id", ondelete="SET NULL")
+    )
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    insight = db.relationship("LLMInsight")
+
+    @property
+    def finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "skill_id": self.skill_id,
+            "section": self.section,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "insight": (
+                {
+                    "id": self.insight.id,
+                    "section": self.insight.section,
+                    "content": self.insight.content,
+                    "generated_at": self.insight.generated_at.isoformat(),
+                }
+                if self.insight
+                else None
+            ),
+        }
+
+    def __repr__(self):
+        return f"<InsightJob {self.id} {self.status} for Skill {self.skill_id}>"
@@ -1,9 +1,15 @@
 from .main import main_bp
 from .skills import skills_bp
 from .llm import llm_bp
+from .api import api_bp
+from .search import search_bp
+from .metrics import metrics_bp
 
 
 def register_blueprints(app):
     app.register_blueprint(main_bp)
     app.register_blueprint(skills_bp)
     app.register_blueprint(llm_bp)
+    app.register_blueprint(api_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(metrics_bp)
@@ -0,0 +1,156 @@
+import io
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from app import db
+from app.models import Skill, Milestone, LLMInsight
+from app.utils.insight_cache import invalidate_skill_insights
+from app.utils.page_cache import conditional_page, skill_version
+from app.utils.pagination import keyset_paginate, page_size
+from app.utils.search import KINDS, search
+from app.utils.series import progress_series
+from app.utils import transfer
+
+api_bp = Blueprint("api", __name__, url_prefix="/api")
+
+
+def _page_response(query, sort_column, id_column):
+    try:
+        page = keyset_paginate(
+            query,
+            sort_column,
+            id_column,
+            cursor=request.args.get("cursor"),
+            limit=page_size(request.args.get("limit")),
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(
+        items=[item.to_dict() for item in page.items], next_cursor=page.next_cursor
+    )
+
+
+@api_bp.route("/skills")
+def api_skills():
+    return _page_response(Skill.query, Skill.updated_at, Skill.id)
+
+
+@api_bp.route("/skills/delete", methods=["POST"])
+def api_skills_delete():
+    """
+    Delete several skills at once, given as ``{"ids": [...]}``.
+
+    One DELETE statement; milestones, insights, jobs and progress rows go
+    with it through ON DELETE CASCADE.
+    """
+    ids = (request.get_json(silent=True) or {}).get("ids")
+    if not isinstance(ids, list) or not all(type(i) is int for i in ids):
+        return jsonify(error='expected {"ids": [<skill id>, ...]}'), 400
+
+    deleted = Skill.query.filter(Skill.id.in_(ids)).delete(synchronize_session=False)
+    db.session.commit()
+    for skill_id in ids:
+        invalidate_skill_insights(skill_id)
+    return jsonify(deleted=deleted)
+
+
+@api_bp.route("/skills/<int:skill_id>/milestones")
+def api_skill_milestones(skill_id):
+    Skill.query.get_or_404(skill_id)
+    return _page_response(
+        Milestone.query.filter_by(skill_id=skill_id), Milestone.timestamp, Milestone.id
+    )
+
+
+@api_bp.route("/skills/<int:skill_id>/progress")
+@conditional_page(skill_version)
+def api_skill_progress(skill_id):
+    """
+    A skill's progress as columnar arrays, bucketed by ``bucket`` (day, week
+    or month) and downsampled to at most ``points`` buckets when given.
+    """
+    Skill.query.get_or_404(skill_id)
+    bucket = request.args.get("bucket", "day")
+    try:
+        points = request.args.get("points", type=int)
+        series = progress_series(skill_id, bucket, points)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(
+        skill_id=skill_id,
+        bucket=bucket,
+        total_buckets=series.total_buckets,
+        dates=series.dates,
+        levels=series.levels,
+        counts=series.counts,
+    )
+
+
+@api_bp.route("/insights")
+def api_insights():
+    query = LLMInsight.query
+    skill_id = request.args.get("skill_id", type=int)
+    if skill_id is not None:
+        query = query.filter_by(skill_id=skill_id)
+    return _page_response(query, LLMInsight.generated_at, LLMInsight.id)
+
+
+@api_bp.route("/search")
+def api_search():
+    kind = request.args.get("kind")
+    try:
+        results, next_cursor = search(
+            request.args.get("q", ""),
+            kind=kind if kind in KINDS else None,
+            cursor=request.args.get("cursor"),
+            per_page=page_size(request.args.get("limit"), default=20),
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    for result in results:
+        result["snippet"] = str(result["snippet"])
+    return jsonify(items=results, next_cursor=next_cursor)
+
+
+@api_bp.route("/export")
+def api_export():
+    """Stream skills, milestones and/or insights as JSONL (default) or CSV."""
+    fmt = request.args.get("format", "jsonl")
+    kinds = request.args.getlist("kind") or list(transfer.KINDS)
+    if fmt not in transfer.FORMATS or any(k not in transfer.KINDS for k in kinds):
+        return jsonify(error="unknown format or kind"), 400
+    if fmt == "csv" and len(kinds) != 1:
+        return jsonify(error="CSV export holds a single kind"), 400
+
+    filename = f"skillmap-{'-'.join(kinds)}.{fmt}"
+    return Response(
+        stream_with_context(transfer.export_lines(kinds, fmt)),
+        mimetype="text/csv" if fmt == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@api_bp.route("/import", methods=["POST"])
+def api_import():
+    """
+    Import a JSONL (default) or CSV request body. No insights are generated;
+    pass ``queue_insights=1`` to queue them for new skills.
+    """
+    fmt = request.args.get("format", "jsonl")
+    if fmt not in transfer.FORMATS:
+        return jsonify(error=f"unknown format: {fmt}"), 400
+
+    stream = io.TextIOWrapper(request.stream, encoding="utf-8", newline="")
+    importer = transfer.BulkImporter(
+        chunk_size=request.args.get(
+            "chunk_size", transfer.DEFAULT_CHUNK_SIZE, type=int
+        ),
+        queue_insights=request.args.get("queue_insights", type=int) == 1,
+    )
+    try:
+        report = importer.run(
+            transfer.read_records(stream, fmt, request.args.get("kind"))
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(report)
@@ -1,13 +1,54 @@
-from flask import Blueprint, request, render_template, redirect, url_for, flash
+from flask import (
+    abort,
+    Blueprint,
+    request,
+    render_template,
+    redirect,
+    url_for,
+    flash,
+    jsonify,
+    current_app,
+    Response,
+    stream_with_context,
+)
 from datetime import datetime
-import threading
+import json
 
-from app import cache, db
-from app.models import Skill, LLMInsight
-from app.utils.llm_client import generate_llm_insight
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models import Skill, LLMInsight, InsightJob
+from app.utils.jobs import insight_queue
+from app.utils.llm_admission import LLMDeadlineExceeded, LLMOverloaded
+from app.utils.llm_client import (
+    build_prompt,
+    find_memoized_insight,
+    get_llm_admission,
+    get_llm_backend,
+    insight_flight_key,
+    insight_flights,
+    prefix_cache,
+    prompt_fingerprint,
+    record_llm_insight,
+    request_deadline,
+    stream_prompt,
+)
+from app.utils.page_cache import cached_fragment, conditional_page, insights_version
+from app.utils.pagination import keyset_paginate
+from app.utils.singleflight import FlightCancelled
+from app.utils.insight_cache import (
+    cache_insight,
+    cache_stats,
+    get_cached_insight,
+    invalidate_all_insights,
+    invalidate_skill_insights,
+)
 
 llm_bp = Blueprint("llm", __name__, url_prefix="/llm")
-LOCK = threading.Lock()
+
+# Seconds between "queued" events while a stream waits for the model. Each
+# one is also a write that notices when the client has gone away.
+QUEUE_HEARTBEAT_SECONDS = 1.0
 
 
 @llm_bp.route("/")
@@ -25,23 +66,42 @@ def llm_insight(skill_id):
     )
 
     if request.method == "POST":
-        cache_key = f"llm_insight:{skill_id}:{section}"
-        cached = cache.get(cache_key)
+        cached = get_cached_insight(skill_id, section)
 
         if cached:
             flash("Loaded cached insight.", "info")
             insight_text = cached
         else:
-            with LOCK:
-                insight_text = generate_llm_insight(skill, section)
-                cache.set(cache_key, insight_text, timeout=3600 * 24 * 7)
-
-            new_insight = LLMInsight(
-                skill_id=skill.id, section=section, content=insight_text
-            )
-            db.session.add(new_insight)
-            db.session.commit()
-            flash("Generated new LLM insight.", "success")
+            # Unlike the stream, a plain POST can't tell that its client went
+            # away, so it holds its place (and slot) until the deadline.
+            try:
+                insight, created = record_llm_insight(
+                    skill, section, deadline=request_deadline()
+                )
+            except LLMOverloaded:
+                # Hand the work to the background workers instead of making
+                # the browser wait behind a full queue.
+                insight_queue.enqueue(skill, section)
+                flash(
+                    "The model is busy, so your insight was queued. It will "
+                    "appear here when it's ready.",
+                    "warning",
+                )
+                return redirect(url_for("skills.skill_detail", skill_id=skill_id))
+            except LLMDeadlineExceeded as e:
+                insight_text = e.text
+                flash(
+                    "Generation hit the time limit; this partial insight was not saved.",
+                    "warning",
+                )
+            else:
+                db.session.commit()
+                insight_text = insight.content
+                cache_insight(skill_id, section, insight_text)
+                if created:
+                    flash("Generated new LLM insight.", "success")
+                else:
+                    flash("Loaded stored insight for an identical prompt.", "info")
 
         return render_template(
             "llm_insights.html", skill=skill, section=section, insight=insight_text
@@ -50,10 +110,180 @@ def llm_insight(skill_id):
     return render_template("llm_insights.html", skill=skill, section=None, insight=None)
 
 
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@llm_bp.route("/insight/<int:skill_id>/stream")
+def llm_insight_stream(skill_id):
+    """
+    Stream a newly generated insight to the browser as Server-Sent Events.
+
+    While the request waits for the model it gets ``queued`` events with its
+    place in line; a full queue or an expired deadline ends the stream with
+    ``busy``. A client that disconnects while queued gives up its place.
+    When the same insight is already being generated (by another stream or
+    request) the stream waits for that text instead of generating it again.
+    """
+    skill = Skill.query.get_or_404(skill_id)
+    section = request.args.get("section", "general").strip() or "general"
+    deadline = request_deadline()
+
+    def events():
+        cached = get_cached_insight(skill_id, section)
+        if cached:
+            yield _sse("token", {"text": cached})
+            yield _sse("done", {"cached": True})
+            return
+
+        prompt = build_prompt(skill, section)
+        prompt_hash = prompt_fingerprint(prompt)
+        memoized = find_memoized_insight(prompt_hash)
+        if memoized is not None:
+            cache_insight(skill_id, section, memoized.content)
+            yield _sse("token", {"text": memoized.content})
+            yield _sse("done", {"cached": True, "insight_id": memoized.id})
+            return
+
+        flight, leader = insight_flights.begin(
+            insight_flight_key(skill_id, section, prompt_hash)
+        )
+        if leader:
+            try:
+                # A leader that finished since the lookup above has already
+                # stored the answer.
+                memoized = find_memoized_insight(prompt_hash)
+                if memoized is not None:
+                    flight.resolve(memoized.content)
+                    cache_insight(skill_id, section, memoized.content)
+                    yield _sse("token", {"text": memoized.content})
+                    yield _sse("done", {"cached": True, "insight_id": memoized.id})
+                    return
+                yield from generate(prompt, prompt_hash, flight)
+            finally:
+                if not flight.done:
+                    flight.fail(FlightCancelled("the stream ended early"))
+            return
+
+        # The same insight is being generated for someone else: wait for it.
+        while not flight.wait(QUEUE_HEARTBEAT_SECONDS):
+            if deadline.expired():
+                yield _sse("busy", {"error": "Timed out waiting for the model."})
+                return
+            yield _sse("queued", {"position": 0})
+        try:
+            text = flight.result(0)
+        except LLMDeadlineExceeded as e:
+            yield _sse("token", {"text": e.text})
+            yield _sse("done", {"cached": False, "truncated": True})
+        except Exception as e:
+            yield _sse("busy", {"error": str(e)})
+        else:
+            yield _sse("token", {"text": text})
+            yield _sse("done", {"cached": False, "coalesced": True})
+
+    def generate(prompt, prompt_hash, flight):
+        try:
+            ticket = get_llm_admission().enqueue()
+        except LLMOverloaded as e:
+            flight.fail(e)
+            yield _sse("busy", {"error": str(e), "retry_after": e.retry_after})
+            return
+
+        parts = []
+        try:
+            while not ticket.wait(QUEUE_HEARTBEAT_SECONDS):
+                if deadline.expired():
+                    ticket.release("timeout")
+                    yield _sse("busy", {"error": "Timed out waiting for the model."})
+                    return
+                yield _sse("queued", {"position": ticket.position})
+
+            for text in stream_prompt(prompt, deadline=deadline):
+                parts.append(text)
+                yield _sse("token", {"text": text})
+        except Exception as e:
+            current_app.logger.error(
+                f"Streaming insight failed for skill {skill_id}: {e}"
+            )
+            flight.fail(e)
+            yield _sse("failed", {"error": str(e)})
+            return
+        finally:
+            ticket.release()
+
+        if deadline.expired():
+            # Don't keep (or memoize) an answer that was cut short.
+            yield _sse("done", {"cached": False, "truncated": True})
+            return
+
+        # Only persist once the whole insight has been produced; a client that
+        # disconnects mid-stream closes this generator before we get here.
+        insight_text = "".join(parts).strip() or "No insight generated."
+        cache_insight(skill_id, section, insight_text)
+        new_insight = LLMInsight(
+            skill_id=skill.id,
+            section=section,
+            content=insight_text,
+            prompt_hash=prompt_hash,
+        )
+        db.session.add(new_insight)
+        db.session.commit()
+        # Committed first, so waiting callers find the stored row.
+        flight.resolve(insight_text)
+        yield _sse("done", {"cached": False, "insight_id": new_insight.id})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@llm_bp.route("/jobs/<int:job_id>")
+def llm_job_status(job_id):
+    job = InsightJob.query.get_or_404(job_id)
+    return jsonify(job.to_dict())
+
+
+@llm_bp.route("/pool")
+def llm_pool_stats():
+    backend = get_llm_backend()
+    return jsonify(
+        backend=backend.name,
+        pool=backend.stats(),
+        admission=get_llm_admission().stats(),
+        prefill=prefix_cache.stats(),
+        singleflight=insight_flights.stats(),
+    )
+
+
+@llm_bp.route("/cache")
+def llm_cache_stats():
+    return jsonify(cache_stats())
+
+
 @llm_bp.route("/insights")
+@conditional_page(insights_version)
 def llm_all_insights():
-    insights = LLMInsight.query.order_by(LLMInsight.generated_at.desc()).all()
-    return render_template("llm_all_insights.html", insights=insights)
+    def render_table():
+        try:
+            page = keyset_paginate(
+                LLMInsight.query.options(joinedload(LLMInsight.skill)),
+                LLMInsight.generated_at,
+                LLMInsight.id,
+                cursor=request.args.get("cursor"),
+            )
+        except ValueError:
+            abort(400)
+        return render_template(
+            "partials/insights_table.html", insights=page.items, page=page
+        )
+
+    return render_template(
+        "llm_all_insights.html",
+        insights_table=cached_fragment("insights_table", render_table),
+    )
 
 
 @llm_bp.route("/clear_cache", methods=["POST"])
@@ -84,8 +314,9 @@ def llm_clear_cache():
     db.session.commit()
     flash(f"Deleted {count} cached insight(s).", "success")
 
-    if skill_id and section:
-        cache_key = f"llm_insight:{skill_id}:{section}"
-        cache.delete(cache_key)
+    if skill_id:
+        invalidate_skill_insights(int(skill_id), section or None)
+    else:
+        invalidate_all_insights()
 
     return redirect(url_for("llm.llm_all_insights"))
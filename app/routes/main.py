@@ -1,8 +1,9 @@
-from flask import current_app as app, render_template, Blueprint
-from app.models import Skill, Milestone
+from flask import current_app as app, render_template, Blueprint, url_for
+from sqlalchemy.orm import joinedload
+
+from app.models import Skill, SkillProgress
 from app.utils.helpers import generate_rule_based_insights
-from collections import defaultdict
-from app import db
+from app.utils.page_cache import cached_fragment, conditional_page, dashboard_version
 
 main_bp = Blueprint("main", __name__)
 
@@ -12,28 +13,47 @@ def index():
     return render_template("index.html")
 
 
+def _chart_skills():
+    # Only the names and ids go into the page; each series is fetched from
+    # the progress API once the chart is on screen.
+    skills = (
+        Skill.query.join(SkillProgress)
+        .filter(SkillProgress.milestone_count > 0)
+        .order_by(Skill.name)
+    )
+    return [
+        {
+            "name": skill.name,
+            "url": url_for("api.api_skill_progress", skill_id=skill.id),
+        }
+        for skill in skills
+    ]
+
+
 @main_bp.route("/dashboard")
+@conditional_page(dashboard_version)
 def dashboard():
-    skills = Skill.query.all()
-    milestones = Milestone.query.all()
-    insights = generate_rule_based_insights(
-        skills, milestones
-    )  # or however you generate insights
-
-    progress_data = defaultdict(list)
-    for m in milestones:
-        if m.skill and m.timestamp:
-            progress_data[m.skill.name].append(
-                {
-                    "date": m.timestamp.strftime("%Y-%m-%d"),
-                    "progress_level": int(m.progress_level or 0),
-                }
-            )
-
+    # Each fragment is only queried and rendered again once its data changed.
     return render_template(
         "dashboard.html",
-        milestones=milestones,
-        insights=insights,
-        skills=skills,
-        progress_data=progress_data,  # now contains actual data
+        rule_insights=cached_fragment(
+            "dashboard_rules",
+            lambda: render_template(
+                "partials/rule_insights.html",
+                insights=generate_rule_based_insights(),
+            ),
+        ),
+        skills_table=cached_fragment(
+            "dashboard_skills",
+            lambda: render_template(
+                "partials/dashboard_skills.html",
+                skills=Skill.query.options(joinedload(Skill.progress)).all(),
+            ),
+        ),
+        progress_chart=cached_fragment(
+            "dashboard_progress",
+            lambda: render_template(
+                "partials/progress_chart.html", series=_chart_skills()
+            ),
+        ),
     )
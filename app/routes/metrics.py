@@ -0,0 +1,25 @@
+from flask import Blueprint, Response, jsonify
+
+from app.utils.metrics import registry
+from app.utils.prewarm import model_prewarmer
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    return Response(
+        registry.render(), mimetype="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@metrics_bp.route("/ready")
+def ready():
+    """
+    Readiness probe: 503 until the model has been loaded. With prewarming
+    off, the first probe starts the load.
+    """
+    if model_prewarmer.loads_model:
+        model_prewarmer.start()
+    status = model_prewarmer.status()
+    return jsonify(status), 200 if status["ready"] else 503
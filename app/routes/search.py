@@ -0,0 +1,31 @@
+from flask import Blueprint, abort, render_template, request
+
+from app.utils.search import KINDS, search
+
+search_bp = Blueprint("search", __name__)
+
+PER_PAGE = 20
+
+
+@search_bp.route("/search")
+def search_page():
+    query = request.args.get("q", "").strip()
+    kind = request.args.get("kind")
+    if kind not in KINDS:
+        kind = None
+    cursor = request.args.get("cursor")
+
+    try:
+        results, next_cursor = search(
+            query, kind=kind, cursor=cursor, per_page=PER_PAGE
+        )
+    except ValueError:
+        abort(400)
+    return render_template(
+        "search.html",
+        query=query,
+        kind=kind,
+        cursor=cursor,
+        results=results,
+        next_cursor=next_cursor,
+    )
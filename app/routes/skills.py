@@ -1,9 +1,17 @@
-from flask import Blueprint, request, redirect, url_for, render_template, flash
+from flask import Blueprint, request, redirect, url_for, render_template, flash, abort
 from datetime import datetime
 from app import db
-from app.models import Skill, Milestone
-from app.utils.llm_client import generate_llm_insight
-from app.models import LLMInsight
+from app.models import Skill, Milestone, InsightJob
+from app.utils.insight_cache import invalidate_skill_insights
+from app.utils.jobs import insight_queue
+from app.utils.page_cache import (
+    cached_fragment,
+    conditional_page,
+    skill_version,
+    skills_version,
+)
+from app.utils.pagination import keyset_paginate
+from app.utils.progress import record_milestone, refresh_skill_progress
 from flask import current_app as app
 
 skills_bp = Blueprint("skills", __name__, url_prefix="/skills")
@@ -11,21 +19,63 @@ skills_bp = Blueprint("skills", __name__, url_prefix="/skills")
 
 # List all skills
 @skills_bp.route("/")
+@conditional_page(skills_version)
 def skills_list():
-    skills_data = Skill.query.order_by(Skill.updated_at.desc()).all()
-    return render_template("skills.html", skills=skills_data)
+    def render_list():
+        try:
+            page = keyset_paginate(
+                Skill.query,
+                Skill.updated_at,
+                Skill.id,
+                cursor=request.args.get("cursor"),
+            )
+        except ValueError:
+            abort(400)
+        return render_template(
+            "partials/skills_list.html", skills=page.items, page=page
+        )
+
+    return render_template(
+        "skills.html", skills_list=cached_fragment("skills_list", render_list)
+    )
 
 
 # View skill details and milestones
 @skills_bp.route("/<int:skill_id>")
+@conditional_page(skill_version)
 def skill_detail(skill_id):
     skill = Skill.query.get_or_404(skill_id)
-    milestones = (
-        Milestone.query.filter_by(skill_id=skill.id)
-        .order_by(Milestone.timestamp.desc())
+
+    def render_milestones():
+        try:
+            page = keyset_paginate(
+                Milestone.query.filter_by(skill_id=skill.id),
+                Milestone.timestamp,
+                Milestone.id,
+                cursor=request.args.get("cursor"),
+            )
+        except ValueError:
+            abort(400)
+        return render_template(
+            "partials/milestones_table.html", milestones=page.items, page=page
+        )
+
+    pending_jobs = (
+        InsightJob.query.filter(
+            InsightJob.skill_id == skill.id,
+            InsightJob.status.in_(
+                [InsightJob.STATUS_QUEUED, InsightJob.STATUS_RUNNING]
+            ),
+        )
+        .order_by(InsightJob.id)
         .all()
     )
-    return render_template("skill_detail.html", skill=skill, milestones=milestones)
+    return render_template(
+        "skill_detail.html",
+        skill=skill,
+        milestones_table=cached_fragment("skill_milestones", render_milestones),
+        pending_jobs=pending_jobs,
+    )
 
 
 # Create a new skill - GET shows form, POST processes submission
@@ -50,22 +100,12 @@ def skill_create():
         db.session.commit()
 
         try:
-            ai_text = generate_llm_insight(skill, section="initial")
-            insight = LLMInsight(
-                skill_id=skill.id,
-                section="initial",
-                content=ai_text,
-                generated_at=datetime.utcnow(),
-            )
-            db.session.add(insight)
-            db.session.commit()
+            insight_queue.enqueue(skill, section="initial")
         except Exception as e:
-            app.logger.error(
-                f"LLM insight generation failed for skill {skill.name}: {e}"
-            )
+            app.logger.error(f"Could not queue LLM insight for skill {skill.name}: {e}")
 
         flash(f'Skill "{name}" created successfully.', "success")
-        return redirect(url_for("skills.skills_list"))
+        return redirect(url_for("skills.skill_detail", skill_id=skill.id))
 
     return render_template("skill_form.html", action="Create", skill=None)
 
@@ -93,6 +133,7 @@ def skill_edit(skill_id):
         skill.description = description
         skill.category = category
         db.session.commit()
+        invalidate_skill_insights(skill.id)
 
         flash(f'Skill "{name}" updated successfully.', "success")
         return redirect(url_for("skills.skill_detail", skill_id=skill_id))
@@ -104,9 +145,11 @@ def skill_edit(skill_id):
 @skills_bp.route("/<int:skill_id>/delete", methods=["POST"])
 def skill_delete(skill_id):
     skill = Skill.query.get_or_404(skill_id)
+    name = skill.name
     db.session.delete(skill)
     db.session.commit()
-    flash(f'Skill "{skill.name}" deleted.', "info")
+    invalidate_skill_insights(skill_id)
+    flash(f'Skill "{name}" deleted.', "info")
     return redirect(url_for("skills.skills_list"))
 
 
@@ -140,20 +183,16 @@ def milestone_create(skill_id):
             timestamp=timestamp,
         )
         db.session.add(milestone)
+        db.session.flush()
+        record_milestone(milestone)
+        skill.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_skill_insights(skill.id)
 
         try:
-            ai_text = generate_llm_insight(skill, section="progress update")
-            insight = LLMInsight(
-                skill_id=skill.id,
-                section="progress update",
-                content=ai_text,
-                generated_at=datetime.utcnow(),
-            )
-            db.session.add(insight)
-            db.session.commit()
+            insight_queue.enqueue(skill, section="progress update")
         except Exception as e:
-            app.logger.error(f"LLM insight generation failed after milestone: {e}")
+            app.logger.error(f"Could not queue LLM insight after milestone: {e}")
 
         flash("Milestone added.", "success")
         return redirect(url_for("skills.skill_detail", skill_id=skill_id))
@@ -190,7 +229,10 @@ def milestone_edit(milestone_id):
         milestone.note = note
         milestone.progress_level = progress_level
         milestone.timestamp = timestamp
+        refresh_skill_progress(skill.id)
+        skill.updated_at = datetime.utcnow()
         db.session.commit()
+        invalidate_skill_insights(skill.id)
         flash("Milestone updated.", "success")
         return redirect(url_for("skills.skill_detail", skill_id=skill.id))
 
@@ -201,8 +243,12 @@ def milestone_edit(milestone_id):
 @skills_bp.route("/milestones/<int:milestone_id>/delete", methods=["POST"])
 def milestone_delete(milestone_id):
     milestone = Milestone.query.get_or_404(milestone_id)
-    skill_id = milestone.skill_id
+    skill = milestone.skill
+    skill_id = skill.id
     db.session.delete(milestone)
+    refresh_skill_progress(skill_id)
+    skill.updated_at = datetime.utcnow()
     db.session.commit()
+    invalidate_skill_insights(skill_id)
     flash("Milestone deleted.", "info")
     return redirect(url_for("skills.skill_detail", skill_id=skill_id))
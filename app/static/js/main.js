@@ -39,4 +39,30 @@ document.addEventListener('DOMContentLoaded', function () {
     return new bootstrap.Tooltip(tooltipTriggerEl);
   });
 
+  // 4. Poll background insight jobs until they finish
+  // Each pending job card carries the URL of its JSON status endpoint.
+  document.querySelectorAll('.insight-job[data-job-url]').forEach(card => {
+    const statusBadge = card.querySelector('.job-status');
+    const result = card.querySelector('.job-result');
+
+    const poll = () => {
+      fetch(card.dataset.jobUrl)
+        .then(response => response.json())
+        .then(job => {
+          statusBadge.textContent = job.status;
+          if (job.status === 'done') {
+            statusBadge.className = 'badge bg-success job-status';
+            result.textContent = job.insight ? job.insight.content : 'Insight was removed.';
+          } else if (job.status === 'failed') {
+            statusBadge.className = 'badge bg-danger job-status';
+            result.textContent = 'Insight generation failed: ' + (job.error || 'unknown error');
+          } else {
+            setTimeout(poll, 2000);
+          }
+        })
+        .catch(() => setTimeout(poll, 5000));
+    };
+    poll();
+  });
+
 });
@@ -0,0 +1,188 @@
+import sqlite3
+import struct
+import threading
+import zlib
+from collections import Counter
+from contextlib import closing
+
+from sqlalchemy import Text, event
+from sqlalchemy.types import TypeDecorator
+
+# Compressed values are BLOBs: a format byte, the id of the preset dictionary
+# they were compressed with (0 for none) and a raw deflate stream. Rows
+# written before compression was introduced are still TEXT and read as is.
+FORMAT_VERSION = 1
+_HEADER = struct.Struct(">BH")
+# zlib only looks back 32 KiB, so a longer dictionary would be wasted.
+DICTIONARY_SIZE = 32 * 1024
+# Word runs of this length are the dictionary's building blocks.
+SHINGLE_WORDS = 4
+
+_dictionaries = {}
+_current_id = 0
+_lock = threading.Lock()
+# Where to look up a dictionary another process added after this one loaded
+# its list.
+_database_path = None
+
+
+def header(dictionary_id=None):
+    """The leading bytes of values compressed with the given (or current) dictionary."""
+    return _HEADER.pack(
+        FORMAT_VERSION, _current_id if dictionary_id is None else dictionary_id
+    )
+
+
+def current_dictionary_id():
+    return _current_id
+
+
+def add_dictionary(dictionary_id, data):
+    """Make a dictionary known to this process; the newest is used for writes."""
+    global _current_id
+    with _lock:
+        _dictionaries[dictionary_id] = bytes(data)
+        _current_id = max(_current_id, dictionary_id)
+
+
+def _load_dictionaries(connection):
+    try:
+        rows = connection.execute(
+            "SELECT id, data FROM insight_dictionaries"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        # Not migrated yet.
+        return
+    for dictionary_id, data in rows:
+        add_dictionary(dictionary_id, data)
+
+
+def _dictionary(dictionary_id):
+    if dictionary_id == 0:
+        return None
+    if dictionary_id not in _dictionaries and _database_path is not None:
+        with closing(
+            sqlite3.connect(f"file:{_database_path}?mode=ro", uri=True)
+        ) as connection:
+            _load_dictionaries(connection)
+    try:
+        return _dictionaries[dictionary_id]
+    except KeyError:
+        raise ValueError(f"unknown compression dictionary {dictionary_id}") from None
+
+
+def _deflate(text, zdict):
+    compressor = (
+        zlib.compressobj(9, zlib.DEFLATED, -15, zdict=zdict)
+        if zdict
+        else zlib.compressobj(9, zlib.DEFLATED, -15)
+    )
+    return compressor.compress(text.encode("utf-8")) + compressor.flush()
+
+
+def compress_text(text):
+    dictionary_id = _current_id
+    return _HEADER.pack(FORMAT_VERSION, dictionary_id) + _deflate(
+        text, _dictionary(dictionary_id)
+    )
+
+
+def decompress_text(value):
+    """Text of a stored value: compressed BLOBs are inflated, TEXT is returned as is."""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    version, dictionary_id = _HEADER.unpack_from(value)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unknown compressed text format {version}")
+    zdict = _dictionary(dictionary_id)
+    decompressor = (
+        zlib.decompressobj(-15, zdict=zdict) if zdict else zlib.decompressobj(-15)
+    )
+    data = decompressor.decompress(value[_HEADER.size :]) + decompressor.flush()
+    return data.decode("utf-8")
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text stored deflate-compressed against the current preset dictionary.
+
+    Compression happens on write and decompression on read, so model code
+    sees plain strings. SQL can't compare or search the stored bytes; use the
+    ``insight_text()`` SQL function (see ``init_compression``) instead.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
+
+
+def train_dictionary(texts, size=DICTIONARY_SIZE):
+    """
+    Build a preset dictionary from sample texts.
+
+    zlib has no trainer, so this picks the runs of ``SHINGLE_WORDS`` words
+    that occur in the most samples, weighted by length, until ``size`` bytes.
+    The most valuable runs go last: matches closer to the end of the
+    dictionary are cheaper to encode.
+    """
+    documents = Counter()
+    for text in texts:
+        words = text.split()
+        documents.update(
+            {
+                " ".join(words[i : i + SHINGLE_WORDS])
+                for i in range(len(words) - SHINGLE_WORDS + 1)
+            }
+        )
+    ranked = sorted(
+        (
+            (count * len(shingle), shingle)
+            for shingle, count in documents.items()
+            if count > 1
+        ),
+        reverse=True,
+    )
+
+    chosen, used = [], 0
+    for _, shingle in ranked:
+        encoded = shingle.encode("utf-8") + b" "
+        if used + len(encoded) > size:
+            break
+        chosen.append(encoded)
+        used += len(encoded)
+    return b"".join(reversed(chosen))
+
+
+def compressed_size(texts, zdict=None):
+    """Total compressed size of ``texts`` with the given dictionary (or none)."""
+    return sum(len(_deflate(text, zdict)) for text in texts)
+
+
+def init_compression(app):
+    """
+    Register ``insight_text(value)`` on every SQLite connection (the insight
+    full-text index reads insight bodies through it) and load the stored
+    dictionaries.
+    """
+    global _database_path
+    from app import db
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != "sqlite":
+        return
+    if engine.url.database and engine.url.database != ":memory:":
+        _database_path = engine.url.database
+
+    @event.listens_for(engine, "connect")
+    def register_functions(dbapi_connection, connection_record):
+        dbapi_connection.create_function(
+            "insight_text", 1, decompress_text, deterministic=True
+        )
+        _load_dictionaries(dbapi_connection)
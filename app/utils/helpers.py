@@ -1,44 +1,18 @@
-from datetime import datetime, timedelta
+from app.utils.rules import evaluate_rules
 
 
-def generate_rule_based_insights(skills, milestones):
+def generate_rule_based_insights(skills=None, milestones=None):
     """
     Generate simple rule-based insights based on skill and milestone data.
 
-    Args:
-        skills (list): List of Skill model instances.
-        milestones (list): List of Milestone model instances.
+    The rules live in ``app.utils.rules`` and each one runs as a single
+    aggregate query, so the arguments are no longer needed and only kept for
+    backwards compatibility.
 
     Returns:
         list of strings: insight messages.
     """
-    insights = []
-
-    now = datetime.utcnow()
-    two_weeks_ago = now - timedelta(days=14)
-
-    # 1. Check skills not updated recently
-    for skill in skills:
-        # last updated is skill.updated_at
-        if skill.updated_at < two_weeks_ago:
-            insights.append(
-                f'You haven’t updated skill "{skill.name}" in over 2 weeks.'
-            )
-
-    # 2. Check skills with no milestones
-    for skill in skills:
-        if not skill.milestones:
-            insights.append(f'Skill "{skill.name}" has no milestones logged yet.')
-
-    # 3. Check milestones older than 1 month without updates
-    one_month_ago = now - timedelta(days=30)
-    for milestone in milestones:
-        if milestone.timestamp < one_month_ago:
-            insights.append(
-                f'Milestone from {milestone.timestamp.date()} on skill "{milestone.skill.name}" is over 1 month old.'
-            )
-
-    # Add more rules here as needed
+    insights = evaluate_rules()
 
     if not insights:
         insights.append("All skills and milestones are up to date. Great job!")
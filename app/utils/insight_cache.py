@@ -0,0 +1,99 @@
+from app import cache
+from app.utils.metrics import INSIGHT_CACHE_LOOKUPS, registry
+
+INSIGHT_CACHE_TIMEOUT = 3600 * 24 * 7
+
+# Every cached insight carries this tag plus a per-skill tag, so a write to a
+# skill (or a bulk clear) can drop all of its sections at once.
+INSIGHT_TAG = "llm_insight"
+
+
+def insight_cache_key(skill_id, section):
+    return f"llm_insight:{skill_id}:{section}"
+
+
+def skill_tag(skill_id):
+    return f"llm_insight:{skill_id}"
+
+
+def _supports_tags():
+    return hasattr(cache.cache, "delete_tag")
+
+
+def get_cached_insight(skill_id, section):
+    text = cache.get(insight_cache_key(skill_id, section))
+    INSIGHT_CACHE_LOOKUPS.inc(result="hit" if text is not None else "miss")
+    return text
+
+
+def cache_insight(skill_id, section, text):
+    key = insight_cache_key(skill_id, section)
+    if _supports_tags():
+        cache.set(
+            key,
+            text,
+            timeout=INSIGHT_CACHE_TIMEOUT,
+            tags=(INSIGHT_TAG, skill_tag(skill_id)),
+        )
+    else:
+        cache.set(key, text, timeout=INSIGHT_CACHE_TIMEOUT)
+
+
+def invalidate_skill_insights(skill_id, section=None):
+    """
+    Drop cached insights for a skill: one section, or every section when the
+    backend supports tags (otherwise only the exact key can be removed).
+    """
+    if section is not None:
+        cache.delete(insight_cache_key(skill_id, section))
+    elif _supports_tags():
+        cache.cache.delete_tag(skill_tag(skill_id))
+
+
+def invalidate_all_insights():
+    if _supports_tags():
+        cache.cache.delete_tag(INSIGHT_TAG)
+
+
+def cache_stats():
+    backend = cache.cache
+    return backend.stats() if hasattr(backend, "stats") else {}
+
+
+@registry.register_collector
+def _cache_metrics():
+    stats = cache_stats()
+    if not stats:
+        return []
+    return [
+        (
+            "skillmap_cache_lookups_total",
+            "counter",
+            "Cache backend lookups by result.",
+            [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"])],
+        ),
+        (
+            "skillmap_cache_hit_ratio",
+            "gauge",
+            "Share of cache backend lookups that were hits.",
+            [({}, stats["hit_ratio"])],
+        ),
+        (
+            "skillmap_cache_evictions_total",
+            "counter",
+            "Entries evicted to stay within the cache budget.",
+            [({}, stats["evictions"])],
+        ),
+        (
+            "skillmap_cache_entries",
+            "gauge",
+            "Entries currently stored in the cache.",
+            [({}, stats["entries"])],
+        ),
+        (
+            "skillmap_cache_bytes",
+            "gauge",
+            "Bytes currently stored in the cache.",
+            [({}, stats["bytes"])],
+        ),
+    ]
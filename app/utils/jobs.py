@@ -0,0 +1,195 @@
+import threading
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import InsightJob, Skill
+from app.utils.llm_client import record_llm_insight
+
+
+class InsightJobQueue:
+    """
+    Background worker pool that generates LLM insights off the request path.
+
+    The ``insight_jobs`` table is the queue: routes insert a queued row and
+    return immediately, and worker threads claim rows one at a time with a
+    conditional UPDATE, so several processes can share the same table safely.
+    Workers start on the first request a process serves (not at import or in
+    CLI commands) and sleep on an event between polls.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._running = 0
+        self._running_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("INSIGHT_WORKERS", 1)
+        app.config.setdefault("INSIGHT_JOB_POLL_INTERVAL", 2.0)
+        # A job left "running" longer than this is assumed to belong to a
+        # crashed worker and is put back on the queue.
+        app.config.setdefault("INSIGHT_JOB_STALE_AFTER", 900)
+
+        self.app = app
+        app.extensions["insight_jobs"] = self
+        app.before_request(self._ensure_started)
+
+    def enqueue(self, skill, section="general"):
+        """
+        Add an insight generation job for ``skill`` and wake a worker.
+
+        The job row is committed before returning so the caller can hand its
+        id to the client for polling.
+        """
+        job = InsightJob(skill_id=skill.id, section=section)
+        db.session.add(job)
+        db.session.commit()
+        self._ensure_started()
+        self._wakeup.set()
+        return job
+
+    def start(self):
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            self._requeue_stale_jobs()
+            for i in range(self.app.config["INSIGHT_WORKERS"]):
+                thread = threading.Thread(
+                    target=self._worker_loop, name=f"insight-worker-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def busy(self):
+        """True while this process has a job running or just woke a worker."""
+        return self._running > 0 or self._wakeup.is_set()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _ensure_started(self):
+        if not self._threads:
+            self.start()
+
+    def _requeue_stale_jobs(self):
+        cutoff = datetime.utcnow() - timedelta(
+            seconds=self.app.config["INSIGHT_JOB_STALE_AFTER"]
+        )
+        with self.app.app_context():
+            count = InsightJob.query.filter(
+                InsightJob.status == InsightJob.STATUS_RUNNING,
+                InsightJob.started_at < cutoff,
+            ).update(
+                {"status": InsightJob.STATUS_QUEUED, "started_at": None},
+                synchronize_session=False,
+            )
+            db.session.commit()
+        if count:
+            self.app.logger.warning(f"Requeued {count} stale insight job(s).")
+
+    def _worker_loop(self):
+        poll_interval = self.app.config["INSIGHT_JOB_POLL_INTERVAL"]
+        while not self._stopping.is_set():
+            try:
+                with self.app.app_context():
+                    job = self._claim_next()
+                    if job is not None:
+                        with self._running_lock:
+                            self._running += 1
+                        try:
+                            self._run(job)
+                        finally:
+                            with self._running_lock:
+                                self._running -= 1
+                        continue
+            except Exception as e:
+                self.app.logger.error(f"Insight worker error: {e}")
+
+            self._wakeup.wait(poll_interval)
+            self._wakeup.clear()
+
+    def _claim_next(self):
+        while True:
+            job = (
+                InsightJob.query.filter_by(status=InsightJob.STATUS_QUEUED)
+                .order_by(InsightJob.id)
+                .first()
+            )
+            if job is None:
+                return None
+
+            claimed = InsightJob.query.filter_by(
+                id=job.id, status=InsightJob.STATUS_QUEUED
+            ).update(
+                {"status": InsightJob.STATUS_RUNNING, "started_at": datetime.utcnow()},
+                synchronize_session=False,
+            )
+            db.session.commit()
+            if claimed:
+                return db.session.get(InsightJob, job.id)
+            # Another worker got there first; try the next one.
+
+    def _run(self, job):
+        job_id, skill_id, section = job.id, job.skill_id, job.section
+        try:
+            skill = db.session.get(Skill, skill_id)
+            if skill is None:
+                raise LookupError(f"skill {skill_id} no longer exists")
+
+            # Reuses the stored insight when this exact prompt was answered before.
+            insight, _ = record_llm_insight(skill, section=section, background=True)
+            db.session.flush()
+
+            # Deleting the skill while the model ran takes the job with it,
+            # so only finish a job that is still there, like the claim does.
+            finished = InsightJob.query.filter(
+                InsightJob.id == job_id,
+                db.session.query(Skill.id).filter_by(id=skill_id).exists(),
+            ).update(
+                {
+                    "status": InsightJob.STATUS_DONE,
+                    "insight_id": insight.id,
+                    "finished_at": datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+            if not finished:
+                db.session.rollback()
+                self._dropped(job_id)
+                return
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if db.session.get(InsightJob, job_id) is None:
+                self._dropped(job_id)
+                return
+            self.app.logger.error(
+                f"LLM insight generation failed for job {job_id}: {e}"
+            )
+            InsightJob.query.filter_by(id=job_id).update(
+                {
+                    "status": InsightJob.STATUS_FAILED,
+                    "error": str(e),
+                    "finished_at": datetime.utcnow(),
+                },
+                synchronize_session=False,
+            )
+            db.session.commit()
+
+    def _dropped(self, job_id):
+        self.app.logger.debug(
+            f"Insight job {job_id} was deleted while it ran; dropping its result."
+        )
+
+
+insight_queue = InsightJobQueue()
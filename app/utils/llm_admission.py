@@ -0,0 +1,239 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+from app.utils.metrics import LLM_ADMISSIONS
+
+
+class LLMOverloaded(RuntimeError):
+    """
+    The generation was not admitted: the wait queue was full, or no slot
+    freed up before the request's deadline.
+    """
+
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMDeadlineExceeded(RuntimeError):
+    """The generation was stopped at its deadline; ``text`` is what was produced."""
+
+    def __init__(self, text):
+        super().__init__("generation stopped at its deadline")
+        self.text = text
+
+
+class Deadline:
+    """
+    A point in time a request must finish by (``None`` seconds: never),
+    optionally brought forward by ``interrupt``, a callable that returns True
+    when the work should stop now.
+
+    Instances are llama-cpp stopping criteria: calling one with the token ids
+    and logits returns True once the deadline has passed.
+    """
+
+    def __init__(self, seconds: Optional[float], interrupt=None):
+        self.at = None if seconds is None else time.monotonic() + seconds
+        self.interrupt = interrupt
+
+    def remaining(self) -> Optional[float]:
+        return None if self.at is None else max(0.0, self.at - time.monotonic())
+
+    def expired(self) -> bool:
+        if self.at is not None and time.monotonic() >= self.at:
+            return True
+        return self.interrupt is not None and self.interrupt()
+
+    def __call__(self, input_ids=None, logits=None) -> bool:
+        return self.expired()
+
+
+class Ticket:
+    """A request's place in the admission queue, and later its running slot."""
+
+    def __init__(self, controller, background=False):
+        self._controller = controller
+        self.background = background
+        self.admitted = False
+        self.done = False
+        self.enqueued_at = time.monotonic()
+        self.admitted_at = None
+
+    def wait(self, timeout=None) -> bool:
+        """Wait up to ``timeout`` seconds to be admitted; True once running."""
+        return self._controller._wait(self, timeout)
+
+    @property
+    def position(self) -> int:
+        """1-based place in the wait queue, 0 once admitted or released."""
+        return self._controller._position(self)
+
+    def release(self, outcome="cancelled"):
+        """
+        Give up the slot, or the place in the queue if not admitted yet (counted
+        under ``outcome``).
+        """
+        self._controller._release(self, outcome)
+
+
+class AdmissionController:
+    """
+    Bounded admission in front of every generation.
+
+    At most ``max_active`` requests run at once and at most ``max_queued``
+    wait behind them, first come first served. A request arriving at a full
+    queue is shed immediately with ``LLMOverloaded`` and a ``retry_after``
+    estimate from recent run times, so waiting time (and with it tail
+    latency) stays bounded under overload instead of growing with the
+    backlog. A queued request that gives up (the SSE stream does when its
+    client goes away) releases its ticket and never reaches the model.
+
+    Background work (insight jobs, precomputation) takes ``background``
+    tickets: those are never shed, are admitted only while no interactive
+    request is waiting, and hold at most ``max_background`` of the slots.
+
+    Args:
+        max_active: Generations allowed to run concurrently.
+        max_queued: Interactive requests allowed to wait for a slot.
+        max_background: Slots background work may hold at once (default: all
+            but one, so an interactive request always finds one).
+    """
+
+    def __init__(self, max_active=1, max_queued=8, max_background=None):
+        self.max_active = max(1, int(max_active))
+        self.max_queued = max(0, int(max_queued))
+        if max_background is None:
+            max_background = self.max_active - 1
+        self.max_background = min(self.max_active, max(1, int(max_background)))
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._background = deque()
+        self._active = 0
+        self._background_active = 0
+        # Moving average of how long an admitted request holds its slot.
+        self._avg_run_seconds = None
+
+    def enqueue(self, background=False) -> Ticket:
+        """Take a ticket, or raise ``LLMOverloaded`` if the queue is full."""
+        with self._cond:
+            ticket = Ticket(self, background)
+            if background:
+                self._background.append(ticket)
+                self._admit_waiting()
+            elif self._active < self.max_active and not self._queue:
+                self._admit(ticket)
+            elif len(self._queue) < self.max_queued:
+                self._queue.append(ticket)
+            else:
+                LLM_ADMISSIONS.inc(outcome="shed")
+                raise LLMOverloaded(
+                    "The model is busy, try again shortly.", self._retry_after()
+                )
+            return ticket
+
+    @contextmanager
+    def admit(self, deadline: Optional[Deadline] = None, background=False):
+        """Hold a running slot for the duration of the block."""
+        ticket = self.enqueue(background)
+        try:
+            admitted = ticket.wait(None if deadline is None else deadline.remaining())
+        except BaseException:
+            ticket.release()
+            raise
+        if not admitted:
+            self._release(ticket, outcome="timeout")
+            raise LLMOverloaded("Timed out waiting for the model.", self._retry_after())
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def idle(self) -> bool:
+        """True when no interactive generation is running or waiting."""
+        with self._cond:
+            return self._active == self._background_active and not self._queue
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_active": self.max_active,
+                "max_queued": self.max_queued,
+                "active": self._active,
+                "queued": len(self._queue),
+                "max_background": self.max_background,
+                "background_active": self._background_active,
+                "background_queued": len(self._background),
+                "avg_run_seconds": (
+                    round(self._avg_run_seconds, 3)
+                    if self._avg_run_seconds is not None
+                    else None
+                ),
+            }
+
+    def _admit(self, ticket):
+        self._active += 1
+        if ticket.background:
+            self._background_active += 1
+        ticket.admitted = True
+        ticket.admitted_at = time.monotonic()
+        LLM_ADMISSIONS.inc(outcome="admitted")
+
+    def _wait(self, ticket, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not ticket.admitted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if ticket.done or (remaining is not None and remaining <= 0):
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def _position(self, ticket):
+        with self._cond:
+            try:
+                return self._queue.index(ticket) + 1
+            except ValueError:
+                return 0
+
+    def _release(self, ticket, outcome="cancelled"):
+        with self._cond:
+            if ticket.done:
+                return
+            ticket.done = True
+            if ticket.admitted:
+                self._active -= 1
+                if ticket.background:
+                    self._background_active -= 1
+                ran = time.monotonic() - ticket.admitted_at
+                self._avg_run_seconds = (
+                    ran
+                    if self._avg_run_seconds is None
+                    else 0.8 * self._avg_run_seconds + 0.2 * ran
+                )
+            else:
+                (self._background if ticket.background else self._queue).remove(ticket)
+                LLM_ADMISSIONS.inc(outcome=outcome)
+            self._admit_waiting()
+
+    def _admit_waiting(self):
+        """Fill free slots: interactive requests first, then background work."""
+        while self._active < self.max_active:
+            if self._queue:
+                self._admit(self._queue.popleft())
+            elif self._background and self._background_active < self.max_background:
+                self._admit(self._background.popleft())
+            else:
+                break
+        self._cond.notify_all()
+
+    def _retry_after(self):
+        """Whole seconds until the queue has likely drained by one slot."""
+        average = self._avg_run_seconds or 1.0
+        waves = (len(self._queue) + 1) / self.max_active
+        return max(1, math.ceil(average * waves))
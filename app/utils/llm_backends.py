@@ -0,0 +1,331 @@
+import http.client
+import json
+import threading
+import time
+from typing import Iterator, Optional
+from urllib.parse import urlsplit
+
+from app.utils.metrics import (
+    LLM_HTTP_REQUESTS,
+    LLM_PREFILL,
+    LLM_TOKENS,
+    LLM_TOKENS_PER_SECOND,
+)
+
+
+class LLMBackendError(RuntimeError):
+    """Raised when a backend could not produce a completion."""
+
+
+class LLMBackend:
+    """
+    Where completions are run.
+
+    Subclasses implement ``stream``, which yields the generated text piece by
+    piece; closing the iterator early must free whatever the generation held.
+    Generation stops early, without an error, once the optional ``deadline``
+    (an ``app.utils.llm_admission.Deadline``) has passed.
+
+    Attributes:
+        name: Short backend name, as used in ``LLM_BACKEND``.
+        model_id: Identifies the model in prompt fingerprints, so a memoized
+            insight is only reused for the model that wrote it.
+        concurrency: Generations worth running at the same time.
+    """
+
+    name = None
+    model_id = None
+    concurrency = 1
+
+    def stream(
+        self, prompt: str, params: Optional[dict] = None, deadline=None
+    ) -> Iterator[str]:
+        raise NotImplementedError
+
+    def complete(
+        self, prompt: str, params: Optional[dict] = None, deadline=None
+    ) -> str:
+        return "".join(self.stream(prompt, params, deadline))
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Prompt tokens ``text`` takes. Backends without a tokenizer estimate
+        about four bytes per token.
+        """
+        return (len(text.encode("utf-8")) + 3) // 4
+
+    def warm(self):
+        """Load whatever the first request would otherwise wait for."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+def metered_stream(chunks, on_first_token=None) -> Iterator[str]:
+    """
+    Pass ``chunks`` through, recording the time to the first chunk (prefill),
+    the number of tokens and the decode rate. Every non-empty chunk counts as
+    one token, which holds for llama-cpp and the bundled server.
+    """
+    started = time.monotonic()
+    first_token_at = None
+    tokens = 0
+    try:
+        for text in chunks:
+            if first_token_at is None:
+                first_token_at = time.monotonic()
+                prefill = first_token_at - started
+                LLM_PREFILL.observe(prefill)
+                if on_first_token is not None:
+                    on_first_token(prefill)
+            if text:
+                tokens += 1
+                yield text
+    finally:
+        LLM_TOKENS.inc(tokens)
+        decode_seconds = time.monotonic() - (first_token_at or started)
+        if tokens > 1 and decode_seconds > 0:
+            LLM_TOKENS_PER_SECOND.observe((tokens - 1) / decode_seconds)
+
+
+class HTTPBackend(LLMBackend):
+    """
+    Client for an OpenAI-compatible ``/v1/completions`` server, such as
+    ``python -m app.llm_server`` or ``llama_cpp.server``.
+
+    Connections are kept alive and reused from a pool of at most
+    ``pool_size``, which also caps the requests in flight from this process.
+    Connection errors and 502/503/504 answers are retried ``retries`` times
+    with exponential backoff, but only before any text has been yielded;
+    once a generation is streaming, a failure is raised to the caller.
+
+    Args:
+        url: Server base URL, e.g. ``http://127.0.0.1:8081``.
+        model: Model name sent with each request and used as ``model_id``.
+        pool_size: Maximum number of open connections.
+        connect_timeout: Seconds to wait for a connection (and a pool slot).
+        read_timeout: Seconds to wait for each read, i.e. between tokens.
+        retries: Extra attempts after a failed request.
+        backoff: Delay before the first retry, doubled for each further one.
+    """
+
+    name = "http"
+    RETRY_STATUSES = (502, 503, 504)
+
+    def __init__(
+        self,
+        url,
+        model,
+        pool_size=4,
+        connect_timeout=5.0,
+        read_timeout=120.0,
+        retries=2,
+        backoff=0.25,
+    ):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Invalid LLM server URL: {url!r}")
+        self._connection_class = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self._host = parts.hostname
+        self._port = parts.port
+        self._base_path = parts.path.rstrip("/")
+
+        self.url = url
+        self.model_id = model
+        self.concurrency = max(1, int(pool_size))
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = max(0, int(retries))
+        self.backoff = backoff
+
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._idle = []
+        self._lock = threading.Lock()
+
+        self.connections_opened = 0
+        self.requests = 0
+        self.retried = 0
+        self.failures = 0
+
+    def stream(
+        self, prompt: str, params: Optional[dict] = None, deadline=None
+    ) -> Iterator[str]:
+        body = json.dumps(
+            {"model": self.model_id, "prompt": prompt, "stream": True, **(params or {})}
+        ).encode("utf-8")
+
+        if not self._slots.acquire(timeout=self.connect_timeout):
+            self._count("failures")
+            LLM_HTTP_REQUESTS.inc(outcome="error")
+            raise LLMBackendError(
+                f"No connection to the LLM server free after {self.connect_timeout}s"
+            )
+        try:
+            conn, response = self._post("/v1/completions", body)
+            yield from metered_stream(self._read_events(conn, response, deadline))
+        finally:
+            self._slots.release()
+
+    def count_tokens(self, text: str) -> int:
+        """Tokenize on the server (``POST /tokenize``), else estimate."""
+        body = json.dumps({"content": text}).encode("utf-8")
+        if not self._slots.acquire(timeout=self.connect_timeout):
+            return super().count_tokens(text)
+        try:
+            conn, response = self._post("/tokenize", body, "application/json")
+            try:
+                tokens = json.loads(response.read())["tokens"]
+            except (OSError, http.client.HTTPException, ValueError, KeyError):
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._keep(conn)
+            return len(tokens)
+        except (
+            LLMBackendError,
+            OSError,
+            http.client.HTTPException,
+            ValueError,
+            KeyError,
+        ):
+            return super().count_tokens(text)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "url": self.url,
+                "model": self.model_id,
+                "pool_size": self.concurrency,
+                "idle_connections": len(self._idle),
+                "connections_opened": self.connections_opened,
+                "requests": self.requests,
+                "retried": self.retried,
+                "failures": self.failures,
+            }
+
+    def _count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _connection(self, reuse=True):
+        """Return ``(connection, reused)``, preferring an idle kept-alive one."""
+        with self._lock:
+            if reuse and self._idle:
+                return self._idle.pop(), True
+            self.connections_opened += 1
+        conn = self._connection_class(
+            self._host, self._port, timeout=self.connect_timeout
+        )
+        try:
+            conn.connect()
+        except OSError:
+            conn.close()
+            raise
+        # The connect timeout only covers the handshake; reads wait longer.
+        conn.sock.settimeout(self.read_timeout)
+        return conn, False
+
+    def _send(self, path, body, headers):
+        conn, reused = self._connection()
+        try:
+            conn.request("POST", self._base_path + path, body, headers)
+            return conn, conn.getresponse()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            if not reused:
+                raise
+        # The server closed the idle connection in the meantime; that doesn't
+        # count as a failed attempt.
+        conn, _ = self._connection(reuse=False)
+        try:
+            conn.request("POST", self._base_path + path, body, headers)
+            return conn, conn.getresponse()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            raise
+
+    def _keep(self, conn):
+        with self._lock:
+            self._idle.append(conn)
+
+    def _post(self, path, body, accept="text/event-stream"):
+        headers = {"Content-Type": "application/json", "Accept": accept}
+        attempts = self.retries + 1
+        error = None
+        for attempt in range(attempts):
+            if attempt:
+                self._count("retried")
+                LLM_HTTP_REQUESTS.inc(outcome="retry")
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+            try:
+                conn, response = self._send(path, body, headers)
+            except (OSError, http.client.HTTPException) as e:
+                error = e
+                continue
+
+            self._count("requests")
+            if response.status == 200:
+                return conn, response
+
+            detail = response.read()[:200].decode("utf-8", "replace")
+            conn.close()
+            error = LLMBackendError(
+                f"LLM server answered {response.status} {response.reason}: {detail}"
+            )
+            if response.status not in self.RETRY_STATUSES:
+                break
+
+        self._count("failures")
+        LLM_HTTP_REQUESTS.inc(outcome="error")
+        raise LLMBackendError(
+            f"LLM server request failed after {attempt + 1} attempt(s): {error}"
+        ) from error
+
+    def _read_events(self, conn, response, deadline=None):
+        """
+        Yield the text of each server-sent completion chunk. Past the deadline
+        the connection is dropped, which stops the generation on the server.
+        """
+        finished = False
+        try:
+            while deadline is None or not deadline.expired():
+                line = response.readline()
+                if not line:
+                    break
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                chunk = json.loads(data)
+                if "error" in chunk:
+                    raise ValueError(chunk["error"])
+                choices = chunk.get("choices") or []
+                yield (choices[0].get("text") or "") if choices else ""
+            else:
+                return
+            # Drain the rest of the body so the connection can be reused.
+            response.read()
+            finished = True
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            self._count("failures")
+            LLM_HTTP_REQUESTS.inc(outcome="error")
+            raise LLMBackendError(f"LLM server stream failed: {e}") from e
+        finally:
+            if finished and not response.will_close:
+                self._keep(conn)
+            else:
+                # Closed early or broken: the server sees the disconnect and
+                # stops generating.
+                conn.close()
+        LLM_HTTP_REQUESTS.inc(outcome="ok")
@@ -0,0 +1,451 @@
+import hashlib
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from app.utils.metrics import (
+    LLM_BATCH_SEQUENCES,
+    LLM_PREFILL,
+    LLM_TOKENS,
+    LLM_TOKENS_PER_SECOND,
+)
+
+# llama-cpp's create_completion defaults, used when a request doesn't set them.
+DEFAULT_SAMPLING = {"max_tokens": 16, "temperature": 0.8, "top_k": 40, "top_p": 0.95}
+# Completion parameters batched decoding honours; others (stop strings,
+# penalties) need create_completion.
+BATCH_PARAMS = frozenset(DEFAULT_SAMPLING) | {"seed"}
+
+
+class LlamaBatchDecoder:
+    """
+    Multi-sequence decoding on one llama-cpp model instance.
+
+    Goes through the low-level API: every ``decode`` is a single
+    ``llama_decode`` over a ``llama_batch`` whose tokens each carry the
+    sequence id of the request they belong to, so one pass over the weights
+    advances every sequence in the shared KV cache at once.
+
+    Sampling is temperature, top-k and top-p over the returned logits (the
+    penalties llama-cpp's own sampler also applies are not).
+
+    Args:
+        llm: A loaded ``llama_cpp.Llama``.
+        lib: The ``llama_cpp`` module.
+    """
+
+    def __init__(self, llm, lib):
+        import numpy
+
+        self.llm = llm
+        self._lib = lib
+        self._numpy = numpy
+        self.n_ctx = llm.n_ctx()
+        self.n_batch = llm.n_batch
+        self.n_vocab = llm.n_vocab()
+        self.eos = llm.token_eos()
+        self._batch = lib.llama_batch_init(self.n_batch, 0, 1)
+
+    def tokenize(self, text):
+        return self.llm.tokenize(text.encode("utf-8"))
+
+    def detokenize(self, tokens):
+        return self.llm.detokenize(tokens).decode("utf-8", errors="ignore")
+
+    def reset(self):
+        self._lib.llama_kv_cache_clear(self.llm.ctx)
+        # The instance's own record of its context no longer matches the
+        # cache, so its next completion starts from scratch.
+        self.llm.reset()
+
+    def copy_sequence(self, source, target, n_tokens):
+        """Share the first ``n_tokens`` cache cells of ``source`` with ``target``."""
+        self._lib.llama_kv_cache_seq_cp(self.llm.ctx, source, target, 0, n_tokens)
+
+    def remove_sequence(self, seq_id):
+        self._lib.llama_kv_cache_seq_rm(self.llm.ctx, seq_id, -1, -1)
+
+    def decode(self, entries):
+        """
+        Evaluate ``(seq_id, position, token, wants_logits)`` entries, at most
+        ``n_batch`` of them, in one call.
+        """
+        batch = self._batch
+        for i, (seq_id, position, token, wants_logits) in enumerate(entries):
+            batch.token[i] = token
+            batch.pos[i] = position
+            batch.n_seq_id[i] = 1
+            batch.seq_id[i][0] = seq_id
+            batch.logits[i] = wants_logits
+        batch.n_tokens = len(entries)
+        status = self._lib.llama_decode(self.llm.ctx, batch)
+        if status != 0:
+            raise RuntimeError(f"llama_decode failed with status {status}")
+
+    def sample(self, index, params, rng):
+        """Next token from the logits of entry ``index`` of the last ``decode``."""
+        np = self._numpy
+        logits = np.ctypeslib.as_array(
+            self._lib.llama_get_logits_ith(self.llm.ctx, index), shape=(self.n_vocab,)
+        )
+        temperature = params["temperature"]
+        if temperature <= 0:
+            return int(np.argmax(logits))
+
+        top_k = min(params["top_k"] or self.n_vocab, self.n_vocab)
+        candidates = np.argpartition(logits, -top_k)[-top_k:]
+        scores = logits[candidates] / temperature
+        order = np.argsort(-scores)
+        candidates, scores = candidates[order], scores[order]
+        weights = np.exp(scores - scores[0])
+        cumulative = np.cumsum(weights / weights.sum())
+        keep = int(np.searchsorted(cumulative, params["top_p"])) + 1
+        choice = np.searchsorted(cumulative[:keep], rng.random() * cumulative[keep - 1])
+        return int(candidates[min(int(choice), keep - 1)])
+
+    def close(self):
+        self._lib.llama_batch_free(self._batch)
+
+
+class _Sequence:
+    """One request while it is being decoded."""
+
+    def __init__(self, request, tokens, params):
+        self.request = request
+        self.tokens = tokens
+        self.params = params
+        self.seq_id = None
+        self.position = 0
+        self.next_token = None
+        self.generated = []
+        self.started = time.monotonic()
+        self.first_token_at = None
+        seed = params.get("seed")
+        if seed is None:
+            seed = hashlib.sha256(request.prompt.encode("utf-8")).digest()
+        self.rng = random.Random(seed)
+
+    @property
+    def reserved(self):
+        """Cache cells this sequence may end up using."""
+        return len(self.tokens) + self.params["max_tokens"]
+
+
+class _Request:
+    def __init__(self, prompt, params, deadline):
+        self.prompt = prompt
+        self.params = params
+        self.deadline = deadline
+        self.future = Future()
+        self.submitted = time.monotonic()
+        self.sequence = None
+
+
+class LLMBatcher:
+    """
+    Decode concurrent completions together, one batch per model instance.
+
+    Each of ``workers`` threads checks out a model instance once a request
+    is waiting, gathers whatever else arrives within ``window`` seconds (up to
+    ``max_batch`` requests) and decodes them as one batch: every step feeds
+    one token per running sequence through a single batched decode, so
+    aggregate tokens per second grow with the batch while each step costs
+    about as much as a single sequence's. Requests arriving later join the
+    running batch at its next step as long as a sequence id and their share
+    of the context (prompt plus ``max_tokens``) are free, and a finished
+    sequence frees both right away. The instance goes back to the pool when
+    its batch runs dry.
+
+    A prompt starting with the same tokens as one already in the batch (the
+    shared preamble) copies those cache cells instead of evaluating them
+    again.
+
+    Args:
+        checkout: Context manager factory yielding a model instance.
+        make_decoder: Callable turning an instance into a batch decoder such
+            as ``LlamaBatchDecoder``.
+        complete_one: ``(llm, prompt, params, deadline) -> str``, used one
+            request at a time when an instance can't batch.
+        window: Seconds to wait for more requests before a batch starts.
+        max_batch: Most sequences decoded together on one instance.
+        workers: Instances batching at the same time.
+    """
+
+    def __init__(
+        self, checkout, make_decoder, complete_one, window=0.01, max_batch=8, workers=1
+    ):
+        self.checkout = checkout
+        self.make_decoder = make_decoder
+        self.complete_one = complete_one
+        self.window = window
+        self.max_batch = max(1, int(max_batch))
+        self.workers = max(1, int(workers))
+
+        self._queue = queue.Queue()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.requests = 0
+        self.steps = 0
+        self.step_sequences = 0
+        self.unbatched = 0
+        self.decoder_error = None
+
+    def submit(self, prompt, params=None, deadline=None):
+        """
+        Queue ``prompt`` and wait for its text. Decoding stops early, keeping
+        the text so far, once ``deadline`` has expired.
+        """
+        params = {**DEFAULT_SAMPLING, **(params or {})}
+        request = _Request(prompt, params, deadline)
+        self._ensure_started()
+        self._queue.put(request)
+        return request.future.result()
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "window_ms": round(self.window * 1000, 3),
+                "max_batch": self.max_batch,
+                "workers": self.workers,
+                "queued": self._queue.qsize(),
+                "requests": self.requests,
+                "steps": self.steps,
+                "avg_sequences_per_step": (
+                    round(self.step_sequences / self.steps, 3) if self.steps else 0.0
+                ),
+                "unbatched": self.unbatched,
+                "decoder_error": self.decoder_error,
+            }
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop, name=f"llm-batch-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker_loop(self):
+        while True:
+            first = self._queue.get()
+            try:
+                with self.checkout() as llm:
+                    self._serve(llm, first)
+            except BaseException as e:
+                if not first.future.done():
+                    first.future.set_exception(e)
+
+    def _serve(self, llm, first):
+        try:
+            decoder = self.make_decoder(llm)
+        except Exception as e:
+            with self._stats_lock:
+                self.decoder_error = str(e)
+            self._serve_unbatched(llm, first)
+            return
+        try:
+            decoder.reset()
+            self._run(decoder, first)
+        finally:
+            decoder.reset()
+            decoder.close()
+
+    def _serve_unbatched(self, llm, first):
+        request = first
+        while request is not None:
+            try:
+                text = self.complete_one(
+                    llm, request.prompt, request.params, request.deadline
+                )
+            except Exception as e:
+                request.future.set_exception(e)
+            else:
+                request.future.set_result(text)
+            with self._stats_lock:
+                self.requests += 1
+                self.unbatched += 1
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                request = None
+
+    def _run(self, decoder, first):
+        waiting = [first]
+        running = []
+        try:
+            self._gather(waiting)
+            self._decode_loop(decoder, waiting, running)
+        except BaseException as e:
+            for request in waiting + [sequence.request for sequence in running]:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+
+    def _gather(self, waiting):
+        """Give requests arriving right behind the first a chance to start with it."""
+        gather_until = waiting[0].submitted + self.window
+        while len(waiting) < self.max_batch:
+            remaining = gather_until - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                waiting.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                return
+
+    def _decode_loop(self, decoder, waiting, running):
+        free_ids = list(range(self.max_batch))
+        reserved = 0
+        while True:
+            # Admit new requests while a sequence id and their context fit.
+            # One that doesn't fit waits here for a running sequence to end.
+            entries = []
+            admitted = []
+            while free_ids:
+                if not waiting:
+                    try:
+                        waiting.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                sequence = self._sequence(decoder, waiting[0])
+                if sequence is None:
+                    waiting.pop(0)
+                    continue
+                if (running or admitted) and (
+                    reserved + sequence.reserved > decoder.n_ctx
+                ):
+                    break
+                waiting.pop(0)
+                sequence.seq_id = free_ids.pop()
+                reserved += sequence.reserved
+                entries.extend(
+                    self._prefill_entries(decoder, sequence, running + admitted)
+                )
+                admitted.append(sequence)
+
+            # One new token for every running sequence, then the new prompts.
+            steps = []
+            for sequence in running:
+                steps.append(
+                    (sequence.seq_id, sequence.position, sequence.next_token, True)
+                )
+                sequence.position += 1
+            running.extend(admitted)
+            if not running:
+                return
+            self._feed(decoder, steps + entries, running)
+
+            still_running = []
+            for sequence in running:
+                if self._advance(decoder, sequence):
+                    still_running.append(sequence)
+                else:
+                    decoder.remove_sequence(sequence.seq_id)
+                    free_ids.append(sequence.seq_id)
+                    reserved -= sequence.reserved
+            running[:] = still_running
+            if not running and not waiting and self._queue.empty():
+                return
+
+    def _sequence(self, decoder, request):
+        """
+        The request's sequence (tokenized once), or None after failing a
+        request that can't fit in the context at all.
+        """
+        if request.sequence is not None:
+            return request.sequence
+        tokens = decoder.tokenize(request.prompt)
+        if len(tokens) >= decoder.n_ctx:
+            request.future.set_exception(
+                ValueError(
+                    f"Requested tokens ({len(tokens)}) exceed context window "
+                    f"of {decoder.n_ctx}"
+                )
+            )
+            return None
+        params = dict(request.params)
+        params["max_tokens"] = min(
+            params["max_tokens"] or decoder.n_ctx, decoder.n_ctx - len(tokens)
+        )
+        with self._stats_lock:
+            self.requests += 1
+        request.sequence = _Sequence(request, tokens, params)
+        return request.sequence
+
+    def _prefill_entries(self, decoder, sequence, others):
+        """Entries evaluating a new sequence's prompt, reusing a shared start."""
+        shared, source = 0, None
+        for other in others:
+            n = _common_prefix(other.tokens, sequence.tokens)
+            if n > shared:
+                shared, source = n, other
+        # Keep the last prompt token to evaluate here: its logits start decoding.
+        shared = min(shared, len(sequence.tokens) - 1)
+        if shared > 0:
+            decoder.copy_sequence(source.seq_id, sequence.seq_id, shared)
+        last = len(sequence.tokens) - 1
+        sequence.position = len(sequence.tokens)
+        return [
+            (sequence.seq_id, position, sequence.tokens[position], position == last)
+            for position in range(shared, len(sequence.tokens))
+        ]
+
+    def _feed(self, decoder, entries, running):
+        """Decode ``entries`` in chunks of ``n_batch``, sampling where asked."""
+        by_id = {sequence.seq_id: sequence for sequence in running}
+        for start in range(0, len(entries), decoder.n_batch):
+            chunk = entries[start : start + decoder.n_batch]
+            decoder.decode(chunk)
+            sampling = [i for i, entry in enumerate(chunk) if entry[3]]
+            LLM_BATCH_SEQUENCES.observe(len(sampling))
+            with self._stats_lock:
+                self.steps += 1
+                self.step_sequences += len(sampling)
+            for index in sampling:
+                sequence = by_id[chunk[index][0]]
+                sequence.next_token = decoder.sample(
+                    index, sequence.params, sequence.rng
+                )
+
+    def _advance(self, decoder, sequence):
+        """Take the sequence's sampled token; False once it has finished."""
+        now = time.monotonic()
+        if sequence.first_token_at is None:
+            sequence.first_token_at = now
+            LLM_PREFILL.observe(now - sequence.started)
+        token = sequence.next_token
+        request = sequence.request
+        finished = token == decoder.eos
+        if not finished:
+            sequence.generated.append(token)
+            LLM_TOKENS.inc()
+            finished = len(sequence.generated) >= sequence.params["max_tokens"]
+        if not finished and request.deadline is not None:
+            finished = request.deadline.expired()
+        if not finished:
+            return True
+
+        tokens = len(sequence.generated)
+        decode_seconds = now - sequence.first_token_at
+        if tokens > 1 and decode_seconds > 0:
+            LLM_TOKENS_PER_SECOND.observe((tokens - 1) / decode_seconds)
+        request.future.set_result(decoder.detokenize(sequence.generated))
+        return False
+
+
+def _common_prefix(a, b):
+    n = min(len(a), len(b))
+    for i in range(n):
+        if a[i] != b[i]:
+            return i
+    return n
@@ -1,15 +1,33 @@
+import hashlib
+import json
 import os
 import threading
-from typing import Optional
+import time
+from contextlib import contextmanager
+from typing import Iterator, NamedTuple, Optional
 
 # Example: Using llama-cpp-python or HuggingFace local model
 # Import your preferred local LLM interface here
 # For demonstration, I'll sketch a llama-cpp-python wrapper pattern
+# (imported on first use, see _llama_cpp).
 
-try:
-    from llama_cpp import Llama
-except ImportError:
-    Llama = None
+from flask import current_app, has_app_context
+
+from app import db
+from app.models import LLMInsight
+from app.utils.llm_admission import (
+    AdmissionController,
+    Deadline,
+    LLMDeadlineExceeded,
+    LLMOverloaded,
+)
+from app.utils.llm_backends import HTTPBackend, LLMBackend, metered_stream
+from app.utils.llm_batch import BATCH_PARAMS, LlamaBatchDecoder, LLMBatcher
+from app.utils.llm_context import milestone_context
+from app.utils.llm_pool import LLMPool
+from app.utils.llm_prefix import PrefixCache
+from app.utils.metrics import LLM_HOLD, LLM_INSIGHTS, LLM_QUEUE_WAIT, registry
+from app.utils.singleflight import FlightCancelled, FlightTimeout, SingleFlight
 
 # MODEL_PATH = os.environ.get(
 #     "LLM_MODEL_PATH", "../models/mistral-7b-instruct-v0.1.Q2_K.gguf"
@@ -17,24 +35,457 @@ except ImportError:
 
 MODEL_PATH = os.path.join("app", "models", "mistral-7b-instruct-v0.1.Q2_K.gguf")
 
+# "local" loads the model into this process; "http" sends completions to an
+# OpenAI-compatible server (``python -m app.llm_server``) so several web
+# workers can share one loaded model.
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "local")
+LLM_SERVER_URL = os.environ.get("LLM_SERVER_URL", "http://127.0.0.1:8081")
+# Defaults to the local model path so memoized insights carry over when the
+# bundled server hosts the same file.
+LLM_SERVER_MODEL = os.environ.get("LLM_SERVER_MODEL", MODEL_PATH)
+LLM_HTTP_POOL_SIZE = int(os.environ.get("LLM_HTTP_POOL_SIZE", "4"))
+LLM_HTTP_CONNECT_TIMEOUT = float(os.environ.get("LLM_HTTP_CONNECT_TIMEOUT", "5"))
+LLM_HTTP_READ_TIMEOUT = float(os.environ.get("LLM_HTTP_READ_TIMEOUT", "120"))
+LLM_HTTP_RETRIES = int(os.environ.get("LLM_HTTP_RETRIES", "2"))
+
+
+# Number of model instances to keep loaded and the CPU threads each one uses
+# (0 splits the available cores evenly between the instances).
+LLM_POOL_SIZE = int(os.environ.get("LLM_POOL_SIZE", "1"))
+LLM_THREADS_PER_INSTANCE = int(os.environ.get("LLM_THREADS_PER_INSTANCE", "0"))
+
+# Memory-map the model file (pages are shared between processes and loaded
+# on demand) and optionally lock it in RAM so it is never paged out.
+LLM_USE_MMAP = os.environ.get("LLM_USE_MMAP", "1") == "1"
+LLM_USE_MLOCK = os.environ.get("LLM_USE_MLOCK", "0") == "1"
+
+# Completions arriving within this window of each other are decoded together
+# on one model instance, up to this many sequences per instance (a window of
+# 0 or a batch size of 1 runs every completion on its own). Each instance's
+# context holds LLM_N_CTX tokens, shared by the sequences of its batch.
+LLM_BATCH_WINDOW_MS = float(os.environ.get("LLM_BATCH_WINDOW_MS", "10"))
+LLM_MAX_BATCH_SIZE = int(os.environ.get("LLM_MAX_BATCH_SIZE", "8"))
+LLM_N_CTX = int(os.environ.get("LLM_N_CTX", "4096"))
+
+# Interactive generations: how many may run at once (0 follows the backend's
+# concurrency), how many may wait behind them before new ones are turned
+# away, and the seconds each request gets for queueing plus generation
+# (0 for no limit).
+LLM_MAX_ACTIVE = int(os.environ.get("LLM_MAX_ACTIVE", "0"))
+LLM_MAX_QUEUED = int(os.environ.get("LLM_MAX_QUEUED", "8"))
+LLM_REQUEST_DEADLINE = float(os.environ.get("LLM_REQUEST_DEADLINE", "60"))
+
+# How long a caller waits for an identical generation already in flight
+# when it has no deadline of its own (0 waits indefinitely).
+LLM_SINGLEFLIGHT_TIMEOUT = float(os.environ.get("LLM_SINGLEFLIGHT_TIMEOUT", "300"))
+
+# The prompt's milestone context: how many of the newest milestones are
+# considered, and how many tokens they may take up together.
+LLM_CONTEXT_MILESTONES = int(os.environ.get("LLM_CONTEXT_MILESTONES", "10"))
+LLM_CONTEXT_TOKENS = int(os.environ.get("LLM_CONTEXT_TOKENS", "256"))
+
+GENERATION_PARAMS = {"max_tokens": 512, "temperature": 0.7}
+
+# Shared preamble of every insight prompt. Its KV state is evaluated once per
+# model instance and restored before each generation.
+PROMPT_PREFIX = (
+    "You are an AI assistant that provides insightful, actionable advice on "
+    "personal skill development.\n\n"
+)
+prefix_cache = PrefixCache(PROMPT_PREFIX)
+# Identical insight generations running at the same time, keyed by
+# ``insight_flight_key``.
+insight_flights = SingleFlight()
+
+_llm_pool = None
+_llm_pool_lock = threading.Lock()
+_llm_batcher = None
+_llm_backend = None
+_llm_admission = None
+_tokenizer = None
+_tokenizer_failed = False
+
+
+def _llama_cpp():
+    """
+    The llama_cpp module. Imported on first use rather than with this module:
+    it loads the native library, which every process start (including CLI
+    commands and web workers that never generate) would otherwise pay for.
+    """
+    try:
+        import llama_cpp
+    except ImportError as e:
+        raise RuntimeError("llama_cpp not installed or unavailable") from e
+    return llama_cpp
+
+
+def get_llm_instance(n_threads: Optional[int] = None):
+    """Load a new model instance. The pool calls this once per slot."""
+    return _llama_cpp().Llama(
+        model_path=MODEL_PATH,
+        n_ctx=LLM_N_CTX,
+        n_threads=n_threads,
+        use_mmap=LLM_USE_MMAP,
+        use_mlock=LLM_USE_MLOCK,
+    )
+
+
+def get_tokenizer_instance():
+    """Load the model's vocabulary only: enough to count tokens, no weights."""
+    return _llama_cpp().Llama(model_path=MODEL_PATH, vocab_only=True, verbose=False)
+
+
+def get_llm_pool() -> LLMPool:
+    global _llm_pool
+    if _llm_pool is None:
+        with _llm_pool_lock:
+            if _llm_pool is None:
+                _llm_pool = LLMPool(
+                    # Looked up at call time so the loader can be swapped out.
+                    factory=lambda n_threads: get_llm_instance(n_threads=n_threads),
+                    size=LLM_POOL_SIZE,
+                    n_threads=LLM_THREADS_PER_INSTANCE or None,
+                )
+    return _llm_pool
+
+
+def get_batch_decoder(llm):
+    """Multi-sequence decoder for a pooled instance, used by the batcher."""
+    return LlamaBatchDecoder(llm, _llama_cpp())
+
+
+def batching_enabled() -> bool:
+    return LLM_BATCH_WINDOW_MS > 0 and LLM_MAX_BATCH_SIZE > 1
 
-_llm_instance = None
-_llm_lock = threading.Lock()
 
+def get_llm_batcher() -> LLMBatcher:
+    global _llm_batcher
+    if _llm_batcher is None:
+        with _llm_pool_lock:
+            if _llm_batcher is None:
+                _llm_batcher = LLMBatcher(
+                    checkout=_checkout_llm,
+                    # Looked up at call time so the decoder can be swapped out.
+                    make_decoder=lambda llm: get_batch_decoder(llm),
+                    complete_one=lambda llm, prompt, params, deadline: "".join(
+                        _stream_completion(llm, prompt, params, deadline)
+                    ),
+                    window=LLM_BATCH_WINDOW_MS / 1000.0,
+                    max_batch=LLM_MAX_BATCH_SIZE,
+                    workers=LLM_POOL_SIZE,
+                )
+    return _llm_batcher
 
-def get_llm_instance():
-    global _llm_instance
-    if _llm_instance is None:
-        if Llama is None:
-            raise RuntimeError("llama_cpp not installed or unavailable")
-        _llm_instance = Llama(model_path=MODEL_PATH)
-    return _llm_instance
+
+def get_llm_backend() -> LLMBackend:
+    global _llm_backend
+    if _llm_backend is None:
+        with _llm_pool_lock:
+            if _llm_backend is None:
+                if LLM_BACKEND == "local":
+                    _llm_backend = LocalLlamaBackend()
+                elif LLM_BACKEND == "http":
+                    _llm_backend = HTTPBackend(
+                        LLM_SERVER_URL,
+                        LLM_SERVER_MODEL,
+                        pool_size=LLM_HTTP_POOL_SIZE,
+                        connect_timeout=LLM_HTTP_CONNECT_TIMEOUT,
+                        read_timeout=LLM_HTTP_READ_TIMEOUT,
+                        retries=LLM_HTTP_RETRIES,
+                    )
+                else:
+                    raise RuntimeError(f"Unknown LLM_BACKEND: {LLM_BACKEND!r}")
+    return _llm_backend
+
+
+def get_llm_admission() -> AdmissionController:
+    global _llm_admission
+    if _llm_admission is None:
+        backend = get_llm_backend()
+        with _llm_pool_lock:
+            if _llm_admission is None:
+                _llm_admission = AdmissionController(
+                    max_active=LLM_MAX_ACTIVE or backend.concurrency,
+                    max_queued=LLM_MAX_QUEUED,
+                )
+    return _llm_admission
+
+
+def request_deadline() -> Deadline:
+    """The deadline for an interactive generation starting now."""
+    return Deadline(LLM_REQUEST_DEADLINE or None)
+
+
+def _stream_completion(
+    llm, prompt: str, params: Optional[dict], deadline: Optional[Deadline] = None
+) -> Iterator[str]:
+    """
+    Run a streamed completion on ``llm`` with the prompt prefix restored, and
+    record prefill time (time to the first chunk) against the prefix cache.
+    A deadline (or its interrupt) stops decoding through llama-cpp's
+    stopping criteria.
+    """
+    reused_tokens = prefix_cache.prepare(llm, prompt)
+    prompt_tokens = len(llm.tokenize(prompt.encode("utf-8")))
+
+    params = dict(params or {})
+    if deadline is not None:
+        try:
+            criteria = getattr(_llama_cpp(), "StoppingCriteriaList", None)
+        except RuntimeError:
+            # Models not backed by llama_cpp take the deadline itself.
+            criteria = None
+        params["stopping_criteria"] = criteria([deadline]) if criteria else deadline
+
+    def texts():
+        for chunk in llm.create_completion(prompt=prompt, stream=True, **params):
+            # llama-cpp streams one token per chunk.
+            choices = chunk.get("choices") or []
+            yield (choices[0].get("text") if choices else None) or ""
+
+    yield from metered_stream(
+        texts(),
+        on_first_token=lambda prefill: prefix_cache.record_prefill(
+            prefill, prompt_tokens, reused_tokens
+        ),
+    )
+
+
+@contextmanager
+def _checkout_llm():
+    """Check out a pooled model, recording queue wait and hold time."""
+    started = time.monotonic()
+    with get_llm_pool().checkout() as llm:
+        acquired = time.monotonic()
+        LLM_QUEUE_WAIT.observe(acquired - started)
+        try:
+            yield llm
+        finally:
+            LLM_HOLD.observe(time.monotonic() - acquired)
+
+
+class LocalLlamaBackend(LLMBackend):
+    """Runs completions on this process' pool of llama-cpp instances."""
+
+    name = "local"
+
+    def __init__(self):
+        self.model_id = MODEL_PATH
+        self.concurrency = LLM_POOL_SIZE * (
+            LLM_MAX_BATCH_SIZE if batching_enabled() else 1
+        )
+
+    def stream(
+        self,
+        prompt: str,
+        params: Optional[dict] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Iterator[str]:
+        with _checkout_llm() as llm:
+            yield from _stream_completion(llm, prompt, params, deadline)
+
+    def complete(
+        self,
+        prompt: str,
+        params: Optional[dict] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """
+        Completions are decoded in batches with the ones running alongside them
+        (see ``LLMBatcher``) unless they ask for sampling options only
+        ``create_completion`` has; streams each hold an instance of their own.
+        """
+        if batching_enabled() and BATCH_PARAMS.issuperset(params or {}):
+            return get_llm_batcher().submit(prompt, params, deadline)
+        return super().complete(prompt, params, deadline)
+
+    def tokenize(self, text: str):
+        """Token ids of ``text``, or None when no tokenizer could be loaded."""
+        global _tokenizer, _tokenizer_failed
+        if _tokenizer is None and not _tokenizer_failed:
+            with _llm_pool_lock:
+                if _tokenizer is None and not _tokenizer_failed:
+                    try:
+                        _tokenizer = get_tokenizer_instance()
+                    except Exception as e:
+                        _tokenizer_failed = True
+                        # Also used by the completion server, outside any app.
+                        if has_app_context():
+                            current_app.logger.warning(
+                                f"Could not load the tokenizer, estimating tokens: {e}"
+                            )
+        if _tokenizer is None:
+            return None
+        return _tokenizer.tokenize(text.encode("utf-8"), add_bos=False)
+
+    def count_tokens(self, text: str) -> int:
+        tokens = self.tokenize(text)
+        return super().count_tokens(text) if tokens is None else len(tokens)
+
+    def warm(self):
+        """
+        Load every pool instance with the prompt prefix evaluated, and the
+        tokenizer, so the first requests find everything ready.
+        """
+        get_llm_pool().warm(
+            prepare=lambda llm: prefix_cache.prepare(llm, PROMPT_PREFIX)
+        )
+        self.tokenize("")
+
+    def stats(self) -> dict:
+        stats = get_llm_pool().stats()
+        if _llm_batcher is not None:
+            stats["batcher"] = _llm_batcher.stats()
+        return stats
+
+
+def complete_prompt(
+    prompt: str, params: Optional[dict] = None, deadline: Optional[Deadline] = None
+) -> str:
+    """Run a single completion on the configured backend."""
+    text = get_llm_backend().complete(prompt, params, deadline).strip()
+    return text or "No insight generated."
+
+
+class InsightResult(NamedTuple):
+    text: str
+    prompt_hash: str
+    # The stored row the text came from when the prompt was already answered.
+    insight: Optional[LLMInsight]
+    # True when the text came from an identical generation already in flight.
+    shared: bool = False
+    # True when this call stored ``insight`` (see ``store``).
+    created: bool = False
+
+
+def insight_flight_key(skill_id, section, prompt_hash):
+    return (skill_id, section, prompt_hash)
+
+
+def prompt_fingerprint(prompt: str, params: Optional[dict] = None) -> str:
+    """Content address of a generation: prompt, model and sampling parameters."""
+    payload = json.dumps(
+        {
+            "prompt": prompt,
+            "model": get_llm_backend().model_id,
+            "params": params if params is not None else GENERATION_PARAMS,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def find_memoized_insight(prompt_hash: str) -> Optional[LLMInsight]:
+    return (
+        LLMInsight.query.filter_by(prompt_hash=prompt_hash)
+        .order_by(LLMInsight.generated_at.desc())
+        .first()
+    )
+
+
+def generate_insight_result(
+    skill,
+    section: Optional[str] = "general",
+    deadline: Optional[Deadline] = None,
+    store: bool = False,
+    background: bool = False,
+) -> InsightResult:
+    """
+    Like ``generate_llm_insight`` but also return the prompt hash and, when the
+    identical prompt was answered before, the stored ``LLMInsight`` it came from.
+
+    Every generation goes through admission control, raising
+    ``LLMOverloaded`` when the model is saturated; ``background`` work (insight
+    jobs) waits behind interactive requests instead of being shed. With a
+    ``deadline`` the generation is stopped there, raising
+    ``LLMDeadlineExceeded`` with the partial text.
+
+    Concurrent calls for the same skill, section and prompt run the model
+    once: the first leads and the others wait for its text (``shared``), or
+    its error, for at most their deadline or ``LLM_SINGLEFLIGHT_TIMEOUT``.
+    With ``store`` a leader commits its ``LLMInsight`` before handing the text
+    over, so followers find the stored row instead of writing another.
+    """
+    prompt = build_prompt(skill, section)
+    prompt_hash = prompt_fingerprint(prompt)
+
+    memoized = find_memoized_insight(prompt_hash)
+    if memoized is not None:
+        LLM_INSIGHTS.inc(source="memo")
+        return InsightResult(memoized.content, prompt_hash, memoized)
+
+    key = insight_flight_key(skill.id, section, prompt_hash)
+    while True:
+        flight, leader = insight_flights.begin(key)
+        if leader:
+            break
+        try:
+            text = flight.result(_follower_timeout(deadline))
+        except FlightTimeout:
+            raise LLMOverloaded("Timed out waiting for the model.") from None
+        except (FlightCancelled, LLMOverloaded, LLMDeadlineExceeded) as e:
+            # The leader hit its own limits or went away. A caller without a
+            # deadline isn't bound by them and tries again, possibly leading.
+            if isinstance(e, FlightCancelled) or deadline is None:
+                continue
+            raise
+        LLM_INSIGHTS.inc(source="coalesced")
+        return InsightResult(text, prompt_hash, None, shared=True)
+
+    insight = None
+    try:
+        # A leader that finished between the lookup above and begin() has
+        # already stored the answer.
+        memoized = find_memoized_insight(prompt_hash)
+        if memoized is None:
+            text = _generate_insight_text(prompt, deadline, background)
+            if store:
+                insight = LLMInsight(
+                    skill_id=skill.id,
+                    section=section,
+                    content=text,
+                    prompt_hash=prompt_hash,
+                )
+                db.session.add(insight)
+                db.session.commit()
+    except Exception as e:
+        flight.fail(e)
+        raise
+    except BaseException:
+        flight.fail(FlightCancelled("the generation was interrupted"))
+        raise
+    if memoized is not None:
+        flight.resolve(memoized.content)
+        LLM_INSIGHTS.inc(source="memo")
+        return InsightResult(memoized.content, prompt_hash, memoized)
+    flight.resolve(text)
+    return InsightResult(text, prompt_hash, insight, created=store)
+
+
+def _follower_timeout(deadline: Optional[Deadline]) -> Optional[float]:
+    if deadline is not None and deadline.at is not None:
+        return deadline.remaining()
+    return LLM_SINGLEFLIGHT_TIMEOUT or None
+
+
+def _generate_insight_text(
+    prompt: str, deadline: Optional[Deadline], background: bool = False
+) -> str:
+    with get_llm_admission().admit(deadline, background=background):
+        LLM_INSIGHTS.inc(source="model")
+        text = complete_prompt(prompt, GENERATION_PARAMS, deadline)
+    if deadline is not None and deadline.expired():
+        raise LLMDeadlineExceeded(text)
+    return text
 
 
 def generate_llm_insight(skill, section: Optional[str] = "general") -> str:
     """
     Generate an insight string from the local LLM based on the skill and section.
 
+    Prompts that were already answered (same rendered prompt, model and
+    sampling parameters) are served from the stored ``LLMInsight``.
+
     Args:
         skill: Skill model instance with attributes like name, description, milestones
         section: The insight section/topic requested (e.g. 'motivation', 'next steps')
@@ -42,30 +493,142 @@ def generate_llm_insight(skill, section: Optional[str] = "general") -> str:
     Returns:
         Generated insight string
     """
-    prompt = build_prompt(skill, section)
+    return generate_insight_result(skill, section).text
 
-    llm = get_llm_instance()
-    with _llm_lock:
-        response = llm.create_completion(prompt=prompt, max_tokens=512, temperature=0.7)
-        # Adjust parameters based on your model and llama-cpp-python version
 
-    text = (
-        response["choices"][0]["text"].strip()
-        if response and "choices" in response and response["choices"]
-        else "No insight generated."
+def record_llm_insight(
+    skill,
+    section: Optional[str] = "general",
+    deadline: Optional[Deadline] = None,
+    background: bool = False,
+):
+    """
+    Generate (or reuse) an insight and return ``(LLMInsight, created)``.
+
+    New rows are committed before concurrent callers for the same prompt get
+    the text, so those find the row (``created`` False) rather than storing
+    a duplicate. See ``generate_insight_result`` for ``deadline`` and
+    ``background``; a partial insight cut off by the deadline is never stored.
+    """
+    result = generate_insight_result(
+        skill, section, deadline, store=True, background=background
     )
-    return text or "No insight generated."
+    if result.insight is not None:
+        return result.insight, result.created
+    if result.shared:
+        # Leaders commit before handing over their text.
+        stored = find_memoized_insight(result.prompt_hash)
+        if stored is not None:
+            return stored, False
+
+    insight = LLMInsight(
+        skill_id=skill.id,
+        section=section,
+        content=result.text,
+        prompt_hash=result.prompt_hash,
+    )
+    db.session.add(insight)
+    return insight, True
+
+
+def stream_llm_insight(skill, section: Optional[str] = "general") -> Iterator[str]:
+    """
+    Generate an insight like ``generate_llm_insight`` but yield the text as the
+    model produces it, so callers can forward tokens before generation ends.
+
+    The model instance (or server connection) is held until the generator is
+    exhausted or closed, so a consumer that stops early (e.g. a disconnected
+    client) returns it to the pool.
+    """
+    return stream_prompt(build_prompt(skill, section))
+
+
+def stream_prompt(
+    prompt: str, params: Optional[dict] = None, deadline: Optional[Deadline] = None
+) -> Iterator[str]:
+    return get_llm_backend().stream(
+        prompt, params if params is not None else GENERATION_PARAMS, deadline
+    )
+
+
+@registry.register_collector
+def _llm_admission_metrics():
+    if _llm_admission is None:
+        return []
+    stats = _llm_admission.stats()
+    return [
+        (
+            "skillmap_llm_admission_requests",
+            "gauge",
+            "Generations running or waiting for the model, by state.",
+            [
+                ({"state": "active"}, stats["active"] - stats["background_active"]),
+                ({"state": "queued"}, stats["queued"]),
+                ({"state": "background_active"}, stats["background_active"]),
+                ({"state": "background_queued"}, stats["background_queued"]),
+            ],
+        ),
+    ]
+
+
+@registry.register_collector
+def _insight_flight_metrics():
+    stats = insight_flights.stats()
+    return [
+        (
+            "skillmap_insight_flights",
+            "gauge",
+            "Insight generations in flight, and identical requests waiting on them.",
+            [
+                ({"state": "in_flight"}, stats["in_flight"]),
+                ({"state": "waiting"}, stats["waiting"]),
+            ],
+        ),
+    ]
+
+
+@registry.register_collector
+def _llm_pool_metrics():
+    # Only report on a pool that exists; a scrape must not load the model.
+    if _llm_pool is None:
+        return []
+    stats = _llm_pool.stats()
+    return [
+        (
+            "skillmap_llm_pool_instances",
+            "gauge",
+            "Model instances by state.",
+            [
+                ({"state": "loaded"}, stats["loaded"]),
+                ({"state": "in_use"}, stats["in_use"]),
+            ],
+        ),
+        (
+            "skillmap_llm_pool_waiting",
+            "gauge",
+            "Callers waiting for a model instance.",
+            [({}, stats["waiting"])],
+        ),
+        (
+            "skillmap_llm_pool_size",
+            "gauge",
+            "Maximum number of model instances.",
+            [({}, stats["size"])],
+        ),
+    ]
 
 
 def build_prompt(skill, section) -> str:
-    milestones_summary = "\n".join(
-        f"- {m.timestamp.strftime('%Y-%m-%d')}: {m.progress_level or 'Progress'} - {(m.note or '')[:100]}"
-        for m in sorted(skill.milestones, key=lambda x: x.timestamp, reverse=True)[:5]
+    return PROMPT_PREFIX + build_prompt_suffix(skill, section)
+
+
+def build_prompt_suffix(skill, section) -> str:
+    """The skill-specific part of the prompt that follows ``PROMPT_PREFIX``."""
+    milestones_summary = milestone_context(
+        skill.id, get_llm_backend(), LLM_CONTEXT_TOKENS, LLM_CONTEXT_MILESTONES
     )
 
     return f"""
-You are an AI assistant that provides insightful, actionable advice on personal skill development.
-
 Skill: {skill.name}
 Category: {skill.category or 'General'}
 Description: {skill.description or 'No description provided.'}
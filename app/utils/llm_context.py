@@ -0,0 +1,94 @@
+import hashlib
+
+from sqlalchemy import select
+
+from app import db, token_cache
+from app.models import Milestone
+
+TOKEN_COUNT_CACHE_TIMEOUT = 3600 * 24 * 30
+# A milestone that doesn't fit is cut down to the space left, unless that is
+# less than this many tokens.
+MIN_LINE_TOKENS = 12
+
+
+def _token_count_key(model_id, text):
+    digest = hashlib.sha1(f"{model_id}\0{text}".encode("utf-8")).hexdigest()
+    return f"tokens:{digest}"
+
+
+def count_tokens_cached(backend, texts):
+    """
+    Token counts of ``texts`` under ``backend``'s tokenizer.
+
+    Counts are cached by model and text (in ``token_cache``, apart from the
+    insight cache), so a milestone is tokenized once and again only after
+    its line changes.
+    """
+    keys = [_token_count_key(backend.model_id, text) for text in texts]
+    counts = list(token_cache.get_many(*keys)) if keys else []
+    missing = {}
+    for i, (text, count) in enumerate(zip(texts, counts)):
+        if count is None:
+            counts[i] = backend.count_tokens(text)
+            missing[keys[i]] = counts[i]
+    if missing:
+        token_cache.set_many(missing, timeout=TOKEN_COUNT_CACHE_TIMEOUT)
+    return counts
+
+
+def _milestone_line(timestamp, level, note):
+    return f"- {timestamp.strftime('%Y-%m-%d')}: {level or 'Progress'} - {note or ''}"
+
+
+def _truncate_to(backend, line, tokens, budget):
+    """
+    The longest prefix of ``line`` (plus an ellipsis) within ``budget`` tokens,
+    given that the whole line is ``tokens`` long.
+
+    The cut is estimated from the share of the line's tokens that fit and then
+    checked, so it usually takes one tokenizer call (each one a round trip
+    with the HTTP backend); an estimate that comes out over is shrunk by the
+    same ratio and checked again.
+    """
+    end = len(line) * budget // tokens
+    while end > 0:
+        shortened = line[:end].rstrip() + "…"
+        count = backend.count_tokens(shortened)
+        if count <= budget:
+            return shortened
+        end = min(end - 1, end * budget // count)
+    return ""
+
+
+def milestone_context(skill_id, backend, token_budget, limit):
+    """
+    The "Recent Milestones" lines for a prompt, newest first.
+
+    Reads only the ``limit`` newest milestones (an ordered LIMIT query on the
+    skill/timestamp index) and packs as many as fit in ``token_budget``
+    tokens; the first one that doesn't fit is shortened to the space left.
+    Prompt size, and with it prefill time, stays bounded however long a
+    skill's history grows.
+    """
+    rows = db.session.execute(
+        select(Milestone.timestamp, Milestone.progress_level, Milestone.note)
+        .where(Milestone.skill_id == skill_id)
+        .order_by(Milestone.timestamp.desc(), Milestone.id.desc())
+        .limit(limit)
+    ).all()
+    lines = [_milestone_line(*row) for row in rows]
+
+    packed = []
+    remaining = token_budget
+    # Each line is followed by a newline, roughly one more token.
+    for line, tokens in zip(lines, count_tokens_cached(backend, lines)):
+        if tokens + 1 <= remaining:
+            packed.append(line)
+            remaining -= tokens + 1
+            continue
+        if remaining - 1 >= MIN_LINE_TOKENS:
+            shortened = _truncate_to(backend, line, tokens, remaining - 1)
+            if shortened:
+                packed.append(shortened)
+        break
+    return "\n".join(packed)
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LLMPoolTimeout(RuntimeError):
+    """Raised when no model instance became free within the checkout timeout."""
+
+
+class LLMPool:
+    """
+    A fixed-size pool of model instances with a checkout/return API.
+
+    Instances are loaded lazily, one per slot, the first time every existing
+    instance is busy. Each instance gets its own share of CPU threads so
+    several generations can run side by side instead of queueing behind a
+    single global lock.
+
+    Args:
+        factory: Callable taking ``n_threads`` and returning a loaded model.
+        size: Maximum number of model instances.
+        n_threads: Threads per instance (defaults to an even split of the CPUs).
+    """
+
+    def __init__(self, factory, size=1, n_threads=None):
+        self.factory = factory
+        self.size = max(1, int(size))
+        self.n_threads = n_threads or max(1, (os.cpu_count() or 1) // self.size)
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._created = 0
+        self._in_use = 0
+        self._waiting = 0
+
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def acquire(self, timeout=None):
+        """Take a model instance, loading a new one if a slot is still free."""
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+
+        with self._cond:
+            self._waiting += 1
+            try:
+                while not self._idle and self._created >= self.size:
+                    remaining = (
+                        None if deadline is None else deadline - time.monotonic()
+                    )
+                    if remaining is not None and remaining <= 0:
+                        raise LLMPoolTimeout(
+                            f"no model instance free after {timeout:.1f}s"
+                        )
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    llm = self._idle.pop()
+                else:
+                    llm = None
+                    self._created += 1
+                self._in_use += 1
+            finally:
+                self._waiting -= 1
+
+            waited = time.monotonic() - started
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+        if llm is None:
+            try:
+                llm = self.factory(n_threads=self.n_threads)
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+        return llm
+
+    def warm(self, prepare=None):
+        """
+        Load every slot that isn't loaded yet, one after the other, and return
+        the new instances. ``prepare`` runs on each before it becomes
+        available. Checkouts arriving meanwhile wait for these loads instead of
+        loading a model of their own.
+        """
+        loaded = []
+        while True:
+            with self._cond:
+                if self._created >= self.size:
+                    return loaded
+                self._created += 1
+            try:
+                llm = self.factory(n_threads=self.n_threads)
+                if prepare is not None:
+                    prepare(llm)
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append(llm)
+                self._cond.notify()
+            loaded.append(llm)
+
+    def release(self, llm):
+        """Return an instance taken with ``acquire``."""
+        with self._cond:
+            self._idle.append(llm)
+            self._in_use -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def checkout(self, timeout=None):
+        llm = self.acquire(timeout)
+        try:
+            yield llm
+        finally:
+            self.release(llm)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "threads_per_instance": self.n_threads,
+                "loaded": self._created,
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "checkouts": self.checkouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_seconds_avg": (
+                    round(self.wait_seconds_total / self.checkouts, 6)
+                    if self.checkouts
+                    else 0.0
+                ),
+            }
@@ -0,0 +1,88 @@
+import threading
+import weakref
+
+
+class PrefixCache:
+    """
+    Keep the evaluated KV state of a fixed prompt prefix for each model.
+
+    ``prepare`` makes sure a model's context starts with the prefix before a
+    completion runs: if it already does (the previous prompt on that instance
+    shared the prefix) nothing happens, otherwise the saved state is restored,
+    or built once with ``eval`` and saved. llama-cpp then only prefills the
+    tokens after the longest matching prefix, so prefill cost scales with the
+    per-request suffix alone.
+
+    Args:
+        prefix: Text every cached prompt starts with.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._states = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+        self.builds = 0
+        self.restores = 0
+        self.prefill_calls = 0
+        self.prefill_seconds_total = 0.0
+        self.prompt_tokens_total = 0
+        self.reused_tokens_total = 0
+
+    def prepare(self, llm, prompt):
+        """
+        Load the prefix state into ``llm`` if ``prompt`` starts with the prefix.
+
+        Returns the number of prompt tokens that will be served from the cache.
+        """
+        if not prompt.startswith(self.prefix):
+            return 0
+
+        entry = self._states.get(llm)
+        if entry is None:
+            tokens = llm.tokenize(self.prefix.encode("utf-8"))
+            llm.reset()
+            llm.eval(tokens)
+            entry = (tokens, llm.save_state())
+            self._states[llm] = entry
+            with self._lock:
+                self.builds += 1
+            return len(tokens)
+
+        tokens, state = entry
+        if not self._context_starts_with(llm, tokens):
+            llm.load_state(state)
+            with self._lock:
+                self.restores += 1
+        return len(tokens)
+
+    def record_prefill(self, seconds, prompt_tokens, reused_tokens):
+        with self._lock:
+            self.prefill_calls += 1
+            self.prefill_seconds_total += seconds
+            self.prompt_tokens_total += prompt_tokens
+            self.reused_tokens_total += reused_tokens
+
+    def stats(self):
+        with self._lock:
+            return {
+                "prefix_builds": self.builds,
+                "prefix_restores": self.restores,
+                "prefill_calls": self.prefill_calls,
+                "prefill_seconds_total": round(self.prefill_seconds_total, 6),
+                "prefill_seconds_avg": (
+                    round(self.prefill_seconds_total / self.prefill_calls, 6)
+                    if self.prefill_calls
+                    else 0.0
+                ),
+                "prompt_tokens_total": self.prompt_tokens_total,
+                "prefix_tokens_reused_total": self.reused_tokens_total,
+            }
+
+    @staticmethod
+    def _context_starts_with(llm, tokens):
+        n_tokens = getattr(llm, "n_tokens", 0)
+        input_ids = getattr(llm, "input_ids", None)
+        if input_ids is None or n_tokens < len(tokens):
+            return False
+        return list(input_ids[: len(tokens)]) == list(tokens)
@@ -0,0 +1,351 @@
+import bisect
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{_escape(v)}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = defaultdict(int)
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            self._values[self._key(labels)] += amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in values
+        ]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        with self._lock:
+            values = sorted((k, list(v)) for k, v in self._values.items())
+        lines = self.header()
+        for key, series in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, key, [("le", _format_value(bound))]
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metric store rendered in the Prometheus text format.
+
+    Counters and histograms are updated as events happen; collectors are
+    callables run at scrape time that return ``(name, type, help, samples)``
+    tuples, with ``samples`` a list of ``(labels_dict, value)``, for values
+    that already live elsewhere (pool and cache statistics). Each process
+    keeps its own numbers, so scrape every worker separately.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                current_app.logger.error(f"Metrics collector failed: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    label_str = _format_labels(labels.keys(), labels.values())
+                    lines.append(f"{name}{label_str} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    "skillmap_http_requests_total",
+    "HTTP requests served.",
+    ("method", "endpoint", "status"),
+)
+HTTP_DURATION = registry.histogram(
+    "skillmap_http_request_duration_seconds",
+    "Time spent in the view and after-request hooks.",
+    ("method", "endpoint"),
+)
+HTTP_SQL_QUERIES = registry.histogram(
+    "skillmap_http_request_sql_queries",
+    "SQL statements executed per request.",
+    ("endpoint",),
+    buckets=COUNT_BUCKETS,
+)
+HTTP_SQL_DURATION = registry.histogram(
+    "skillmap_http_request_sql_seconds",
+    "Time spent executing SQL per request.",
+    ("endpoint",),
+)
+SQL_QUERY_DURATION = registry.histogram(
+    "skillmap_sql_query_duration_seconds",
+    "Duration of individual SQL statements.",
+)
+
+LLM_QUEUE_WAIT = registry.histogram(
+    "skillmap_llm_queue_wait_seconds",
+    "Time spent waiting for a free model instance.",
+    buckets=LLM_BUCKETS,
+)
+LLM_HOLD = registry.histogram(
+    "skillmap_llm_hold_seconds",
+    "Time a model instance stayed checked out for one generation.",
+    buckets=LLM_BUCKETS,
+)
+LLM_PREFILL = registry.histogram(
+    "skillmap_llm_prefill_seconds",
+    "Time from starting a completion to its first token.",
+    buckets=LLM_BUCKETS,
+)
+LLM_TOKENS = registry.counter(
+    "skillmap_llm_tokens_generated_total", "Tokens generated by the model."
+)
+LLM_TOKENS_PER_SECOND = registry.histogram(
+    "skillmap_llm_tokens_per_second",
+    "Decode throughput of each generation, after the first token.",
+    buckets=RATE_BUCKETS,
+)
+LLM_BATCH_SEQUENCES = registry.histogram(
+    "skillmap_llm_batch_sequences",
+    "Sequences sampled from each batched decode step.",
+    buckets=COUNT_BUCKETS,
+)
+LLM_INSIGHTS = registry.counter(
+    "skillmap_llm_insights_total",
+    "Insight generations by where the text came from (model, memo, coalesced).",
+    ("source",),
+)
+LLM_ADMISSIONS = registry.counter(
+    "skillmap_llm_admissions_total",
+    "Interactive generation requests by admission outcome "
+    "(admitted, shed, timeout, cancelled).",
+    ("outcome",),
+)
+LLM_HTTP_REQUESTS = registry.counter(
+    "skillmap_llm_http_requests_total",
+    "Requests to the LLM server by outcome (ok, retry, error).",
+    ("outcome",),
+)
+INSIGHT_PRECOMPUTE = registry.counter(
+    "skillmap_insight_precompute_total",
+    "Idle-time insight precomputations by outcome "
+    "(generated, memo, preempted, failed, skipped).",
+    ("outcome",),
+)
+INSIGHT_COMPACTION = registry.counter(
+    "skillmap_insight_compaction_rows_total",
+    "Insight rows handled by compaction (deleted, compressed).",
+    ("action",),
+)
+INSIGHT_CACHE_LOOKUPS = registry.counter(
+    "skillmap_insight_cache_lookups_total",
+    "Insight cache lookups by result.",
+    ("result",),
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    SQL_QUERY_DURATION.observe(elapsed)
+    if has_request_context() and "metrics_queries" in g:
+        g.metrics_queries.append((statement, elapsed))
+
+
+_listening = False
+_listen_lock = threading.Lock()
+
+
+def _listen_to_engines():
+    global _listening
+    with _listen_lock:
+        if not _listening:
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            _listening = True
+
+
+class RequestMetrics:
+    """
+    Per-request timing and SQL accounting.
+
+    Before/after request hooks time every request by endpoint, and SQLAlchemy
+    cursor events attribute each statement to the request that ran it.
+    Requests slower than ``SLOW_REQUEST_MS`` (unset by default) are logged
+    with their slowest statements. For streamed responses only the time to
+    build the response is measured, not the stream itself.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("SLOW_REQUEST_MS", None)
+        app.config.setdefault("SLOW_REQUEST_TOP_QUERIES", 5)
+
+        _listen_to_engines()
+        app.extensions["request_metrics"] = self
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    @staticmethod
+    def _start():
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = []
+
+    @staticmethod
+    def _finish(response):
+        started = g.pop("metrics_started", None)
+        queries = g.pop("metrics_queries", [])
+        if started is None:
+            return response
+
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or "unmatched"
+        sql_seconds = sum(seconds for _, seconds in queries)
+
+        HTTP_REQUESTS.inc(
+            method=request.method, endpoint=endpoint, status=response.status_code
+        )
+        HTTP_DURATION.observe(elapsed, method=request.method, endpoint=endpoint)
+        HTTP_SQL_QUERIES.observe(len(queries), endpoint=endpoint)
+        HTTP_SQL_DURATION.observe(sql_seconds, endpoint=endpoint)
+
+        threshold = current_app.config["SLOW_REQUEST_MS"]
+        if threshold is not None and elapsed * 1000 >= threshold:
+            _log_slow_request(
+                elapsed,
+                queries,
+                sql_seconds,
+                current_app.config["SLOW_REQUEST_TOP_QUERIES"],
+            )
+        return response
+
+
+def _log_slow_request(elapsed, queries, sql_seconds, top):
+    by_statement = defaultdict(lambda: [0, 0.0])
+    for statement, seconds in queries:
+        entry = by_statement[" ".join(statement.split())]
+        entry[0] += 1
+        entry[1] += seconds
+
+    breakdown = "".join(
+        f"\n  {seconds * 1000:8.1f} ms  x{count:<4d} {statement[:200]}"
+        for statement, (count, seconds) in sorted(
+            by_statement.items(), key=lambda item: item[1][1], reverse=True
+        )[:top]
+    )
+    current_app.logger.warning(
+        f"Slow request {request.method} {request.full_path.rstrip('?')}: "
+        f"{elapsed * 1000:.1f} ms, {len(queries)} queries in "
+        f"{sql_seconds * 1000:.1f} ms{breakdown}"
+    )
+
+
+request_metrics = RequestMetrics()
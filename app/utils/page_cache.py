@@ -0,0 +1,177 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from functools import wraps
+from typing import NamedTuple, Optional
+
+from flask import current_app, g, make_response, request, session
+from markupsafe import Markup
+from sqlalchemy import func, select
+from werkzeug.http import is_resource_modified
+
+from app import cache, db
+from app.models import InsightJob, LLMInsight, Milestone, Skill
+
+FRAGMENT_CACHE_TIMEOUT = 3600 * 24
+
+_TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+_templates_stamp = None
+
+
+class PageVersion(NamedTuple):
+    stamp: str
+    last_modified: Optional[datetime]
+
+
+def _templates_version():
+    """Fingerprint of the template files, so a deploy invalidates old pages."""
+    global _templates_stamp
+    if _templates_stamp is None:
+        digest = hashlib.sha1()
+        for root, _, files in sorted(os.walk(_TEMPLATES_DIR)):
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                digest.update(
+                    f"{root}/{name}:{stat.st_size}:{stat.st_mtime_ns};".encode()
+                )
+        _templates_stamp = digest.hexdigest()
+    return _templates_stamp
+
+
+def _scalar(expr, *criteria):
+    return select(expr).where(*criteria).scalar_subquery()
+
+
+def _page_version(*exprs, extra=(), exists=None):
+    """
+    Read the given aggregates in one statement and fold them into a version.
+
+    With ``exists`` (an expression counting the page's entity) the page has
+    no version, so no 304, when the entity is gone.
+    """
+    if exists is not None:
+        exprs = (exists, *exprs)
+    row = db.session.execute(select(*exprs)).one()
+    if exists is not None and not row[0]:
+        return None
+    values = [*row, *extra, _templates_version()]
+    stamp = hashlib.sha1(repr(values).encode("utf-8")).hexdigest()[:24]
+
+    times = [v for v in row if isinstance(v, datetime)]
+    last_modified = None
+    if times:
+        # Milestones may be dated in the future; Last-Modified can't be.
+        last_modified = min(max(times), datetime.utcnow()).replace(tzinfo=timezone.utc)
+    return PageVersion(stamp, last_modified)
+
+
+def _skill_aggregates(*criteria):
+    return (
+        _scalar(func.count(Skill.id), *criteria),
+        _scalar(func.max(Skill.updated_at), *criteria),
+    )
+
+
+def _milestone_aggregates(*criteria):
+    return (
+        _scalar(func.count(Milestone.id), *criteria),
+        _scalar(func.max(Milestone.id), *criteria),
+        _scalar(func.max(Milestone.timestamp), *criteria),
+    )
+
+
+def _insight_aggregates(*criteria):
+    return (
+        _scalar(func.count(LLMInsight.id), *criteria),
+        _scalar(func.max(LLMInsight.id), *criteria),
+        _scalar(func.max(LLMInsight.generated_at), *criteria),
+    )
+
+
+def skills_version():
+    return _page_version(*_skill_aggregates())
+
+
+def dashboard_version():
+    # Rule-based insights depend on the current date as well as the data.
+    return _page_version(
+        *_skill_aggregates(),
+        *_milestone_aggregates(),
+        extra=(datetime.utcnow().date().isoformat(),),
+    )
+
+
+def skill_version(skill_id):
+    return _page_version(
+        *_skill_aggregates(Skill.id == skill_id),
+        *_milestone_aggregates(Milestone.skill_id == skill_id),
+        *_insight_aggregates(LLMInsight.skill_id == skill_id),
+        _scalar(
+            func.count(InsightJob.id),
+            InsightJob.skill_id == skill_id,
+            InsightJob.status.in_(
+                [InsightJob.STATUS_QUEUED, InsightJob.STATUS_RUNNING]
+            ),
+        ),
+        exists=_scalar(func.count(Skill.id), Skill.id == skill_id),
+    )
+
+
+def insights_version():
+    # Skill names are shown next to each insight.
+    return _page_version(*_insight_aggregates(), *_skill_aggregates())
+
+
+def conditional_page(version_for):
+    """
+    Serve a page with ETag/Last-Modified validators taken from its data.
+
+    ``version_for`` receives the view's URL arguments and returns a
+    ``PageVersion``, or None when the page's entity doesn't exist (the view
+    then runs and answers 404). A client that already holds the current
+    version gets a 304 without the view running; otherwise the view runs with
+    the version in ``g.page_version`` for ``cached_fragment``. Pages with
+    pending flash messages are always rendered, so the message isn't
+    swallowed by a 304.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = g.page_version = version_for(**kwargs)
+            if version is None:
+                return view(*args, **kwargs)
+
+            if "_flashes" not in session and not is_resource_modified(
+                request.environ, etag=version.stamp, last_modified=version.last_modified
+            ):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(version.stamp, weak=True)
+            response.last_modified = version.last_modified
+            # Let browsers keep the page but revalidate it on every visit.
+            response.cache_control.no_cache = True
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def cached_fragment(name, render):
+    """
+    Return the HTML of a page fragment, rendering it only when the page's
+    data version (or the URL, e.g. the pagination cursor) changed.
+
+    Outdated versions are never read again and age out of the cache.
+    """
+    key = f"fragment:{name}:{g.page_version.stamp}:{request.full_path}"
+    html = cache.get(key)
+    if html is None:
+        html = str(render())
+        cache.set(key, html, timeout=FRAGMENT_CACHE_TIMEOUT)
+    return Markup(html)
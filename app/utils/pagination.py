@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(sort_value, row_id):
+    payload = json.dumps(
+        [sort_value.isoformat() if sort_value is not None else None, row_id]
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Return ``(sort_value, id)`` from a cursor, raising ValueError if malformed."""
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if sort_value is not None:
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(row_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_paginate(query, sort_column, id_column, cursor=None, limit=None):
+    """
+    Return one page of ``query`` ordered newest first by ``(sort_column, id)``.
+
+    Instead of OFFSET, the page starts strictly after the row encoded in
+    ``cursor``, so every page is a bounded index range scan on a composite
+    ``(sort_column, id)`` index no matter how deep the client pages.
+
+    Rows with a NULL ``sort_column`` come last, after every dated row. They
+    are read with a second seek once the dated range runs out, so each
+    query stays a plain range scan.
+    """
+    limit = limit or DEFAULT_PAGE_SIZE
+    dated = query.filter(sort_column.is_not(None))
+    undated = query.filter(sort_column.is_(None))
+    rows = []
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        if sort_value is None:
+            dated = None
+            undated = undated.filter(id_column < row_id)
+        else:
+            dated = dated.filter(tuple_(sort_column, id_column) < (sort_value, row_id))
+
+    if dated is not None:
+        rows = (
+            dated.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1).all()
+        )
+    if len(rows) <= limit:
+        rows += undated.order_by(id_column.desc()).limit(limit + 1 - len(rows)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            getattr(last, sort_column.key), getattr(last, id_column.key)
+        )
+    return KeysetPage(rows, next_cursor)
@@ -0,0 +1,223 @@
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_, select
+
+from app import db
+from app.models import LLMInsight, Skill
+from app.utils.insight_cache import cache_insight
+from app.utils.jobs import insight_queue
+from app.utils.llm_admission import Deadline
+from app.utils.llm_client import (
+    GENERATION_PARAMS,
+    build_prompt,
+    complete_prompt,
+    find_memoized_insight,
+    get_llm_admission,
+    prompt_fingerprint,
+)
+from app.utils.metrics import INSIGHT_PRECOMPUTE
+
+# Sections the skill routes queue by themselves after every write; they are
+# already generated on time and would crowd out what users actually ask for.
+AUTOMATIC_SECTIONS = ("initial", "progress update")
+DEFAULT_SECTIONS = ("general",)
+
+
+class InsightPrecomputer:
+    """
+    Generate likely-requested insights while the model has nothing else to do.
+
+    Every ``PRECOMPUTE_INTERVAL`` seconds a background thread ranks
+    (skill, section) pairs: sections by how often users asked for them over
+    the last ``PRECOMPUTE_DEMAND_DAYS``, skills by how recently they changed,
+    counting only skills changed since their last insight for that section.
+    The best ``PRECOMPUTE_BATCH`` pairs are generated one at a time and
+    stored like any other insight, so the user's click is answered from the
+    insight cache (or the prompt memo).
+
+    Precomputation never competes with real work: it only starts a pair
+    while no interactive generation or insight job is running or waiting,
+    and stops decoding at the next token once one arrives, discarding the
+    partial text. It is off by default (``PRECOMPUTE_INSIGHTS``); with
+    several web processes, enable it in one.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        # (skill_id, section) -> skill.updated_at when last found up to date,
+        # so pairs whose prompt didn't change aren't looked at again. Only
+        # pairs the last ranking still returned are kept (see candidates).
+        self._checked = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PRECOMPUTE_INSIGHTS", False)
+        app.config.setdefault("PRECOMPUTE_INTERVAL", 60.0)
+        app.config.setdefault("PRECOMPUTE_SECTIONS", 3)
+        app.config.setdefault("PRECOMPUTE_BATCH", 20)
+        app.config.setdefault("PRECOMPUTE_LOOKBACK_DAYS", 14)
+        app.config.setdefault("PRECOMPUTE_DEMAND_DAYS", 30)
+
+        self.app = app
+        app.extensions["insight_precompute"] = self
+        if app.config["PRECOMPUTE_INSIGHTS"]:
+            app.before_request(self._ensure_started)
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._loop, name="insight-precompute", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self.start()
+
+    def busy(self):
+        """True when interactive generations or insight jobs need the model."""
+        return not get_llm_admission().idle() or insight_queue.busy()
+
+    def _loop(self):
+        while not self._stopping.wait(self.app.config["PRECOMPUTE_INTERVAL"]):
+            try:
+                with self.app.app_context():
+                    self.run_once()
+            except Exception as e:
+                self.app.logger.error(f"Insight precompute error: {e}")
+
+    def run_once(self, limit=None):
+        """Warm the best-ranked pairs; returns counts by outcome."""
+        outcomes = {}
+        if self.busy():
+            return outcomes
+        for skill_id, section in self.candidates(limit):
+            if self._stopping.is_set() or self.busy():
+                break
+            outcome = self._warm(skill_id, section)
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            INSIGHT_PRECOMPUTE.inc(outcome=outcome)
+        return outcomes
+
+    def section_demand(self):
+        """The most requested sections, as ``{section: share of requests}``."""
+        config = self.app.config
+        since = datetime.utcnow() - timedelta(days=config["PRECOMPUTE_DEMAND_DAYS"])
+        rows = db.session.execute(
+            select(LLMInsight.section, func.count())
+            .where(
+                LLMInsight.generated_at >= since,
+                LLMInsight.section.is_not(None),
+                LLMInsight.section.not_in(AUTOMATIC_SECTIONS),
+            )
+            .group_by(LLMInsight.section)
+            .order_by(func.count().desc())
+            .limit(config["PRECOMPUTE_SECTIONS"])
+        ).all()
+        if not rows:
+            return {
+                section: 1.0 / len(DEFAULT_SECTIONS) for section in DEFAULT_SECTIONS
+            }
+        total = sum(count for _, count in rows)
+        return {section: count / total for section, count in rows}
+
+    def candidates(self, limit=None):
+        """
+        ``(skill_id, section)`` pairs that are out of date, best first.
+
+        A pair scores its section's share of demand divided by the skill's
+        age in days since it last changed (plus one), so a popular section
+        of a skill edited today ranks first.
+        """
+        config = self.app.config
+        limit = limit or config["PRECOMPUTE_BATCH"]
+        now = datetime.utcnow()
+        since = now - timedelta(days=config["PRECOMPUTE_LOOKBACK_DAYS"])
+
+        scored = []
+        checked = {}
+        for section, share in self.section_demand().items():
+            latest = (
+                select(func.max(LLMInsight.generated_at))
+                .where(LLMInsight.skill_id == Skill.id, LLMInsight.section == section)
+                .scalar_subquery()
+            )
+            rows = db.session.execute(
+                select(Skill.id, Skill.updated_at)
+                .where(
+                    Skill.updated_at >= since,
+                    or_(latest.is_(None), latest < Skill.updated_at),
+                )
+                .order_by(Skill.updated_at.desc())
+                .limit(limit)
+            )
+            for skill_id, updated_at in rows:
+                if self._checked.get((skill_id, section)) == updated_at:
+                    checked[(skill_id, section)] = updated_at
+                    continue
+                age_days = max(0.0, (now - updated_at).total_seconds() / 86400)
+                scored.append((share / (1.0 + age_days), skill_id, section))
+
+        # Deleted skills, skills outside the lookback and pairs answered
+        # since are no longer returned, so their entries go.
+        self._checked = checked
+        scored.sort(reverse=True)
+        return [(skill_id, section) for _, skill_id, section in scored[:limit]]
+
+    def _warm(self, skill_id, section):
+        skill = db.session.get(Skill, skill_id)
+        if skill is None:
+            return "skipped"
+        updated_at = skill.updated_at
+
+        prompt = build_prompt(skill, section)
+        prompt_hash = prompt_fingerprint(prompt)
+        memoized = find_memoized_insight(prompt_hash)
+        if memoized is not None:
+            # Same prompt as before the change (e.g. an older milestone was
+            # edited): just make sure the answer is cached.
+            cache_insight(skill_id, section, memoized.content)
+            self._checked[(skill_id, section)] = updated_at
+            return "memo"
+
+        interrupted = Deadline(None, interrupt=self.busy)
+        try:
+            with get_llm_admission().admit(interrupted, background=True):
+                text = complete_prompt(prompt, GENERATION_PARAMS, interrupted)
+        except Exception as e:
+            self.app.logger.error(
+                f"Precomputing insight {section!r} for skill {skill_id} failed: {e}"
+            )
+            return "failed"
+        if interrupted.expired():
+            return "preempted"
+
+        db.session.add(
+            LLMInsight(
+                skill_id=skill_id,
+                section=section,
+                content=text,
+                prompt_hash=prompt_hash,
+            )
+        )
+        db.session.commit()
+        cache_insight(skill_id, section, text)
+        self._checked[(skill_id, section)] = updated_at
+        return "generated"
+
+
+insight_precomputer = InsightPrecomputer()
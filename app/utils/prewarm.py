@@ -0,0 +1,121 @@
+import threading
+import time
+
+import click
+
+from app.utils.llm_client import LLM_BACKEND, get_llm_backend
+
+
+class ModelPrewarmer:
+    """
+    Load the model in a background thread as soon as the process starts.
+
+    Without it the first insight request loads the GGUF file itself and waits
+    for it. With ``LLM_PREWARM`` (on by default), ``init_app`` starts the load
+    at boot (or, under ``flask run`` and other CLI commands, on the first
+    request, so migrations and imports don't load a model), while the app
+    already serves pages. Requests that need the model meanwhile wait for this
+    one load instead of starting their own.
+
+    ``status()`` reports the model state (``cold``, ``loading``, ``ready`` or
+    ``failed``) and how long the load took; the ``/ready`` endpoint serves it
+    to load balancers, so a restarted worker only takes traffic once warm.
+
+    Args:
+        backend: Backend to warm; defaults to the configured one.
+    """
+
+    def __init__(self, app=None, backend=None):
+        self.app = None
+        self.backend = backend
+        self.state = "cold"
+        self.error = None
+        self.started_at = None
+        self.load_seconds = None
+        self._thread = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("LLM_PREWARM", True)
+
+        self.app = app
+        app.extensions["model_prewarm"] = self
+        if app.config["LLM_PREWARM"]:
+            app.before_request(self._ensure_started)
+            if click.get_current_context(silent=True) is None:
+                self.start()
+
+    @property
+    def enabled(self):
+        return self.app is None or self.app.config["LLM_PREWARM"]
+
+    @property
+    def loads_model(self):
+        """Whether the backend loads its model into this process."""
+        name = self.backend.name if self.backend is not None else LLM_BACKEND
+        return name == "local"
+
+    def start(self):
+        """Start loading in the background; later calls do nothing."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.state = "loading"
+            self.started_at = time.time()
+            self._thread = threading.Thread(
+                target=self._load, name="model-prewarm", daemon=True
+            )
+            self._thread.start()
+
+    def wait(self, timeout=None):
+        """Wait for the load to finish; True once the model is ready."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.state == "ready"
+
+    def ready(self):
+        """
+        True once the model is loaded; backends that don't load one into
+        this process are always ready.
+        """
+        return self.state == "ready" or not self.loads_model
+
+    def status(self):
+        return {
+            "ready": self.ready(),
+            "prewarm": self.enabled,
+            "model": self.state,
+            "backend": self.backend.name if self.backend is not None else None,
+            "started_at": self.started_at,
+            "load_seconds": (
+                round(self.load_seconds, 3) if self.load_seconds is not None else None
+            ),
+            "error": self.error,
+        }
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self.start()
+
+    def _load(self):
+        started = time.monotonic()
+        try:
+            if self.backend is None:
+                self.backend = get_llm_backend()
+            self.backend.warm()
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            if self.app is not None:
+                self.app.logger.error(f"Model prewarm failed: {e}")
+            return
+        finally:
+            self.load_seconds = time.monotonic() - started
+        self.state = "ready"
+        if self.app is not None:
+            self.app.logger.info(f"Model ready in {self.load_seconds:.2f}s")
+
+
+model_prewarmer = ModelPrewarmer()
@@ -0,0 +1,210 @@
+import re
+from datetime import timedelta
+
+from sqlalchemy import (
+    Integer,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
+
+from app import db
+from app.models import Milestone, SkillProgress, SkillProgressBucket
+
+PERIODS = ("day", "week")
+
+# Numeric value of a free-text progress level: its leading integer, else 0.
+# Mirrors SQLite's CAST(... AS INTEGER) so incremental and rebuilt values agree.
+_LEADING_INT = re.compile(r"^\s*([+-]?\d+)")
+
+
+def progress_value(level):
+    match = _LEADING_INT.match(level or "")
+    return int(match.group(1)) if match else 0
+
+
+def bucket_start(timestamp, period):
+    day = timestamp.date()
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _bucket_expr(period):
+    if period == "week":
+        # Monday of the milestone's week, matching bucket_start().
+        return func.date(Milestone.timestamp, "weekday 0", "-6 days")
+    return func.date(Milestone.timestamp)
+
+
+_level_expr = func.coalesce(func.max(cast(Milestone.progress_level, Integer)), 0)
+
+
+def _latest_level_subquery():
+    newest = aliased(Milestone)
+    return (
+        select(newest.progress_level)
+        .where(newest.skill_id == Milestone.skill_id)
+        .order_by(newest.timestamp.desc(), newest.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def record_milestone(milestone):
+    """
+    Fold a newly added milestone into the skill's summary and buckets.
+
+    Runs as atomic upserts in the caller's transaction, so concurrent writers
+    can't lose counts. Edits and deletions use ``refresh_skill_progress``.
+    """
+    level = progress_value(milestone.progress_level)
+
+    stmt = sqlite_insert(SkillProgress).values(
+        skill_id=milestone.skill_id,
+        milestone_count=1,
+        last_timestamp=milestone.timestamp,
+        latest_level=milestone.progress_level,
+        max_level=level,
+    )
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[SkillProgress.skill_id],
+            set_={
+                "milestone_count": SkillProgress.milestone_count + 1,
+                "max_level": func.max(SkillProgress.max_level, level),
+                # SET expressions all see the old row, so this compares against
+                # the previous last_timestamp.
+                "latest_level": case(
+                    (
+                        or_(
+                            SkillProgress.last_timestamp.is_(None),
+                            SkillProgress.last_timestamp
+                            <= stmt.excluded.last_timestamp,
+                        ),
+                        stmt.excluded.latest_level,
+                    ),
+                    else_=SkillProgress.latest_level,
+                ),
+                "last_timestamp": func.max(
+                    func.coalesce(
+                        SkillProgress.last_timestamp, stmt.excluded.last_timestamp
+                    ),
+                    stmt.excluded.last_timestamp,
+                ),
+            },
+        )
+    )
+
+    for period in PERIODS:
+        stmt = sqlite_insert(SkillProgressBucket).values(
+            skill_id=milestone.skill_id,
+            period=period,
+            bucket_start=bucket_start(milestone.timestamp, period),
+            milestone_count=1,
+            max_level=level,
+            last_timestamp=milestone.timestamp,
+        )
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    SkillProgressBucket.skill_id,
+                    SkillProgressBucket.period,
+                    SkillProgressBucket.bucket_start,
+                ],
+                set_={
+                    "milestone_count": SkillProgressBucket.milestone_count + 1,
+                    "max_level": func.max(SkillProgressBucket.max_level, level),
+                    "last_timestamp": func.max(
+                        func.coalesce(
+                            SkillProgressBucket.last_timestamp,
+                            stmt.excluded.last_timestamp,
+                        ),
+                        stmt.excluded.last_timestamp,
+                    ),
+                },
+            )
+        )
+
+
+def rebuild_progress(skill_ids=None):
+    """
+    Recompute summaries and buckets from the milestones table with set-based
+    INSERT ... SELECT statements, for the given skills or for every skill.
+    """
+    db.session.flush()
+
+    def scoped(stmt, column):
+        return stmt.where(column.in_(skill_ids)) if skill_ids is not None else stmt
+
+    db.session.execute(
+        scoped(delete(SkillProgressBucket), SkillProgressBucket.skill_id),
+        execution_options={"synchronize_session": False},
+    )
+    db.session.execute(
+        scoped(delete(SkillProgress), SkillProgress.skill_id),
+        execution_options={"synchronize_session": False},
+    )
+
+    latest = _latest_level_subquery()
+    db.session.execute(
+        insert(SkillProgress).from_select(
+            [
+                "skill_id",
+                "milestone_count",
+                "last_timestamp",
+                "latest_level",
+                "max_level",
+            ],
+            scoped(
+                select(
+                    Milestone.skill_id,
+                    func.count(Milestone.id),
+                    func.max(Milestone.timestamp),
+                    latest,
+                    _level_expr,
+                ),
+                Milestone.skill_id,
+            ).group_by(Milestone.skill_id),
+        )
+    )
+
+    for period in PERIODS:
+        bucket = _bucket_expr(period)
+        db.session.execute(
+            insert(SkillProgressBucket).from_select(
+                [
+                    "skill_id",
+                    "period",
+                    "bucket_start",
+                    "milestone_count",
+                    "max_level",
+                    "last_timestamp",
+                ],
+                scoped(
+                    select(
+                        Milestone.skill_id,
+                        literal(period),
+                        bucket,
+                        func.count(Milestone.id),
+                        _level_expr,
+                        func.max(Milestone.timestamp),
+                    ),
+                    Milestone.skill_id,
+                ).group_by(Milestone.skill_id, bucket),
+            )
+        )
+
+    db.session.expire_all()
+
+
+def refresh_skill_progress(skill_id):
+    """Recompute one skill's aggregates after a milestone edit or delete."""
+    rebuild_progress([skill_id])
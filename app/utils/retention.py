@@ -0,0 +1,239 @@
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, or_, select, text, update
+
+from app import db
+from app.models import InsightDictionary, LLMInsight
+from app.utils.compression import (
+    add_dictionary,
+    compressed_size,
+    header,
+    train_dictionary,
+)
+from app.utils.insight_cache import invalidate_skill_insights
+from app.utils.metrics import INSIGHT_COMPACTION
+
+# Section -> policy. "keep" is how many of the newest insights to keep per
+# skill for that section, "max_age_days" drops anything older; either may be
+# None. "*" covers every section not listed.
+DEFAULT_RETENTION = {"*": {"keep": 10, "max_age_days": None}}
+DEFAULT_SECTION = "*"
+
+
+class InsightCompactor:
+    """
+    Apply the insight retention policies and compress stored insight bodies.
+
+    Every skill creation, milestone and uncached insight request appends an
+    insight, so without this the table only grows. A pass deletes, in
+    batches of ``INSIGHT_COMPACT_BATCH``, the rows each section's policy in
+    ``INSIGHT_RETENTION`` no longer keeps, then rewrites rows still stored as
+    plain text (or against an older dictionary) in the current compressed
+    format.
+
+    Run it with ``flask insights compact``, or every
+    ``INSIGHT_COMPACT_INTERVAL`` seconds in a background thread (off by
+    default; with several web processes, enable it in one).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("INSIGHT_RETENTION", DEFAULT_RETENTION)
+        app.config.setdefault("INSIGHT_COMPACT_INTERVAL", 0)
+        app.config.setdefault("INSIGHT_COMPACT_BATCH", 500)
+
+        self.app = app
+        app.extensions["insight_compaction"] = self
+        if app.config["INSIGHT_COMPACT_INTERVAL"]:
+            app.before_request(self._ensure_started)
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._loop, name="insight-compaction", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self.start()
+
+    def _loop(self):
+        while not self._stopping.wait(self.app.config["INSIGHT_COMPACT_INTERVAL"]):
+            try:
+                with self.app.app_context():
+                    self.run_once()
+            except Exception as e:
+                self.app.logger.error(f"Insight compaction error: {e}")
+
+    def run_once(self, dry_run=False):
+        """
+        One pass; returns the number of rows deleted and compressed (with
+        ``dry_run``, that would be).
+        """
+        deleted = self.apply_retention(dry_run)
+        compressed = self.compress_pending(dry_run)
+        if not dry_run:
+            INSIGHT_COMPACTION.inc(deleted, action="deleted")
+            INSIGHT_COMPACTION.inc(compressed, action="compressed")
+        return {"deleted": deleted, "compressed": compressed}
+
+    def policies(self):
+        """``(section, keep, max_age_days)`` for each policy that removes anything."""
+        policies = []
+        for section, policy in self.app.config["INSIGHT_RETENTION"].items():
+            keep = policy.get("keep")
+            max_age = policy.get("max_age_days")
+            if keep is not None and keep < 1:
+                raise ValueError(f"retention 'keep' for {section!r} must be at least 1")
+            if keep is not None or max_age is not None:
+                policies.append((section, keep, max_age))
+        return policies
+
+    def expired(self, section, keep, max_age_days):
+        """
+        Rows the policy no longer keeps, as ``(id, skill_id, section, newest)``
+        where ``newest`` marks the latest insight of its skill and section.
+        """
+        named = [
+            s for s in self.app.config["INSIGHT_RETENTION"] if s != DEFAULT_SECTION
+        ]
+        if section == DEFAULT_SECTION:
+            scope = or_(LLMInsight.section.is_(None), LLMInsight.section.not_in(named))
+        else:
+            scope = LLMInsight.section == section
+
+        rank = (
+            func.row_number()
+            .over(
+                partition_by=(LLMInsight.skill_id, LLMInsight.section),
+                order_by=(LLMInsight.generated_at.desc(), LLMInsight.id.desc()),
+            )
+            .label("rank")
+        )
+        ranked = (
+            select(
+                LLMInsight.id,
+                LLMInsight.skill_id,
+                LLMInsight.section,
+                LLMInsight.generated_at,
+                rank,
+            )
+            .where(scope)
+            .subquery()
+        )
+        conditions = []
+        if keep is not None:
+            conditions.append(ranked.c.rank > keep)
+        if max_age_days is not None:
+            cutoff = datetime.utcnow() - timedelta(days=max_age_days)
+            conditions.append(ranked.c.generated_at < cutoff)
+        return select(
+            ranked.c.id,
+            ranked.c.skill_id,
+            ranked.c.section,
+            (ranked.c.rank == 1).label("newest"),
+        ).where(or_(*conditions))
+
+    def apply_retention(self, dry_run=False):
+        batch = self.app.config["INSIGHT_COMPACT_BATCH"]
+        total = 0
+        for section, keep, max_age_days in self.policies():
+            rows = db.session.execute(self.expired(section, keep, max_age_days)).all()
+            if dry_run:
+                total += len(rows)
+                continue
+            for start in range(0, len(rows), batch):
+                if self._stopping.is_set():
+                    return total
+                chunk = rows[start : start + batch]
+                db.session.execute(
+                    delete(LLMInsight).where(LLMInsight.id.in_([r.id for r in chunk]))
+                )
+                db.session.commit()
+                total += len(chunk)
+                # A pair's cached answer is its newest row.
+                for row in chunk:
+                    if row.newest:
+                        invalidate_skill_insights(row.skill_id, row.section)
+        return total
+
+    def compress_pending(self, dry_run=False):
+        """Rewrite rows not yet in the current compressed format; returns how many."""
+        batch = self.app.config["INSIGHT_COMPACT_BATCH"]
+        # SQL functions see the stored value: TEXT, or a BLOB with a header.
+        outdated = or_(
+            func.typeof(LLMInsight.content) == "text",
+            func.substr(LLMInsight.content, 1, len(header())) != header(),
+        )
+        if dry_run:
+            return db.session.scalar(select(func.count(LLMInsight.id)).where(outdated))
+
+        total, after = 0, 0
+        while not self._stopping.is_set():
+            rows = db.session.execute(
+                select(LLMInsight.id, LLMInsight.content)
+                .where(LLMInsight.id > after, outdated)
+                .order_by(LLMInsight.id)
+                .limit(batch)
+            ).all()
+            if not rows:
+                break
+            db.session.execute(
+                update(LLMInsight),
+                [{"id": id_, "content": content} for id_, content in rows],
+            )
+            db.session.commit()
+            total += len(rows)
+            after = rows[-1].id
+        return total
+
+    def train(self, samples=2000):
+        """
+        Train a dictionary on the newest ``samples`` insights and make it the
+        current one. Returns ``(dictionary, bytes without, bytes with it)``
+        for the sample; rows written before keep their dictionary until the
+        next compaction.
+        """
+        texts = db.session.scalars(
+            select(LLMInsight.content).order_by(LLMInsight.id.desc()).limit(samples)
+        ).all()
+        data = train_dictionary(texts)
+        if not data:
+            raise ValueError("Not enough insights to train a dictionary.")
+        dictionary = InsightDictionary(data=data, samples=len(texts))
+        db.session.add(dictionary)
+        db.session.commit()
+        add_dictionary(dictionary.id, dictionary.data)
+        return dictionary, compressed_size(texts), compressed_size(texts, data)
+
+    def vacuum(self):
+        """Merge the search index and give the freed pages back to the filesystem."""
+        db.session.execute(
+            text("INSERT INTO llm_insights_fts(llm_insights_fts) VALUES ('optimize')")
+        )
+        db.session.commit()
+        with db.engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+            connection.exec_driver_sql("VACUUM")
+
+
+insight_compactor = InsightCompactor()
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models import Milestone, Skill
+
+RULES = {}
+
+
+class Rule:
+    """
+    A dashboard rule evaluated as a single SQL statement.
+
+    Subclasses set ``name``, build the statement in ``query`` and turn each
+    result row into a message in ``message``. Register them with
+    ``@register_rule`` so ``evaluate_rules`` picks them up.
+    """
+
+    name = None
+
+    def query(self, now):
+        raise NotImplementedError
+
+    def message(self, row):
+        raise NotImplementedError
+
+
+def register_rule(cls):
+    RULES[cls.name] = cls()
+    return cls
+
+
+def evaluate_rules(now=None, names=None):
+    """
+    Run the registered rules (or only ``names``) and collect their messages.
+
+    Each rule issues exactly one query, so the cost is fixed by the number of
+    rules rather than the number of skills or milestones.
+    """
+    now = now or datetime.utcnow()
+    messages = []
+    for name, rule in RULES.items():
+        if names is not None and name not in names:
+            continue
+        for row in db.session.execute(rule.query(now)):
+            messages.append(rule.message(row))
+    return messages
+
+
+@register_rule
+class StaleSkillRule(Rule):
+    name = "stale_skills"
+
+    def query(self, now):
+        return (
+            select(Skill.name)
+            .where(Skill.updated_at < now - timedelta(days=14))
+            .order_by(Skill.id)
+        )
+
+    def message(self, row):
+        return f'You haven’t updated skill "{row.name}" in over 2 weeks.'
+
+
+@register_rule
+class SkillWithoutMilestonesRule(Rule):
+    name = "skills_without_milestones"
+
+    def query(self, now):
+        return (
+            select(Skill.name)
+            .outerjoin(Milestone, Milestone.skill_id == Skill.id)
+            .where(Milestone.id.is_(None))
+            .order_by(Skill.id)
+        )
+
+    def message(self, row):
+        return f'Skill "{row.name}" has no milestones logged yet.'
+
+
+@register_rule
+class OldMilestonesRule(Rule):
+    name = "old_milestones"
+
+    def query(self, now):
+        return (
+            select(
+                Skill.name,
+                func.count(Milestone.id).label("count"),
+                func.min(Milestone.timestamp).label("oldest"),
+            )
+            .join(Milestone, Milestone.skill_id == Skill.id)
+            .where(Milestone.timestamp < now - timedelta(days=30))
+            .group_by(Skill.id, Skill.name)
+            .order_by(Skill.id)
+        )
+
+    def message(self, row):
+        if row.count == 1:
+            return (
+                f"Milestone from {row.oldest.date()} on skill "
+                f'"{row.name}" is over 1 month old.'
+            )
+        return (
+            f'{row.count} milestones on skill "{row.name}" are over 1 month old '
+            f"(oldest from {row.oldest.date()})."
+        )
@@ -0,0 +1,214 @@
+import base64
+import json
+
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, event, text
+
+from app import db
+from app.models import LLMInsight, Milestone
+
+# External-content FTS5 indexes over milestone notes and insight bodies. The
+# triggers keep them in sync with every write, including bulk and raw SQL
+# ones that bypass the ORM.
+FTS_DDL = {
+    Milestone.__table__: [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS milestones_fts USING fts5("
+        "note, content='milestones', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS milestones_fts_ai AFTER INSERT ON milestones BEGIN "
+        "INSERT INTO milestones_fts(rowid, note) VALUES (new.id, new.note); END",
+        "CREATE TRIGGER IF NOT EXISTS milestones_fts_ad AFTER DELETE ON milestones BEGIN "
+        "INSERT INTO milestones_fts(milestones_fts, rowid, note) "
+        "VALUES ('delete', old.id, old.note); END",
+        "CREATE TRIGGER IF NOT EXISTS milestones_fts_au AFTER UPDATE OF note ON milestones "
+        "BEGIN "
+        "INSERT INTO milestones_fts(milestones_fts, rowid, note) "
+        "VALUES ('delete', old.id, old.note); "
+        "INSERT INTO milestones_fts(rowid, note) VALUES (new.id, new.note); END",
+    ],
+    # Insight bodies are stored compressed, so the index reads them through
+    # a view that inflates them with insight_text() (app.utils.compression).
+    LLMInsight.__table__: [
+        "CREATE VIEW IF NOT EXISTS llm_insights_text AS "
+        "SELECT id, insight_text(content) AS content FROM llm_insights",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS llm_insights_fts USING fts5("
+        "content, content='llm_insights_text', content_rowid='id', "
+        "tokenize='porter unicode61')",
+        "CREATE TRIGGER IF NOT EXISTS llm_insights_fts_ai AFTER INSERT ON llm_insights "
+        "BEGIN "
+        "INSERT INTO llm_insights_fts(rowid, content) "
+        "VALUES (new.id, insight_text(new.content)); END",
+        "CREATE TRIGGER IF NOT EXISTS llm_insights_fts_ad AFTER DELETE ON llm_insights "
+        "BEGIN "
+        "INSERT INTO llm_insights_fts(llm_insights_fts, rowid, content) "
+        "VALUES ('delete', old.id, insight_text(old.content)); END",
+        # Recompressing a row leaves its text, and so the index, unchanged.
+        "CREATE TRIGGER IF NOT EXISTS llm_insights_fts_au "
+        "AFTER UPDATE OF content ON llm_insights "
+        "WHEN insight_text(old.content) IS NOT insight_text(new.content) BEGIN "
+        "INSERT INTO llm_insights_fts(llm_insights_fts, rowid, content) "
+        "VALUES ('delete', old.id, insight_text(old.content)); "
+        "INSERT INTO llm_insights_fts(rowid, content) "
+        "VALUES (new.id, insight_text(new.content)); END",
+    ],
+}
+
+for _table, _statements in FTS_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            _table, "after_create", DDL(_statement).execute_if(dialect="sqlite")
+        )
+
+# Snippet delimiters that can't appear in escaped HTML; swapped for <mark>
+# after the surrounding text has been escaped.
+_HIT_START = "\x02"
+_HIT_END = "\x03"
+
+# Each index is ranked on its own and only the top ``:limit`` candidates past
+# the cursor leave it, so bm25() is the only per-match cost; snippet() runs
+# for the final page alone. bm25 scores aren't comparable across indexes, so
+# each is divided by its index's best score for the query before merging:
+# ``rank`` runs from -1 (that index's best match) towards 0. Pages are keyed
+# on ``(rank, kind, id)`` rather than OFFSET.
+SEARCH_SQL = f"""
+WITH
+milestone_norm AS (
+    SELECT max(-rank, 1e-9) AS norm FROM milestones_fts
+    WHERE milestones_fts MATCH :query AND :milestones
+    ORDER BY rank LIMIT 1
+),
+insight_norm AS (
+    SELECT max(-rank, 1e-9) AS norm FROM llm_insights_fts
+    WHERE llm_insights_fts MATCH :query AND :insights
+    ORDER BY rank LIMIT 1
+),
+hits AS MATERIALIZED (
+    SELECT * FROM (
+        SELECT 'milestone' AS kind, milestones_fts.rowid AS id,
+               milestones_fts.rank / n.norm AS rank
+        FROM milestones_fts, milestone_norm n
+        WHERE milestones_fts MATCH :query
+          AND (:after_rank IS NULL
+               OR (milestones_fts.rank / n.norm, 'milestone', milestones_fts.rowid)
+                  > (:after_rank, :after_kind, :after_id))
+        ORDER BY milestones_fts.rank, milestones_fts.rowid LIMIT :limit
+    )
+    UNION ALL
+    SELECT * FROM (
+        SELECT 'insight', llm_insights_fts.rowid, llm_insights_fts.rank / n.norm
+        FROM llm_insights_fts, insight_norm n
+        WHERE llm_insights_fts MATCH :query
+          AND (:after_rank IS NULL
+               OR (llm_insights_fts.rank / n.norm, 'insight', llm_insights_fts.rowid)
+                  > (:after_rank, :after_kind, :after_id))
+        ORDER BY llm_insights_fts.rank, llm_insights_fts.rowid LIMIT :limit
+    )
+    ORDER BY rank, kind, id
+    LIMIT :limit
+)
+SELECT h.kind AS kind, h.id AS id, m.skill_id AS skill_id, s.name AS skill_name,
+       NULL AS section, m.timestamp AS at,
+       snippet(milestones_fts, 0, '{_HIT_START}', '{_HIT_END}', '…', 16) AS snippet,
+       h.rank AS rank
+FROM hits h
+JOIN milestones_fts ON milestones_fts.rowid = h.id
+JOIN milestones m ON m.id = h.id
+JOIN skills s ON s.id = m.skill_id
+WHERE h.kind = 'milestone' AND milestones_fts MATCH :query
+UNION ALL
+SELECT h.kind, h.id, i.skill_id, s.name, i.section, i.generated_at,
+       snippet(llm_insights_fts, 0, '{_HIT_START}', '{_HIT_END}', '…', 16),
+       h.rank
+FROM hits h
+JOIN llm_insights_fts ON llm_insights_fts.rowid = h.id
+JOIN llm_insights i ON i.id = h.id
+JOIN skills s ON s.id = i.skill_id
+WHERE h.kind = 'insight' AND llm_insights_fts MATCH :query
+ORDER BY rank, kind, id
+"""
+
+KINDS = ("milestone", "insight")
+
+
+def to_match_query(user_query):
+    """
+    Turn free text into a safe FTS5 query: every word becomes a quoted phrase
+    (all must match) and the last one also matches as a prefix.
+    """
+    terms = [t.replace('"', '""') for t in user_query.split() if t.strip('"')]
+    if not terms:
+        return None
+    phrases = [f'"{t}"' for t in terms]
+    phrases[-1] += "*"
+    return " ".join(phrases)
+
+
+def highlight(snippet):
+    return Markup(
+        str(escape(snippet or ""))
+        .replace(_HIT_START, "<mark>")
+        .replace(_HIT_END, "</mark>")
+    )
+
+
+def encode_cursor(rank, kind, row_id):
+    payload = json.dumps([rank, kind, row_id])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Return ``(rank, kind, id)`` from a cursor, raising ValueError if malformed."""
+    try:
+        rank, kind, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if kind not in KINDS:
+            raise ValueError(kind)
+        return float(rank), kind, int(row_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+
+
+def search(user_query, kind=None, cursor=None, per_page=20):
+    """
+    Ranked full-text search over milestone notes and insight texts.
+
+    Returns ``(results, next_cursor)`` where each result is a dict with the
+    matching row's kind, ids, skill name, timestamp and highlighted snippet,
+    and ``next_cursor`` is None on the last page. Raises ValueError for a
+    malformed ``cursor``.
+    """
+    match = to_match_query(user_query or "")
+    if match is None:
+        return [], None
+
+    after = decode_cursor(cursor) if cursor else (None, None, None)
+    rows = db.session.execute(
+        text(SEARCH_SQL),
+        {
+            "query": match,
+            "milestones": kind in (None, "milestone"),
+            "insights": kind in (None, "insight"),
+            "limit": per_page + 1,
+            "after_rank": after[0],
+            "after_kind": after[1],
+            "after_id": after[2],
+        },
+    ).mappings()
+
+    results = [
+        {
+            "kind": row["kind"],
+            "id": row["id"],
+            "skill_id": row["skill_id"],
+            "skill_name": row["skill_name"],
+            "section": row["section"],
+            "at": row["at"],
+            "snippet": highlight(row["snippet"]),
+            "rank": row["rank"],
+        }
+        for row in rows
+    ]
+    next_cursor = None
+    if len(results) > per_page:
+        results = results[:per_page]
+        last = results[-1]
+        next_cursor = encode_cursor(last["rank"], last["kind"], last["id"])
+    return results, next_cursor
@@ -0,0 +1,122 @@
+from datetime import date
+from typing import NamedTuple
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models import SkillProgressBucket
+
+BUCKETS = ("day", "week", "month")
+MIN_POINTS = 3
+MAX_POINTS = 5000
+
+
+class ProgressSeries(NamedTuple):
+    dates: list
+    levels: list
+    counts: list
+    total_buckets: int
+
+
+def _bucket_rows(skill_id, bucket):
+    if bucket == "month":
+        # Rolled up from the day buckets; months aren't stored.
+        month = func.strftime("%Y-%m-01", SkillProgressBucket.bucket_start)
+        stmt = (
+            select(
+                month,
+                func.max(SkillProgressBucket.max_level),
+                func.sum(SkillProgressBucket.milestone_count),
+            )
+            .where(
+                SkillProgressBucket.skill_id == skill_id,
+                SkillProgressBucket.period == "day",
+            )
+            .group_by(month)
+            .order_by(month)
+        )
+        return [
+            (date.fromisoformat(start), level, count)
+            for start, level, count in db.session.execute(stmt)
+        ]
+
+    stmt = (
+        select(
+            SkillProgressBucket.bucket_start,
+            SkillProgressBucket.max_level,
+            SkillProgressBucket.milestone_count,
+        )
+        .where(
+            SkillProgressBucket.skill_id == skill_id,
+            SkillProgressBucket.period == bucket,
+        )
+        .order_by(SkillProgressBucket.bucket_start)
+    )
+    return db.session.execute(stmt).all()
+
+
+def lttb(xs, ys, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of at most ``threshold`` points that keep the visual
+    shape of the series: the first and last points, plus from each of
+    ``threshold - 2`` equal buckets the point forming the largest triangle
+    with the previously kept point and the average of the next bucket.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < MIN_POINTS:
+        return list(range(n))
+
+    every = (n - 2) / (threshold - 2)
+    kept = [0]
+    previous = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(xs[end:next_end]) / (next_end - end)
+        avg_y = sum(ys[end:next_end]) / (next_end - end)
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs(
+                (xs[previous] - avg_x) * (ys[j] - ys[previous])
+                - (xs[previous] - xs[j]) * (avg_y - ys[previous])
+            )
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        previous = best
+    kept.append(n - 1)
+    return kept
+
+
+def progress_series(skill_id, bucket="day", points=None):
+    """
+    A skill's progress as parallel lists of bucket start dates, highest level
+    and milestone count per bucket, read from the pre-aggregated buckets.
+
+    With ``points``, longer series are downsampled with LTTB on the levels.
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of: {', '.join(BUCKETS)}")
+    if points is not None and not MIN_POINTS <= points <= MAX_POINTS:
+        raise ValueError(f"points must be between {MIN_POINTS} and {MAX_POINTS}")
+
+    rows = _bucket_rows(skill_id, bucket)
+    total = len(rows)
+    if points is not None and total > points:
+        keep = lttb(
+            [start.toordinal() for start, _, _ in rows],
+            [level for _, level, _ in rows],
+            points,
+        )
+        rows = [rows[i] for i in keep]
+
+    return ProgressSeries(
+        dates=[start.isoformat() for start, _, _ in rows],
+        levels=[level for _, level, _ in rows],
+        counts=[count for _, _, count in rows],
+        total_buckets=total,
+    )
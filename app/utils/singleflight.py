@@ -0,0 +1,105 @@
+import threading
+
+
+class FlightCancelled(RuntimeError):
+    """The leader of a flight stopped without a result (e.g. its client left)."""
+
+
+class FlightTimeout(RuntimeError):
+    """A follower gave up waiting for the leader's result."""
+
+
+class Flight:
+    """
+    One in-flight computation. The leader ends it with ``resolve`` or
+    ``fail``; followers wait for that with ``wait`` / ``result``.
+    """
+
+    def __init__(self, group, key):
+        self._group = group
+        self._key = key
+        self._done = threading.Event()
+        self.value = None
+        self.error = None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def resolve(self, value):
+        self.value = value
+        self._finish()
+
+    def fail(self, error):
+        self.error = error
+        self._finish()
+
+    def wait(self, timeout=None) -> bool:
+        """Wait up to ``timeout`` seconds; True once the flight has ended."""
+        if self.done:
+            return True
+        with self._group._lock:
+            self._group._waiting += 1
+        try:
+            return self._done.wait(timeout)
+        finally:
+            with self._group._lock:
+                self._group._waiting -= 1
+
+    def result(self, timeout=None):
+        """The leader's result, or its exception raised here too."""
+        if not self.wait(timeout):
+            raise FlightTimeout(f"no result for {self._key!r} after {timeout}s")
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def _finish(self):
+        if not self.done:
+            self._group._forget(self._key, self)
+            self._done.set()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one.
+
+    The first caller for a key becomes the flight's leader and does the work;
+    callers arriving before it finishes become followers and get the same
+    result (or exception) instead of repeating the work. Once the flight
+    ends the key is free again, so later callers start a new one; results
+    are not cached here.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        # Followers blocked in wait()/result() right now.
+        self._waiting = 0
+        self.leaders = 0
+        self.followers = 0
+
+    def begin(self, key):
+        """Return ``(flight, leader)``: the leader must resolve or fail the flight."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.followers += 1
+                return flight, False
+            flight = self._flights[key] = Flight(self, key)
+            self.leaders += 1
+            return flight, True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "waiting": self._waiting,
+                "leaders": self.leaders,
+                "coalesced": self.followers,
+            }
+
+    def _forget(self, key, flight):
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
@@ -0,0 +1,290 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from flask_caching.backends.base import BaseCache
+
+
+class SQLiteCache(BaseCache):
+    """
+    A Flask-Caching backend stored in a SQLite file shared by all processes.
+
+    Entries are bounded by count and by total pickled size; when either budget
+    is exceeded, expired and then least recently used entries are evicted.
+    Triggers keep the entry count and total size in a one-row table, so
+    checking the budgets costs one lookup per write. Each entry can carry tags
+    so a whole group (e.g. every insight of one skill) can be dropped with
+    ``delete_tag``. Hit/miss counters are kept per process.
+
+    Args:
+        path: Location of the cache database file.
+        max_entries: Maximum number of entries (0 for no limit).
+        max_bytes: Maximum total size of stored values (0 for no limit).
+        default_timeout: Default entry lifetime in seconds (0 never expires).
+    """
+
+    # Reading an entry refreshes its LRU position at most this often, so hot
+    # keys don't turn every read into a write.
+    TOUCH_INTERVAL = 1.0
+    # Expired entries nobody reads again are swept at most this often (per
+    # process) while the cache is within its budgets.
+    PURGE_INTERVAL = 60.0
+
+    def __init__(self, path, max_entries=10000, max_bytes=64 * 1024 * 1024, **kw):
+        super().__init__(default_timeout=kw.get("default_timeout", 300))
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._next_purge = 0.0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript("""
+                BEGIN IMMEDIATE;
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at
+                    ON cache_entries (accessed_at);
+                CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at
+                    ON cache_entries (expires_at);
+                CREATE TABLE IF NOT EXISTS cache_tags (
+                    tag TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (tag, key)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS ix_cache_tags_key ON cache_tags (key);
+                CREATE TABLE IF NOT EXISTS cache_stats (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    entries INTEGER NOT NULL,
+                    bytes INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO cache_stats (id, entries, bytes)
+                    SELECT 1, COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries;
+                CREATE TRIGGER IF NOT EXISTS cache_entries_ai
+                AFTER INSERT ON cache_entries BEGIN
+                    UPDATE cache_stats
+                    SET entries = entries + 1, bytes = bytes + new.size;
+                END;
+                CREATE TRIGGER IF NOT EXISTS cache_entries_ad
+                AFTER DELETE ON cache_entries BEGIN
+                    UPDATE cache_stats
+                    SET entries = entries - 1, bytes = bytes - old.size;
+                END;
+                CREATE TRIGGER IF NOT EXISTS cache_entries_au
+                AFTER UPDATE OF size ON cache_entries BEGIN
+                    UPDATE cache_stats SET bytes = bytes - old.size + new.size;
+                END;
+                COMMIT;
+                """)
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(
+            max_entries=config.get("CACHE_MAX_ENTRIES", 10000),
+            max_bytes=config.get("CACHE_MAX_BYTES", 64 * 1024 * 1024),
+        )
+        path = config.get("CACHE_SQLITE_PATH") or os.path.join(
+            app.instance_path, "cache.sqlite3"
+        )
+        return cls(path, *args, **kwargs)
+
+    def _conn(self):
+        # One connection per thread, re-opened after a fork.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _expires_at(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return time.time() + timeout if timeout > 0 else None
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        now = time.time()
+        row = (
+            self._conn()
+            .execute(
+                "SELECT value, expires_at, accessed_at FROM cache_entries WHERE key = ?",
+                (key,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            self._count(False)
+            return None
+
+        value, expires_at, accessed_at = row
+        if expires_at is not None and expires_at <= now:
+            self.delete(key)
+            self._count(False)
+            return None
+
+        if now - accessed_at > self.TOUCH_INTERVAL:
+            self._conn().execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        self._count(True)
+        return pickle.loads(value)
+
+    def has(self, key):
+        row = (
+            self._conn()
+            .execute("SELECT expires_at FROM cache_entries WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row is not None and (row[0] is None or row[0] > time.time())
+
+    def set(self, key, value, timeout=None, tags=()):
+        return self._store(key, value, timeout, tags, replace=True)
+
+    def add(self, key, value, timeout=None, tags=()):
+        return self._store(key, value, timeout, tags, replace=False)
+
+    def _store(self, key, value, timeout, tags, replace):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if not replace and self.has(key):
+                return False
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete
+            # wouldn't fire the counter triggers.
+            conn.execute(
+                "INSERT INTO cache_entries"
+                " (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = excluded.value,"
+                " size = excluded.size, expires_at = excluded.expires_at,"
+                " accessed_at = excluded.accessed_at",
+                (key, data, len(data), self._expires_at(timeout), now),
+            )
+            conn.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in tags],
+            )
+            self._evict(conn, now)
+        return True
+
+    def _usage(self, conn):
+        return conn.execute("SELECT entries, bytes FROM cache_stats").fetchone()
+
+    def _over_budget(self, count, total):
+        return (self.max_entries and count > self.max_entries) or (
+            self.max_bytes and total > self.max_bytes
+        )
+
+    def _evict(self, conn, now):
+        count, total = self._usage(conn)
+        over = self._over_budget(count, total)
+        if not over and now < self._next_purge:
+            return
+
+        self._next_purge = now + self.PURGE_INTERVAL
+        expired = conn.execute(
+            "SELECT key FROM cache_entries WHERE expires_at <= ?", (now,)
+        ).fetchall()
+        conn.executemany("DELETE FROM cache_entries WHERE key = ?", expired)
+        conn.executemany("DELETE FROM cache_tags WHERE key = ?", expired)
+        if not over:
+            return
+        count, total = self._usage(conn)
+
+        evicted = 0
+        while self._over_budget(count, total):
+            batch = count - self.max_entries if self.max_entries else 0
+            if self.max_bytes and total > self.max_bytes:
+                # Over the size budget: drop the oldest tenth at a time.
+                batch = max(batch, count // 10)
+            rows = conn.execute(
+                "SELECT key, size FROM cache_entries ORDER BY accessed_at LIMIT ?",
+                (max(1, batch),),
+            ).fetchall()
+            if not rows:
+                break
+            conn.executemany(
+                "DELETE FROM cache_entries WHERE key = ?", [(k,) for k, _ in rows]
+            )
+            conn.executemany(
+                "DELETE FROM cache_tags WHERE key = ?", [(k,) for k, _ in rows]
+            )
+            count -= len(rows)
+            total -= sum(size for _, size in rows)
+            evicted += len(rows)
+
+        if evicted:
+            with self._stats_lock:
+                self.evictions += evicted
+
+    def delete(self, key):
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            conn.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+        return cur.rowcount > 0
+
+    def delete_tag(self, tag):
+        """Delete every entry stored with ``tag``. Returns how many were removed."""
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.execute(
+                "DELETE FROM cache_entries WHERE key IN"
+                " (SELECT key FROM cache_tags WHERE tag = ?)",
+                (tag,),
+            )
+            conn.execute(
+                "DELETE FROM cache_tags WHERE key IN"
+                " (SELECT key FROM cache_tags WHERE tag = ?)",
+                (tag,),
+            )
+        return cur.rowcount
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_entries")
+            conn.execute("DELETE FROM cache_tags")
+        return True
+
+    def stats(self):
+        count, total = self._usage(self._conn())
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": count,
+                "bytes": int(total),
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
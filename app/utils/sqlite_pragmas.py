@@ -0,0 +1,218 @@
+import threading
+import time
+from collections import deque
+
+from flask import current_app
+from sqlalchemy import event
+
+from app import db
+from app.utils.metrics import registry
+
+# Connection profile applied to every new SQLite connection. Any of these can
+# be overridden in the app config; None leaves SQLite's own default.
+SQLITE_DEFAULTS = {
+    # Readers keep reading from a snapshot while a write is in progress.
+    "SQLITE_JOURNAL_MODE": "WAL",
+    # Safe with WAL: a power loss can drop the last commits, never corrupt.
+    "SQLITE_SYNCHRONOUS": "NORMAL",
+    "SQLITE_MMAP_SIZE": 256 * 1024 * 1024,
+    # Negative values are KiB, i.e. 64 MiB of page cache per connection.
+    "SQLITE_CACHE_SIZE": -64 * 1024,
+    # How long a writer waits for another process' write lock (ms).
+    "SQLITE_BUSY_TIMEOUT": 5000,
+    "SQLITE_POOL_SIZE": 10,
+    "SQLITE_MAX_OVERFLOW": 20,
+    "SQLITE_POOL_TIMEOUT": 30,
+    # Queue the app's own writers in-process instead of having them retry
+    # against SQLite's busy handler.
+    "SQLITE_WRITE_QUEUE": True,
+}
+
+
+def _is_sqlite_file(uri):
+    return uri.startswith("sqlite") and ":memory:" not in uri and uri != "sqlite://"
+
+
+def configure_sqlite(app):
+    """
+    Fill in the SQLite profile defaults and the engine's pool options.
+
+    Must run before ``db.init_app`` creates the engine.
+    """
+    for key, value in SQLITE_DEFAULTS.items():
+        app.config.setdefault(key, value)
+
+    if _is_sqlite_file(app.config.get("SQLALCHEMY_DATABASE_URI", "")):
+        options = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+        options.setdefault("pool_size", app.config["SQLITE_POOL_SIZE"])
+        options.setdefault("max_overflow", app.config["SQLITE_MAX_OVERFLOW"])
+        options.setdefault("pool_timeout", app.config["SQLITE_POOL_TIMEOUT"])
+        connect_args = options.setdefault("connect_args", {})
+        if app.config["SQLITE_BUSY_TIMEOUT"] is not None:
+            connect_args.setdefault("timeout", app.config["SQLITE_BUSY_TIMEOUT"] / 1000)
+
+
+def _pragma_statements(config):
+    pragmas = [
+        ("journal_mode", config["SQLITE_JOURNAL_MODE"]),
+        ("synchronous", config["SQLITE_SYNCHRONOUS"]),
+        ("mmap_size", config["SQLITE_MMAP_SIZE"]),
+        ("cache_size", config["SQLITE_CACHE_SIZE"]),
+        ("busy_timeout", config["SQLITE_BUSY_TIMEOUT"]),
+    ]
+    # SQLite ignores FOREIGN KEY clauses (and ON DELETE CASCADE) unless this is
+    # switched on, per connection.
+    statements = ["PRAGMA foreign_keys=ON"]
+    statements += [
+        f"PRAGMA {name}={value}" for name, value in pragmas if value is not None
+    ]
+    return statements
+
+
+class WriterQueue:
+    """
+    First-come, first-served lock for the process' write transactions.
+
+    SQLite allows one writer at a time. Left alone, concurrent writers all
+    poll the busy handler with backoff, which wastes time and lets late
+    arrivals overtake; queueing them here hands the lock straight to the next
+    writer when a transaction ends. Readers never take it.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._waiters = deque()
+        self._owner = None
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+
+    def acquire(self, timeout=None):
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        ticket = object()
+        with self._cond:
+            self._waiters.append(ticket)
+            try:
+                while self._owner is not None or self._waiters[0] is not ticket:
+                    remaining = (
+                        None if deadline is None else deadline - time.monotonic()
+                    )
+                    if remaining is not None and remaining <= 0:
+                        self.timeouts += 1
+                        return False
+                    self._cond.wait(remaining)
+                self._owner = ticket
+            finally:
+                self._waiters.remove(ticket)
+                self._cond.notify_all()
+            self.acquisitions += 1
+            self.wait_seconds_total += time.monotonic() - started
+        return True
+
+    def release(self):
+        with self._cond:
+            self._owner = None
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "held": self._owner is not None,
+                "waiting": len(self._waiters),
+                "acquisitions": self.acquisitions,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+            }
+
+
+writer_queue = WriterQueue()
+
+_HELD = "sqlite_writer_queue_held"
+
+
+def _acquire_for(session):
+    if session.info.get(_HELD):
+        return
+    timeout = current_app.config["SQLITE_BUSY_TIMEOUT"]
+    if writer_queue.acquire(None if timeout is None else timeout / 1000):
+        session.info[_HELD] = True
+    else:
+        # Fall back to SQLite's own locking rather than failing the write.
+        current_app.logger.warning("Timed out waiting for the database writer queue.")
+
+
+def _before_flush(session, flush_context, instances):
+    if session.new or session.dirty or session.deleted:
+        _acquire_for(session)
+
+
+def _do_orm_execute(orm_execute_state):
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        _acquire_for(orm_execute_state.session)
+
+
+def _after_transaction_end(session, transaction):
+    if transaction.parent is None and session.info.pop(_HELD, False):
+        writer_queue.release()
+
+
+def init_sqlite(app):
+    """
+    Apply the connection pragmas to every new connection of the app's engine
+    and, if enabled, route the app's write transactions through the writer
+    queue (held from the first flush or DML statement until commit/rollback).
+    """
+    with app.app_context():
+        if db.engine.dialect.name != "sqlite":
+            return
+        statements = _pragma_statements(app.config)
+
+        @event.listens_for(db.engine, "connect")
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.close()
+
+    if app.config["SQLITE_WRITE_QUEUE"] and not event.contains(
+        db.session, "before_flush", _before_flush
+    ):
+        event.listen(db.session, "before_flush", _before_flush)
+        event.listen(db.session, "do_orm_execute", _do_orm_execute)
+        event.listen(db.session, "after_transaction_end", _after_transaction_end)
+
+
+@registry.register_collector
+def _writer_queue_metrics():
+    stats = writer_queue.stats()
+    return [
+        (
+            "skillmap_db_writer_queue_waiting",
+            "gauge",
+            "Write transactions waiting for the writer queue.",
+            [({}, stats["waiting"])],
+        ),
+        (
+            "skillmap_db_writer_queue_acquisitions_total",
+            "counter",
+            "Write transactions admitted by the writer queue.",
+            [({}, stats["acquisitions"])],
+        ),
+        (
+            "skillmap_db_writer_queue_wait_seconds_total",
+            "counter",
+            "Time write transactions spent waiting for the writer queue.",
+            [({}, stats["wait_seconds_total"])],
+        ),
+        (
+            "skillmap_db_writer_queue_timeouts_total",
+            "counter",
+            "Writers that gave up waiting and fell back to SQLite locking.",
+            [({}, stats["timeouts"])],
+        ),
+    ]
@@ -0,0 +1,341 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models import InsightJob, LLMInsight, Milestone, Skill
+from app.utils.insight_cache import invalidate_all_insights
+from app.utils.progress import rebuild_progress
+
+FORMATS = ("jsonl", "csv")
+KINDS = ("skill", "milestone", "insight")
+
+# Columns of each record kind, in export order. Milestones and insights
+# refer to their skill by name so files can move between databases.
+FIELDS = {
+    "skill": ["name", "description", "category", "created_at", "updated_at"],
+    "milestone": ["skill", "note", "progress_level", "timestamp"],
+    "insight": ["skill", "section", "content", "generated_at", "prompt_hash"],
+}
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+# Stay well below SQLite's bound parameter limit in IN (...) lists.
+_IN_CHUNK = 500
+
+
+class BulkImportError(ValueError):
+    """A record that could not be imported."""
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _datetime(record, field, default):
+    value = record.get(field)
+    if value in (None, ""):
+        return default
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError) as e:
+        raise BulkImportError(f"invalid {field!r}: {value!r}") from e
+
+
+def _text(record, field, required=False):
+    value = record.get(field)
+    value = None if value in (None, "") else str(value)
+    if required and value is None:
+        raise BulkImportError(f"missing {field!r}")
+    return value
+
+
+def read_records(stream, fmt="jsonl", kind=None):
+    """
+    Yield ``(line_number, record)`` from a JSONL or CSV text stream.
+
+    JSONL records name their kind in a ``kind`` field; a CSV file holds a
+    single kind, given by ``kind``. Lines that can't be decoded are yielded as
+    a ``BulkImportError`` so the importer can report and skip them.
+    """
+    if fmt == "csv":
+        if kind not in KINDS:
+            raise ValueError(f"CSV import needs a kind, one of: {', '.join(KINDS)}")
+        reader = csv.DictReader(stream)
+        for record in reader:
+            record["kind"] = kind
+            yield reader.line_num, record
+        return
+
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, BulkImportError(f"invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield number, BulkImportError("expected a JSON object")
+            continue
+        yield number, record
+
+
+class BulkImporter:
+    """
+    Load skills, milestones and insights with chunked executemany inserts.
+
+    Records are buffered and written ``chunk_size`` at a time, each chunk in
+    its own transaction, so memory stays flat and a failure only loses the
+    current chunk. Skills are matched by name and existing ones are left
+    untouched, which makes re-running an import safe for skills (milestones
+    and insights would be added again). No insights are generated; with
+    ``queue_insights`` an "initial" insight job is queued for every new skill
+    instead, for the background workers to pick up later. Progress
+    aggregates and cached insights are refreshed once at the end.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, queue_insights=False):
+        self.chunk_size = max(1, int(chunk_size))
+        self.queue_insights = queue_insights
+
+        self._pending = {kind: [] for kind in KINDS}
+        self._skill_ids = {}
+        self._touched_skills = set()
+
+        self.imported = {kind: 0 for kind in KINDS}
+        self.existing_skills = 0
+        self.queued_jobs = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add(self, line, record):
+        try:
+            if isinstance(record, BulkImportError):
+                raise record
+            kind = record.get("kind")
+            if kind not in KINDS:
+                raise BulkImportError(f"unknown kind: {kind!r}")
+            self._pending[kind].append((line, getattr(self, f"_{kind}_row")(record)))
+        except BulkImportError as e:
+            self._error(line, e)
+            return
+
+        if sum(len(rows) for rows in self._pending.values()) >= self.chunk_size:
+            self.flush()
+
+    def run(self, records):
+        for line, record in records:
+            self.add(line, record)
+        return self.finish()
+
+    def flush(self):
+        self._flush_skills()
+        self._flush_children("milestone", Milestone)
+        self._flush_children("insight", LLMInsight)
+        db.session.commit()
+
+    def finish(self):
+        self.flush()
+        for skill_ids in _chunks(sorted(self._touched_skills), _IN_CHUNK):
+            rebuild_progress(skill_ids)
+            db.session.commit()
+        if self.imported["milestone"] or self.imported["insight"]:
+            invalidate_all_insights()
+        return self.report()
+
+    def report(self):
+        return {
+            "imported": dict(self.imported),
+            "existing_skills": self.existing_skills,
+            "queued_jobs": self.queued_jobs,
+            "errors": self.error_count,
+            "error_samples": list(self.errors),
+        }
+
+    def _error(self, line, error):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": str(error)})
+
+    @staticmethod
+    def _skill_row(record):
+        now = datetime.utcnow()
+        created_at = _datetime(record, "created_at", now)
+        return {
+            "name": _text(record, "name", required=True),
+            "description": _text(record, "description"),
+            "category": _text(record, "category"),
+            "created_at": created_at,
+            "updated_at": _datetime(record, "updated_at", created_at),
+        }
+
+    @staticmethod
+    def _milestone_row(record):
+        return {
+            "skill": _text(record, "skill", required=True),
+            "note": _text(record, "note", required=True),
+            "progress_level": _text(record, "progress_level"),
+            "timestamp": _datetime(record, "timestamp", datetime.utcnow()),
+        }
+
+    @staticmethod
+    def _insight_row(record):
+        return {
+            "skill": _text(record, "skill", required=True),
+            "section": _text(record, "section"),
+            "content": _text(record, "content", required=True),
+            "generated_at": _datetime(record, "generated_at", datetime.utcnow()),
+            "prompt_hash": _text(record, "prompt_hash"),
+        }
+
+    def _lookup_skills(self, names):
+        found = {}
+        for chunk in _chunks(set(names), _IN_CHUNK):
+            found.update(
+                (name, skill_id)
+                for skill_id, name in db.session.execute(
+                    select(Skill.id, Skill.name).where(Skill.name.in_(chunk))
+                )
+            )
+        self._skill_ids.update(found)
+        return found
+
+    def _flush_skills(self):
+        pending, self._pending["skill"] = self._pending["skill"], []
+        rows = {}
+        for _, row in pending:
+            rows.setdefault(row["name"], row)
+        if not rows:
+            return
+
+        unknown = [name for name in rows if name not in self._skill_ids]
+        existing = self._lookup_skills(unknown)
+        new_rows = [
+            row
+            for name, row in rows.items()
+            if name in unknown and name not in existing
+        ]
+        self.existing_skills += len(pending) - len(new_rows)
+        if not new_rows:
+            return
+
+        db.session.execute(
+            sqlite_insert(Skill).on_conflict_do_nothing(index_elements=["name"]),
+            new_rows,
+        )
+        created = self._lookup_skills(row["name"] for row in new_rows)
+        self.imported["skill"] += len(created)
+
+        if self.queue_insights and created:
+            db.session.execute(
+                insert(InsightJob),
+                [
+                    {"skill_id": skill_id, "section": "initial"}
+                    for skill_id in created.values()
+                ],
+            )
+            self.queued_jobs += len(created)
+
+    def _flush_children(self, kind, model):
+        pending, self._pending[kind] = self._pending[kind], []
+        if not pending:
+            return
+
+        self._lookup_skills(
+            {row["skill"] for _, row in pending} - self._skill_ids.keys()
+        )
+        rows = []
+        for line, row in pending:
+            skill_id = self._skill_ids.get(row["skill"])
+            if skill_id is None:
+                self._error(line, BulkImportError(f"unknown skill: {row['skill']!r}"))
+                continue
+            rows.append(
+                {**{k: v for k, v in row.items() if k != "skill"}, "skill_id": skill_id}
+            )
+        if not rows:
+            return
+
+        db.session.execute(insert(model), rows)
+        self.imported[kind] += len(rows)
+        if kind == "milestone":
+            self._touched_skills.update(row["skill_id"] for row in rows)
+
+
+def _export_query(kind):
+    if kind == "skill":
+        return select(
+            Skill.name,
+            Skill.description,
+            Skill.category,
+            Skill.created_at,
+            Skill.updated_at,
+        ).order_by(Skill.id)
+    if kind == "milestone":
+        return (
+            select(
+                Skill.name.label("skill"),
+                Milestone.note,
+                Milestone.progress_level,
+                Milestone.timestamp,
+            )
+            .join(Skill, Skill.id == Milestone.skill_id)
+            .order_by(Milestone.id)
+        )
+    return (
+        select(
+            Skill.name.label("skill"),
+            LLMInsight.section,
+            LLMInsight.content,
+            LLMInsight.generated_at,
+            LLMInsight.prompt_hash,
+        )
+        .join(Skill, Skill.id == LLMInsight.skill_id)
+        .order_by(LLMInsight.id)
+    )
+
+
+def _serialize(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def iter_export(kinds, yield_per=DEFAULT_CHUNK_SIZE):
+    """
+    Yield ``(kind, record)`` for every row of the given kinds.
+
+    Rows are fetched ``yield_per`` at a time from a streaming cursor, so
+    memory use doesn't grow with the size of the tables.
+    """
+    for kind in kinds:
+        result = db.session.execute(
+            _export_query(kind).execution_options(yield_per=yield_per)
+        )
+        for row in result.mappings():
+            yield kind, {field: _serialize(row[field]) for field in FIELDS[kind]}
+
+
+def export_lines(kinds, fmt="jsonl"):
+    """Yield the export of ``kinds`` as JSONL or CSV text, line by line."""
+    if fmt == "csv":
+        if len(kinds) != 1:
+            raise ValueError("CSV export holds a single kind")
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FIELDS[kinds[0]])
+        writer.writeheader()
+        for _, record in iter_export(kinds):
+            writer.writerow(record)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+        return
+
+    for kind, record in iter_export(kinds):
+        yield json.dumps({"kind": kind, **record}) + "\n"
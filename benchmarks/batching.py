@@ -0,0 +1,147 @@
+"""
+Aggregate decode throughput with and without batched decoding.
+
+Sends the same distinct prompts through ``complete_prompt`` from
+``--concurrency`` threads, once with every completion decoded on its own and
+once with concurrent completions decoded together (``LLMBatcher``), and
+prints the tokens per second of both as JSON::
+
+    python -m benchmarks.batching --prompts 64 --concurrency 16 --max-batch 8
+
+By default the model is the deterministic fake, whose decode steps cost
+``--token-latency-ms`` plus ``--sequence-cost`` of that for every further
+sequence in the step. ``--model`` measures a GGUF file through llama-cpp
+instead.
+"""
+
+import argparse
+import json
+import platform
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils import llm_client
+from benchmarks.fake_llm import FakeBatchDecoder, FakeLlama
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--prompts", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--window-ms", type=float, default=10.0)
+    parser.add_argument("--pool-size", type=int, default=1)
+    parser.add_argument("--max-tokens", type=int, default=64)
+    parser.add_argument(
+        "--token-latency-ms", type=float, default=5.0, help="fake model cost per step"
+    )
+    parser.add_argument(
+        "--sequence-cost",
+        type=float,
+        default=0.1,
+        help="fake model cost of each further sequence in a step, as a share of one",
+    )
+    parser.add_argument("--model", help="GGUF model to measure instead of the fake")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def use_model(args):
+    if args.model:
+        llm_client.MODEL_PATH = args.model
+        return
+    llm_client.get_llm_instance = lambda n_threads=None: FakeLlama(
+        token_latency=args.token_latency_ms / 1000.0, max_tokens=args.max_tokens
+    )
+    llm_client.get_tokenizer_instance = lambda: FakeLlama()
+    llm_client.get_batch_decoder = lambda llm: FakeBatchDecoder(
+        llm, sequence_cost=args.sequence_cost
+    )
+
+
+def configure(args, batched):
+    """Point llm_client at a fresh pool and batcher with these settings."""
+    llm_client.LLM_POOL_SIZE = args.pool_size
+    llm_client.LLM_MAX_BATCH_SIZE = args.max_batch
+    llm_client.LLM_BATCH_WINDOW_MS = args.window_ms if batched else 0
+    llm_client._llm_pool = None
+    llm_client._llm_batcher = None
+    llm_client._llm_backend = None
+
+
+def run(args, prompts, batched):
+    configure(args, batched)
+    backend = llm_client.get_llm_backend()
+    params = {"max_tokens": args.max_tokens, "temperature": 0.7}
+    # Load the model before the clock starts.
+    llm_client.complete_prompt(prompts[0], {**params, "max_tokens": 1})
+
+    latencies = []
+
+    def one(prompt):
+        started = time.perf_counter()
+        text = llm_client.complete_prompt(prompt, params)
+        latencies.append(time.perf_counter() - started)
+        return text
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        texts = list(pool.map(one, prompts))
+    wall = time.perf_counter() - started
+
+    tokens = sum(backend.count_tokens(text) for text in texts)
+    latencies.sort()
+    report = {
+        "wall_seconds": round(wall, 3),
+        "tokens": tokens,
+        "tokens_per_second": round(tokens / wall, 1),
+        "latency_ms": {
+            "p50": round(latencies[len(latencies) // 2] * 1000, 1),
+            "max": round(latencies[-1] * 1000, 1),
+        },
+    }
+    if batched:
+        report["batcher"] = backend.stats().get("batcher")
+    return report, texts
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    use_model(args)
+    prompts = [
+        f"{llm_client.PROMPT_PREFIX}Skill {i}: give one concrete next step "
+        f"for practising skill number {i}."
+        for i in range(args.prompts)
+    ]
+
+    sequential, expected = run(args, prompts, batched=False)
+    batched, texts = run(args, prompts, batched=True)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "model": args.model or "fake",
+            "prompts": args.prompts,
+            "concurrency": args.concurrency,
+            "max_batch": args.max_batch,
+            "pool_size": args.pool_size,
+            "max_tokens": args.max_tokens,
+        },
+        "unbatched": sequential,
+        "batched": batched,
+        "speedup": round(
+            batched["tokens_per_second"] / sequential["tokens_per_second"], 2
+        ),
+    }
+    if not args.model:
+        # The fake samples from the prompt alone, so both runs must agree.
+        report["same_text"] = texts == expected
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
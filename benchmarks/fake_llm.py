@@ -0,0 +1,143 @@
+import hashlib
+import random
+import time
+
+WORDS = (
+    "practice focus consistency review goals feedback deliberate progress "
+    "milestone habit routine improve technique fundamentals schedule reflect "
+    "measure challenge mentor project depth breadth weekly daily plan"
+).split()
+
+
+class FakeLlama:
+    """
+    Deterministic stand-in for ``llama_cpp.Llama``.
+
+    Implements the subset of the API the app uses (tokenize, eval, state
+    save/restore and streamed completions). Output depends only on the prompt,
+    and every generated token costs ``token_latency`` seconds so that pool,
+    batching and streaming overheads show up in the numbers as they would with
+    a real model.
+    """
+
+    def __init__(self, token_latency=0.005, max_tokens=64, prefill_latency=0.0):
+        self.token_latency = token_latency
+        self.max_tokens = max_tokens
+        self.prefill_latency = prefill_latency
+        self.n_tokens = 0
+        self.input_ids = []
+
+    def tokenize(self, text, add_bos=True, special=False):
+        return [
+            int.from_bytes(hashlib.blake2s(word, digest_size=2).digest(), "big")
+            for word in text.split()
+        ]
+
+    def detokenize(self, tokens):
+        return b" ".join(WORDS[t % len(WORDS)].encode() for t in tokens)
+
+    def n_ctx(self):
+        return 4096
+
+    def reset(self):
+        self.n_tokens = 0
+        self.input_ids = []
+
+    def eval(self, tokens):
+        if self.prefill_latency:
+            time.sleep(self.prefill_latency * len(tokens))
+        self.input_ids = self.input_ids + list(tokens)
+        self.n_tokens = len(self.input_ids)
+
+    def save_state(self):
+        return list(self.input_ids)
+
+    def load_state(self, state):
+        self.input_ids = list(state)
+        self.n_tokens = len(self.input_ids)
+
+    def create_completion(
+        self, prompt, max_tokens=16, stream=False, stopping_criteria=None, **kwargs
+    ):
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+        count = min(max_tokens or self.max_tokens, self.max_tokens)
+
+        def chunks():
+            prompt_tokens = self.tokenize(prompt.encode("utf-8"))
+            self.eval(prompt_tokens[self.n_tokens :])
+            generated = []
+            for _ in range(count):
+                time.sleep(self.token_latency)
+                generated.append(rng.randrange(len(WORDS)))
+                if stopping_criteria and stopping_criteria(generated, None):
+                    yield {"choices": [{"text": "", "finish_reason": "stop"}]}
+                    return
+                yield {
+                    "choices": [
+                        {"text": WORDS[generated[-1]] + " ", "finish_reason": None}
+                    ]
+                }
+            yield {"choices": [{"text": "", "finish_reason": "length"}]}
+
+        if stream:
+            return chunks()
+        text = "".join(chunk["choices"][0]["text"] for chunk in chunks())
+        return {"choices": [{"text": text, "finish_reason": "length"}]}
+
+
+class FakeBatchDecoder:
+    """
+    Stand-in for ``app.utils.llm_batch.LlamaBatchDecoder`` on a ``FakeLlama``.
+
+    A decode step costs the model's ``token_latency`` once, plus
+    ``sequence_cost`` of it for every further sequence sampled in the same
+    step (and ``prefill_latency`` per evaluated token). That models CPU
+    decoding, where reading the weights dominates and one pass serves the
+    whole batch. Sequences produce the same text as ``create_completion``
+    for the same prompt.
+    """
+
+    n_batch = 512
+    eos = -1
+
+    def __init__(self, llm, sequence_cost=0.1):
+        self.llm = llm
+        self.n_ctx = llm.n_ctx()
+        self.sequence_cost = sequence_cost
+        self._entries = []
+        self._sampled = {}
+
+    def tokenize(self, text):
+        return self.llm.tokenize(text.encode("utf-8"))
+
+    def detokenize(self, tokens):
+        return "".join(WORDS[t % len(WORDS)] + " " for t in tokens)
+
+    def reset(self):
+        self.llm.reset()
+        self._sampled.clear()
+
+    def copy_sequence(self, source, target, n_tokens):
+        pass
+
+    def remove_sequence(self, seq_id):
+        self._sampled.pop(seq_id, None)
+
+    def decode(self, entries):
+        sampled = sum(1 for entry in entries if entry[3])
+        time.sleep(
+            self.llm.token_latency * (1 + self.sequence_cost * max(0, sampled - 1))
+            + self.llm.prefill_latency * len(entries)
+        )
+        self._entries = entries
+
+    def sample(self, index, params, rng):
+        seq_id = self._entries[index][0]
+        count = self._sampled.get(seq_id, 0)
+        self._sampled[seq_id] = count + 1
+        if count >= self.llm.max_tokens:
+            return self.eos
+        return rng.randrange(len(WORDS))
+
+    def close(self):
+        pass
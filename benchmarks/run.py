@@ -0,0 +1,259 @@
+"""
+SkillMap performance benchmark.
+
+Seeds a database with synthetic data, replaces the model with a deterministic
+fake and drives the main pages through the Flask test client, printing
+latency percentiles, SQL query counts and peak RSS as JSON::
+
+    python -m benchmarks.run --skills 10000 --milestones 1000000 \\
+        --insights 500000 --requests 200 --concurrency 4 --output before.json
+
+An existing database passed with ``--database`` is reused as-is when it
+already contains skills, so large data sets only have to be seeded once.
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+
+def page_cursor(rng):
+    """A list cursor somewhere in the seeded year, so the page starts mid-list."""
+    from app.utils.pagination import encode_cursor
+
+    moment = datetime.utcnow() - timedelta(days=rng.uniform(0, 365))
+    return encode_cursor(moment, 2**62)
+
+
+SCENARIOS = {
+    "dashboard": lambda rng, n: ("GET", "/dashboard", None),
+    "skills_list": lambda rng, n: ("GET", "/skills/", None),
+    "skill_detail": lambda rng, n: ("GET", f"/skills/{rng.randint(1, n)}", None),
+    "insights_list": lambda rng, n: ("GET", "/llm/insights", None),
+    "insights_page": lambda rng, n: (
+        "GET",
+        f"/api/insights?limit=50&cursor={page_cursor(rng)}",
+        None,
+    ),
+    "insight_view": lambda rng, n: ("GET", f"/llm/insight/{rng.randint(1, n)}", None),
+    "insight_generate": lambda rng, n: (
+        "POST",
+        f"/llm/insight/{rng.randint(1, n)}",
+        {"section": "general"},
+    ),
+    "insight_stream": lambda rng, n: (
+        "GET",
+        f"/llm/insight/{rng.randint(1, n)}/stream?section=general",
+        None,
+    ),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--database", help="SQLite file to use (default: temporary)")
+    parser.add_argument("--skills", type=int, default=1000)
+    parser.add_argument("--milestones", type=int, default=50000)
+    parser.add_argument("--insights", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=100, help="per scenario")
+    parser.add_argument("--warmup", type=int, default=3, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="run only these scenarios (repeatable)",
+    )
+    parser.add_argument(
+        "--token-latency-ms", type=float, default=5.0, help="fake model cost per token"
+    )
+    parser.add_argument("--max-tokens", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class QueryCounter:
+    """Counts SQL statements executed by the current thread."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self._local = threading.local()
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self._local.count = getattr(self._local, "count", 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, "count", 0)
+
+
+def run_scenario(app, counter, make_request, args, skill_count):
+    rng = random.Random(args.seed)
+    lock = threading.Lock()
+    results = []
+
+    def one_request(client, record):
+        with lock:
+            method, url, data = make_request(rng, skill_count)
+        counter.reset()
+        started = time.perf_counter()
+        response = client.open(url, method=method, data=data)
+        elapsed = time.perf_counter() - started
+        if record:
+            with lock:
+                results.append((elapsed, counter.count, response.status_code))
+
+    def worker(requests):
+        client = app.test_client()
+        for _ in range(requests):
+            one_request(client, record=True)
+
+    warm_client = app.test_client()
+    for _ in range(args.warmup):
+        one_request(warm_client, record=False)
+
+    concurrency = max(1, args.concurrency)
+    shares = [
+        args.requests // concurrency + (i < args.requests % concurrency)
+        for i in range(concurrency)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, shares))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    queries = [r[1] for r in results]
+    return {
+        "requests": len(results),
+        "errors": sum(1 for r in results if r[2] >= 400),
+        "concurrency": concurrency,
+        "throughput_rps": round(len(results) / wall, 2) if wall else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(sum(latencies) / len(latencies), 3),
+            "max": round(latencies[-1], 3),
+        },
+        "sql_queries": {
+            "mean": round(sum(queries) / len(queries), 2),
+            "max": max(queries),
+            "total": sum(queries),
+        },
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.skills < 1:
+        raise SystemExit("--skills must be at least 1")
+
+    workdir = tempfile.mkdtemp(prefix="skillmap-bench-")
+    database = os.path.abspath(args.database or os.path.join(workdir, "bench.db"))
+
+    from config import Config
+
+    from app import create_app, db
+    from app.models import Skill
+    from app.utils import llm_client
+    from benchmarks.fake_llm import FakeBatchDecoder, FakeLlama
+    from benchmarks.seed import seed
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{database}"
+        CACHE_SQLITE_PATH = os.path.join(workdir, "cache.sqlite3")
+        TOKEN_CACHE_SQLITE_PATH = os.path.join(workdir, "tokens.sqlite3")
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+
+    llm_client.get_llm_instance = lambda n_threads=None: FakeLlama(
+        token_latency=args.token_latency_ms / 1000.0, max_tokens=args.max_tokens
+    )
+    llm_client.get_tokenizer_instance = lambda: FakeLlama()
+    llm_client.get_batch_decoder = FakeBatchDecoder
+
+    # Keep stdout clean for the JSON report.
+    with contextlib.redirect_stdout(sys.stderr):
+        app = create_app(BenchmarkConfig)
+    report = {
+        "meta": {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": database,
+            "token_latency_ms": args.token_latency_ms,
+            "max_tokens": args.max_tokens,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": {},
+    }
+
+    with app.app_context():
+        skill_count = db.session.query(Skill).count()
+        seed_seconds = None
+        if skill_count == 0:
+            started = time.perf_counter()
+            seed(args.skills, args.milestones, args.insights, seed=args.seed)
+            seed_seconds = round(time.perf_counter() - started, 2)
+            skill_count = args.skills
+        report["meta"]["seed_seconds"] = seed_seconds
+        report["meta"]["volumes"] = {
+            table: db.session.execute(db.text(f"SELECT COUNT(*) FROM {table}")).scalar()
+            for table in ("skills", "milestones", "llm_insights")
+        }
+        db.session.remove()
+        counter = QueryCounter(db.engine)
+
+    try:
+        for name in args.scenario or SCENARIOS:
+            report["scenarios"][name] = run_scenario(
+                app, counter, SCENARIOS[name], args, skill_count
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    report["peak_rss_mb"] = round(peak_rss_mb(), 1)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
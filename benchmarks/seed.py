@@ -0,0 +1,73 @@
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import db
+from app.models import LLMInsight, Milestone, Skill
+from app.utils.progress import rebuild_progress
+from benchmarks.fake_llm import WORDS
+
+CATEGORIES = ["Programming", "Music", "Language", "Fitness", "Design", None]
+SECTIONS = ["general", "initial", "progress update"]
+CHUNK_SIZE = 5000
+
+
+def _sentence(rng, length):
+    return " ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + "."
+
+
+def _insert_chunked(model, count, make_row):
+    for start in range(0, count, CHUNK_SIZE):
+        rows = [make_row(i) for i in range(start, min(start + CHUNK_SIZE, count))]
+        db.session.execute(insert(model), rows)
+        db.session.commit()
+
+
+def seed(skills, milestones, insights, days=365, seed=0):
+    """
+    Fill an empty database with synthetic skills, milestones and insights.
+
+    Rows are written with chunked executemany inserts rather than the ORM, and
+    progress aggregates are rebuilt once at the end.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    def moment(max_days):
+        return now - timedelta(seconds=rng.randrange(max_days * 86400))
+
+    _insert_chunked(
+        Skill,
+        skills,
+        lambda i: {
+            "name": f"Skill {i + 1:07d}",
+            "description": _sentence(rng, 12),
+            "category": rng.choice(CATEGORIES),
+            "created_at": moment(days),
+            "updated_at": moment(30),
+        },
+    )
+    _insert_chunked(
+        Milestone,
+        milestones,
+        lambda i: {
+            "skill_id": rng.randint(1, skills),
+            "note": _sentence(rng, rng.randint(5, 25)),
+            "progress_level": str(rng.randint(1, 10)),
+            "timestamp": moment(days),
+        },
+    )
+    _insert_chunked(
+        LLMInsight,
+        insights,
+        lambda i: {
+            "skill_id": rng.randint(1, skills),
+            "section": rng.choice(SECTIONS),
+            "content": " ".join(_sentence(rng, 20) for _ in range(5)),
+            "generated_at": moment(days),
+        },
+    )
+
+    rebuild_progress()
+    db.session.commit()
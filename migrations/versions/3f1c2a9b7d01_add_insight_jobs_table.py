@@ -0,0 +1,43 @@
+"""add insight_jobs table
+
+Revision ID: 3f1c2a9b7d01
+Revises:
+Create Date: 2026-10-18 18:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9b7d01'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'insight_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('skill_id', sa.Integer(), nullable=False),
+        sa.Column('section', sa.String(length=100), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('insight_id', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['insight_id'], ['llm_insights.id'], ),
+        sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('insight_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_insight_jobs_status'), ['status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('insight_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_insight_jobs_status'))
+
+    op.drop_table('insight_jobs')
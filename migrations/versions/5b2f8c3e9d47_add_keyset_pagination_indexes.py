@@ -0,0 +1,38 @@
+"""add keyset pagination indexes
+
+Revision ID: 5b2f8c3e9d47
+Revises: c7d9e1f04a22
+Create Date: 2026-10-18 20:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2f8c3e9d47'
+down_revision = 'c7d9e1f04a22'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('skills', schema=None) as batch_op:
+        batch_op.create_index('ix_skills_updated_at_id', ['updated_at', 'id'], unique=False)
+
+    with op.batch_alter_table('milestones', schema=None) as batch_op:
+        batch_op.create_index('ix_milestones_skill_id_timestamp_id', ['skill_id', 'timestamp', 'id'], unique=False)
+
+    with op.batch_alter_table('llm_insights', schema=None) as batch_op:
+        batch_op.create_index('ix_llm_insights_generated_at_id', ['generated_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('llm_insights', schema=None) as batch_op:
+        batch_op.drop_index('ix_llm_insights_generated_at_id')
+
+    with op.batch_alter_table('milestones', schema=None) as batch_op:
+        batch_op.drop_index('ix_milestones_skill_id_timestamp_id')
+
+    with op.batch_alter_table('skills', schema=None) as batch_op:
+        batch_op.drop_index('ix_skills_updated_at_id')
@@ -0,0 +1,28 @@
+"""add llm_insights.prompt_hash
+
+Revision ID: 8a4e6d2c5b13
+Revises: 3f1c2a9b7d01
+Create Date: 2026-10-18 19:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6d2c5b13'
+down_revision = '3f1c2a9b7d01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('llm_insights', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('prompt_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_llm_insights_prompt_hash'), ['prompt_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('llm_insights', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_llm_insights_prompt_hash'))
+        batch_op.drop_column('prompt_hash')
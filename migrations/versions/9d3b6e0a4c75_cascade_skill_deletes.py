@@ -0,0 +1,94 @@
+"""cascade skill deletes in the database
+
+Revision ID: 9d3b6e0a4c75
+Revises: e2a7b94c1f68
+Create Date: 2026-10-18 21:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3b6e0a4c75'
+down_revision = 'e2a7b94c1f68'
+branch_labels = None
+depends_on = None
+
+
+# SQLite can't alter constraints in place, so each table is rebuilt. The
+# original foreign keys are unnamed; the convention lets batch mode find them.
+NAMING_CONVENTION = {
+    'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s',
+}
+
+FOREIGN_KEYS = [
+    # (table, column, referred table, ondelete)
+    ('milestones', 'skill_id', 'skills', 'CASCADE'),
+    ('llm_insights', 'skill_id', 'skills', 'CASCADE'),
+    ('insight_jobs', 'skill_id', 'skills', 'CASCADE'),
+    ('insight_jobs', 'insight_id', 'llm_insights', 'SET NULL'),
+    ('skill_progress', 'skill_id', 'skills', 'CASCADE'),
+    ('skill_progress_buckets', 'skill_id', 'skills', 'CASCADE'),
+]
+
+# Rebuilding a table drops its triggers, including the ones that keep the
+# full-text indexes in sync.
+FTS_TABLES = {
+    'milestones': ('milestones_fts', 'note'),
+    'llm_insights': ('llm_insights_fts', 'content'),
+}
+
+
+def _recreate_fts_triggers():
+    for table, (fts, column) in FTS_TABLES.items():
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column}) "
+            f"VALUES ('delete', old.id, old.{column}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table} "
+            f"BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {column}) "
+            f"VALUES ('delete', old.id, old.{column}); "
+            f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+        )
+
+
+def _set_ondelete(with_ondelete):
+    tables = []
+    for table, *_ in FOREIGN_KEYS:
+        if table not in tables:
+            tables.append(table)
+
+    for table in tables:
+        with op.batch_alter_table(
+            table, recreate='always', naming_convention=NAMING_CONVENTION
+        ) as batch_op:
+            for fk_table, column, referred, ondelete in FOREIGN_KEYS:
+                if fk_table != table:
+                    continue
+                name = f'fk_{table}_{column}_{referred}'
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(
+                    name,
+                    referred,
+                    [column],
+                    ['id'],
+                    ondelete=ondelete if with_ondelete else None,
+                )
+
+    _recreate_fts_triggers()
+
+
+def upgrade():
+    _set_ondelete(True)
+
+
+def downgrade():
+    _set_ondelete(False)
@@ -0,0 +1,25 @@
+"""add llm_insights skill/section index
+
+Revision ID: a1c5e7f93b20
+Revises: 9d3b6e0a4c75
+Create Date: 2026-10-18 22:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c5e7f93b20'
+down_revision = '9d3b6e0a4c75'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain CREATE INDEX: a batch table rebuild would drop the FTS triggers.
+    op.create_index('ix_llm_insights_skill_id_section_generated_at', 'llm_insights', ['skill_id', 'section', 'generated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_llm_insights_skill_id_section_generated_at', table_name='llm_insights')
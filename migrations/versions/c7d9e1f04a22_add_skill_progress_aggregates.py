@@ -0,0 +1,75 @@
+"""add skill progress aggregates
+
+Revision ID: c7d9e1f04a22
+Revises: 8a4e6d2c5b13
+Create Date: 2026-10-18 19:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d9e1f04a22'
+down_revision = '8a4e6d2c5b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'skill_progress',
+        sa.Column('skill_id', sa.Integer(), nullable=False),
+        sa.Column('milestone_count', sa.Integer(), nullable=False),
+        sa.Column('last_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('latest_level', sa.String(length=50), nullable=True),
+        sa.Column('max_level', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ),
+        sa.PrimaryKeyConstraint('skill_id')
+    )
+    op.create_table(
+        'skill_progress_buckets',
+        sa.Column('skill_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.Date(), nullable=False),
+        sa.Column('milestone_count', sa.Integer(), nullable=False),
+        sa.Column('max_level', sa.Integer(), nullable=False),
+        sa.Column('last_timestamp', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['skill_id'], ['skills.id'], ),
+        sa.PrimaryKeyConstraint('skill_id', 'period', 'bucket_start')
+    )
+
+    # Backfill from existing milestones (same queries as `flask progress rebuild`).
+    op.execute(
+        """
+        INSERT INTO skill_progress
+            (skill_id, milestone_count, last_timestamp, latest_level, max_level)
+        SELECT m.skill_id, COUNT(m.id), MAX(m.timestamp),
+            (SELECT n.progress_level FROM milestones n
+             WHERE n.skill_id = m.skill_id
+             ORDER BY n.timestamp DESC, n.id DESC LIMIT 1),
+            COALESCE(MAX(CAST(m.progress_level AS INTEGER)), 0)
+        FROM milestones m
+        GROUP BY m.skill_id
+        """
+    )
+    for period, bucket in (
+        ('day', "date(timestamp)"),
+        ('week', "date(timestamp, 'weekday 0', '-6 days')"),
+    ):
+        op.execute(
+            f"""
+            INSERT INTO skill_progress_buckets
+                (skill_id, period, bucket_start, milestone_count, max_level,
+                 last_timestamp)
+            SELECT skill_id, '{period}', {bucket}, COUNT(id),
+                COALESCE(MAX(CAST(progress_level AS INTEGER)), 0), MAX(timestamp)
+            FROM milestones
+            GROUP BY skill_id, {bucket}
+            """
+        )
+
+
+def downgrade():
+    op.drop_table('skill_progress_buckets')
+    op.drop_table('skill_progress')
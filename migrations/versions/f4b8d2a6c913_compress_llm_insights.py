@@ -0,0 +1,109 @@
+"""compress llm_insights content
+
+Revision ID: f4b8d2a6c913
+Revises: a1c5e7f93b20
+Create Date: 2026-10-18 23:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b8d2a6c913'
+down_revision = 'a1c5e7f93b20'
+branch_labels = None
+depends_on = None
+
+
+# Both directions need the insight_text() SQL function, which the app
+# registers on its connections (app.utils.compression).
+TRIGGERS = ('llm_insights_fts_ai', 'llm_insights_fts_ad', 'llm_insights_fts_au')
+
+
+def _drop_fts():
+    for trigger in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS llm_insights_fts")
+
+
+def upgrade():
+    op.create_table(
+        'insight_dictionaries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('samples', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+    # Existing rows stay TEXT until `flask insights compact` rewrites them;
+    # the index reads either kind through insight_text().
+    _drop_fts()
+    op.execute(
+        "CREATE VIEW IF NOT EXISTS llm_insights_text AS "
+        "SELECT id, insight_text(content) AS content FROM llm_insights"
+    )
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS llm_insights_fts USING fts5("
+        "content, content='llm_insights_text', content_rowid='id', "
+        "tokenize='porter unicode61')"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS llm_insights_fts_ai AFTER INSERT ON llm_insights "
+        "BEGIN "
+        "INSERT INTO llm_insights_fts(rowid, content) "
+        "VALUES (new.id, insight_text(new.content)); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS llm_insights_fts_ad AFTER DELETE ON llm_insights "
+        "BEGIN "
+        "INSERT INTO llm_insights_fts(llm_insights_fts, rowid, content) "
+        "VALUES ('delete', old.id, insight_text(old.content)); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS llm_insights_fts_au "
+        "AFTER UPDATE OF content ON llm_insights "
+        "WHEN insight_text(old.content) IS NOT insight_text(new.content) BEGIN "
+        "INSERT INTO llm_insights_fts(llm_insights_fts, rowid, content) "
+        "VALUES ('delete', old.id, insight_text(old.content)); "
+        "INSERT INTO llm_insights_fts(rowid, content) "
+        "VALUES (new.id, insight_text(new.content)); END"
+    )
+    op.execute("INSERT INTO llm_insights_fts(llm_insights_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    _drop_fts()
+    op.execute("DROP VIEW IF EXISTS llm_insights_text")
+    op.execute(
+        "UPDATE llm_insights SET content = insight_text(content) "
+        "WHERE typeof(content) = 'blob'"
+    )
+
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS llm_insights_fts USING fts5("
+        "content, content='llm_insights', content_rowid='id', "
+        "tokenize='porter unicode61')"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS llm_insights_fts_ai AFTER INSERT ON llm_insights "
+        "BEGIN "
+        "INSERT INTO llm_insights_fts(rowid, content) VALUES (new.id, new.content); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS llm_insights_fts_ad AFTER DELETE ON llm_insights "
+        "BEGIN "
+        "INSERT INTO llm_insights_fts(llm_insights_fts, rowid, content) "
+        "VALUES ('delete', old.id, old.content); END"
+    )
+    op.execute(
+        "CREATE TRIGGER IF NOT EXISTS llm_insights_fts_au "
+        "AFTER UPDATE OF content ON llm_insights BEGIN "
+        "INSERT INTO llm_insights_fts(llm_insights_fts, rowid, content) "
+        "VALUES ('delete', old.id, old.content); "
+        "INSERT INTO llm_insights_fts(rowid, content) VALUES (new.id, new.content); END"
+    )
+    op.execute("INSERT INTO llm_insights_fts(llm_insights_fts) VALUES ('rebuild')")
+
+    op.drop_table('insight_dictionaries')